@@ -0,0 +1,54 @@
+"""
+Measure ChatIndex build, load and sender/date filter queries on a synthetic Telegram export.
+Run from the repository root: python benchmarks/bench_chat_index.py [messages_count]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from bench_json_stream import make_synthetic_export  # noqa: E402
+from chat_index import ChatIndex  # noqa: E402
+
+DAY: int = 24 * 60 * 60
+
+
+def main():
+    messages_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "result.json")
+        make_synthetic_export(file_path, messages_count)
+
+        start = time.perf_counter()
+        ChatIndex.build(file_path)
+        print(f"Build: {time.perf_counter() - start:7.2f} s (once per export)")
+
+        start = time.perf_counter()
+        chat_index = ChatIndex.load(file_path)
+        print(f"Load:  {(time.perf_counter() - start) * 1000:7.1f} ms, {len(chat_index)} text messages")
+
+        first_day = int(chat_index.timestamps.min())
+        queries = {
+            "one sender": dict(sender_ids=[chat_index.senders[0]]),
+            "one month": dict(start=first_day, end=first_day + 30 * DAY),
+            "sender + month": dict(sender_ids=[chat_index.senders[1]], start=first_day, end=first_day + 30 * DAY),
+        }
+        for name, query in queries.items():
+            start = time.perf_counter()
+            rows = chat_index.select(**query)
+            select_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            chat_index.count_words(rows)
+            count_time = time.perf_counter() - start
+            print(f"{name:>15}: select {select_time * 1000:6.1f} ms, {len(rows):>8} rows, "
+                  f"count words {count_time:6.2f} s")
+
+        del chat_index  # Release memory-mapped blob before the directory is removed
+
+
+if __name__ == "__main__":
+    main()
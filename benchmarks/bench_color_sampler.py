@@ -0,0 +1,77 @@
+"""
+Colouring words by the mask: wordcloud.ImageColorGenerator vs the summed-area table sampler (color_sampler.py).
+Synthetic input: Zipf-like word frequencies on a colourful ellipse mask. Words are placed once, then recolored
+by every generator twice: first time includes making its tables, second time they are reused.
+Colours differ from stock ones a bit: ImageColorGenerator averages a box with width and height swapped.
+Run from the repository root: python benchmarks/bench_color_sampler.py [words] [width] [height]
+Defaults are 600 words on a 3840x2160 mask.
+"""
+import os
+import sys
+import time
+
+import numpy
+from PIL import Image
+from PIL import ImageDraw
+from wordcloud import ImageColorGenerator
+from wordcloud import WordCloud
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from color_sampler import SatColorGenerator  # noqa: E402
+from constants import ColorSampling  # noqa: E402
+from constants import LayoutEngine  # noqa: E402
+from font_metrics import FontMetricsCache  # noqa: E402
+from font_metrics import measuring_with  # noqa: E402
+from layout_engine import using_layout_engine  # noqa: E402
+
+
+def make_words(words_count: int) -> dict[str, int]:
+    # Different lengths, so boxes are not all alike
+    return {f"word{i}{'x' * (i % 7)}": 100_000 // (i + 1) + 1 for i in range(words_count)}
+
+
+def make_mask(width: int, height: int) -> numpy.ndarray:
+    # Colour gradients inside of the ellipse, so every word gets a different colour. Never pure white inside
+    columns, rows = numpy.meshgrid(numpy.linspace(0, 250, width), numpy.linspace(0, 250, height))
+    mask = numpy.dstack((columns, rows, 250 - columns)).astype(numpy.uint8)
+    outside = Image.new("L", (width, height), 255)
+    ImageDraw.Draw(outside).ellipse((width // 20, height // 20, width - width // 20, height - height // 20), fill=0)
+    mask[numpy.array(outside) == 255] = 255
+    return mask
+
+
+def main():
+    words_count = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 3840
+    height = int(sys.argv[3]) if len(sys.argv) > 3 else 2160
+    words = make_words(words_count)
+    mask = make_mask(width, height)
+    print(f"{words_count} words, {width}x{height} mask")
+
+    font_metrics = FontMetricsCache()
+    wc = WordCloud(max_words=words_count, mask=mask, min_font_size=4, random_state=42)
+    with measuring_with(font_metrics), using_layout_engine(LayoutEngine.NUMPY_SAT):
+        wc.generate_from_frequencies(words)
+    print(f"{len(wc.layout_)} words placed")
+
+    start = time.perf_counter()
+    wc.recolor(color_func=ImageColorGenerator(mask))
+    stock_elapsed = time.perf_counter() - start
+    print(f"{'ImageColorGenerator':<20} | {stock_elapsed * 1000:8.1f} ms | every recolor costs the same")
+
+    for sampling in ColorSampling:
+        sampler = SatColorGenerator(mask, sampling, font_metrics=font_metrics)
+        start = time.perf_counter()
+        wc.recolor(color_func=sampler)
+        first_elapsed = time.perf_counter() - start
+        # Same mask again, e.g. a restyled preview or the next frame with the same mask
+        start = time.perf_counter()
+        wc.recolor(color_func=sampler)
+        elapsed = time.perf_counter() - start
+        print(f"{'Sat ' + sampling.name:<20} | {first_elapsed * 1000:8.1f} ms | {elapsed * 1000:6.1f} ms again, "
+              f"{stock_elapsed / elapsed:5.1f}x faster than stock")
+
+
+if __name__ == "__main__":
+    main()
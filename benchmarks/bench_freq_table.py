@@ -0,0 +1,71 @@
+"""
+Compare full sort + list.remove filtering with FrequencyTable top-K selection on big synthetic vocabularies.
+Run from the repository root: python benchmarks/bench_freq_table.py [distinct_words ...]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from freq_table import FrequencyTable  # noqa: E402
+
+# Quadratic legacy filtering takes ages on big vocabularies, it is only measured below this size
+LEGACY_MAX_VOCABULARY: int = 200_000
+
+
+def make_vocabulary(distinct_words: int, seed: int = 42) -> dict[str, int]:
+    """
+    Zipf-like counts: a few very popular words and a long tail of words seen once or twice.
+    """
+    rnd = random.Random(seed)
+    alphabet = "abcdefghijklmnopqrstuvwxyz"
+    words_stat: dict[str, int] = {}
+    while len(words_stat) < distinct_words:
+        word = "".join(rnd.choices(alphabet, k=rnd.randint(1, 12)))
+        words_stat[word] = max(1, int(1_000_000 / (len(words_stat) + 1)))
+    return words_stat
+
+
+def legacy_sort_and_filter(words_stat: dict[str, int], min_word_size: int) -> list[tuple[str, int]]:
+    words_list_clean = sorted(words_stat.items(), key=lambda x: x[1], reverse=True)
+    list_words_to_remove = [word for word in words_list_clean if len(word[0]) < min_word_size]
+    for word in list_words_to_remove:
+        words_list_clean.remove(word)
+    return words_list_clean
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000, 5_000_000]
+    max_words, min_word_size = 300, 3
+
+    for distinct_words in sizes:
+        words_stat = make_vocabulary(distinct_words)
+        line = f"{distinct_words:>9} words |"
+
+        if distinct_words <= LEGACY_MAX_VOCABULARY:
+            start = time.perf_counter()
+            legacy_sort_and_filter(words_stat, min_word_size)[:max_words]
+            line += f" sort + remove: {time.perf_counter() - start:7.2f} s |"
+        else:
+            line += " sort + remove:   skipped |"
+
+        start = time.perf_counter()
+        freq_table = FrequencyTable.from_dict(words_stat, min_word_size)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        freq_table.top_k(max_words)
+        top_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        freq_table.bottom_k(max_words)
+        bottom_time = time.perf_counter() - start
+
+        print(f"{line} table build: {build_time:6.2f} s, top-{max_words}: {top_time * 1000:7.1f} ms, "
+              f"bottom-{max_words}: {bottom_time * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Accuracy vs memory of approximate (SpaceSavingCounter) counting compared to exact Counter.
+Synthetic chat: Zipf-like real words plus a lot of one-off junk (URLs, hashes, typos) that blows up the vocabulary.
+Run from the repository root: python benchmarks/bench_heavy_hitters.py [tokens_millions]
+"""
+import itertools
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from heavy_hitters import SpaceSavingCounter  # noqa: E402
+from heavy_hitters import capacity_for_memory  # noqa: E402
+
+TOP_WORDS: int = 300
+BATCH_SIZE: int = 20  # Tokens per "message"
+
+
+def make_batches(tokens_count: int, seed: int = 42) -> list[list[str]]:
+    rnd = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(50_000)]
+    # Zipf weights: word i is seen ~1/(i+1) as often as the most popular one
+    cum_weights = list(itertools.accumulate(1 / (i + 1) for i in range(len(vocabulary))))
+    tokens = rnd.choices(vocabulary, cum_weights=cum_weights, k=tokens_count)
+    for i in range(0, tokens_count, 3):
+        tokens[i] = f"{rnd.getrandbits(64):016x}"  # Every third token is junk seen only once
+    return [tokens[i:i + BATCH_SIZE] for i in range(0, len(tokens), BATCH_SIZE)]
+
+
+def measure(make_counter, batches: list[list[str]]):
+    tracemalloc.start()
+    start = time.perf_counter()
+    counter = make_counter()
+    for batch in batches:
+        counter.update(batch)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return counter, elapsed, peak
+
+
+def main():
+    tokens_count = int(float(sys.argv[1]) * 1_000_000) if len(sys.argv) > 1 else 5_000_000
+    batches = make_batches(tokens_count)
+
+    exact, exact_time, exact_peak = measure(Counter, batches)
+    true_top = exact.most_common(TOP_WORDS)
+    true_top_words = {word for word, _ in true_top}
+    print(f"{tokens_count:,} tokens, {len(exact):,} distinct words")
+    print(f"exact Counter       | {exact_peak / 2 ** 20:8.1f} MB peak | {exact_time:6.2f} s")
+
+    for memory_mb in (64, 16, 4, 1):
+        capacity = capacity_for_memory(memory_mb << 20)
+        approx, approx_time, approx_peak = measure(lambda: SpaceSavingCounter(capacity), batches)
+        approx_top = approx.to_table().top_k(TOP_WORDS)
+        recall = len(true_top_words & {word for word, _ in approx_top}) / len(true_top_words)
+        max_error = max(count - exact[word] for word, count in approx_top)
+        print(f"cap {memory_mb:>3} MB ({capacity:>7,} words) | {approx_peak / 2 ** 20:8.1f} MB peak | "
+              f"{approx_time:6.2f} s | top-{TOP_WORDS} recall {recall:6.1%} | "
+              f"max overcount {max_error:>6} (bound {approx.error_bound:>6})")
+
+
+if __name__ == "__main__":
+    main()
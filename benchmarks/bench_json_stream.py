@@ -0,0 +1,91 @@
+"""
+Compare full json.loads() JSON chat parsing with the streaming parser on synthetic Telegram exports.
+Run from the repository root: python benchmarks/bench_json_stream.py [messages_count ...]
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import text_parse_helpers as parsehelp  # noqa: E402
+
+
+def make_synthetic_export(file_path: str, messages_count: int, seed: int = 42):
+    """
+    Write a fake Telegram chat export. Words follow a Zipf-like distribution like a real chat does.
+    """
+    rnd = random.Random(seed)
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ipsum.txt"), encoding="utf-8") as f:
+        vocabulary = list(dict.fromkeys(f.read().split()))
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+
+    with open(file_path, 'w', encoding="utf-8") as f:
+        f.write('{\n "name": "Benchmark chat",\n "type": "private_group",\n "id": 1234567890,\n "messages": [\n')
+        for i in range(messages_count):
+            if rnd.random() < 0.05:
+                # Nested message with link, parser must skip it
+                text = [{"type": "link", "text": "https://example.com"}, " look"]
+            else:
+                text = " ".join(rnd.choices(vocabulary, weights, k=rnd.randint(1, 30)))
+            message = {
+                "id": i,
+                "type": "message",
+                "date": "2024-01-01T12:00:00",
+                "date_unixtime": str(1704110400 + i * 60),
+                "from": f"User {i % 7}",
+                "from_id": f"user{i % 7}",
+                "text": text,
+                "text_entities": [{"type": "plain", "text": text if isinstance(text, str) else ""}],
+            }
+            f.write("  " + json.dumps(message, ensure_ascii=False) + (",\n" if i < messages_count - 1 else "\n"))
+        f.write(" ]\n}\n")
+
+
+def parse_full(file_path: str):
+    with open(file_path, 'r', encoding="utf-8") as json_file:
+        json_data = json.loads(json_file.read())
+    return parsehelp.parse_json_chat(json_data, min_word_size=3)
+
+
+def parse_stream(file_path: str):
+    return parsehelp.parse_json_chat_stream(file_path, min_word_size=3)
+
+
+def measure(func, file_path: str) -> tuple[float, float, list]:
+    start = time.perf_counter()
+    result = func(file_path)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(file_path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return elapsed, peak / 2 ** 20, result
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 500_000]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for messages_count in sizes:
+            file_path = os.path.join(tmp_dir, f"export_{messages_count}.json")
+            make_synthetic_export(file_path, messages_count)
+            file_mb = os.path.getsize(file_path) / 2 ** 20
+
+            full_time, full_peak, full_result = measure(parse_full, file_path)
+            stream_time, stream_peak, stream_result = measure(parse_stream, file_path)
+            assert full_result == stream_result, "Streaming parser result differs!"
+
+            print(f"{messages_count:>9} msgs ({file_mb:7.1f} MB) | "
+                  f"json.loads: {full_time:6.2f} s, peak {full_peak:8.1f} MB | "
+                  f"stream: {stream_time:6.2f} s, peak {stream_peak:8.1f} MB")
+            os.remove(file_path)
+
+
+if __name__ == "__main__":
+    main()
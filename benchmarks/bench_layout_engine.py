@@ -0,0 +1,54 @@
+"""
+Word placement time of the stock WordCloud engine vs the NumPy summed-area table one (layout_engine.py).
+Synthetic input: Zipf-like word frequencies and an ellipse mask. Both engines get the same words and random seed.
+Run from the repository root: python benchmarks/bench_layout_engine.py [words] [width] [height]
+Defaults are 1200 words on a 3840x2160 mask, the stock engine takes minutes there.
+"""
+import os
+import sys
+import time
+
+import numpy
+from PIL import Image
+from PIL import ImageDraw
+from wordcloud import WordCloud
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from constants import LayoutEngine  # noqa: E402
+from layout_engine import using_layout_engine  # noqa: E402
+
+
+def make_words(words_count: int) -> dict[str, int]:
+    # Different lengths, so boxes are not all alike
+    return {f"word{i}{'x' * (i % 7)}": 100_000 // (i + 1) + 1 for i in range(words_count)}
+
+
+def make_mask(width: int, height: int) -> numpy.ndarray:
+    mask = Image.new("RGB", (width, height), "white")
+    ImageDraw.Draw(mask).ellipse((width // 20, height // 20, width - width // 20, height - height // 20), fill="black")
+    return numpy.array(mask)
+
+
+def main():
+    words_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1200
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 3840
+    height = int(sys.argv[3]) if len(sys.argv) > 3 else 2160
+    words = make_words(words_count)
+    mask = make_mask(width, height)
+    print(f"{words_count} words, {width}x{height} mask")
+
+    for engine in (LayoutEngine.NUMPY_SAT, LayoutEngine.WORDCLOUD):
+        wc = WordCloud(max_words=words_count, mask=mask, min_font_size=4, random_state=42)
+        start = time.perf_counter()
+        with using_layout_engine(engine):
+            wc.generate_from_frequencies(words)
+        elapsed = time.perf_counter() - start
+        # Layout is drawn by WordCloud itself, so it must render the same way for both engines
+        wc.to_image()
+        print(f"{engine.name:<10} | {elapsed:7.2f} s | {len(wc.layout_):>5} words placed | "
+              f"biggest font {wc.layout_[0][1]:>4} px | smallest {wc.layout_[-1][1]:>3} px")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Compare the old per-frame mask preprocessing (copy, exact colour matches, then WordCloud casting the RGB mask
+to booleans) with mask_processing.process_mask() on a synthetic 4K frame of black, white and noisy colours.
+Both must give the same WordCloud mask at tolerance 0.
+Run from the repository root: python benchmarks/bench_mask_processing.py [width] [height]
+"""
+import os
+import sys
+import time
+
+import numpy
+from wordcloud import WordCloud
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from constants import MASKING_STRATEGIES  # noqa: E402
+from mask_processing import process_mask  # noqa: E402
+
+REPEATS: int = 5
+
+
+# Copy of app.process_mask_colors() before mask_processing existed
+def legacy_process(choice: str, mask: numpy.ndarray) -> numpy.ndarray:
+    if choice == "Black + White are masked":
+        mask_blk_color = numpy.all(mask == [0, 0, 0], axis=-1)
+        mask[mask_blk_color] = [255, 255, 255]
+    elif choice == "Black is masked":
+        mask_wht_color = numpy.all(mask == [255, 255, 255], axis=-1)
+        mask_blk_color = numpy.all(mask == [0, 0, 0], axis=-1)
+        mask[mask_wht_color] = [254, 254, 254]
+        mask[mask_blk_color] = [255, 255, 255]
+    elif choice == "None are masked":
+        mask_wht_color = numpy.all(mask == [255, 255, 255], axis=-1)
+        mask[mask_wht_color] = [254, 254, 254]
+    return mask
+
+
+def make_frame(width: int, height: int) -> numpy.ndarray:
+    # Black top, white bottom and a band of colours in between, like a mask with a drawn shape
+    rng = numpy.random.default_rng(42)
+    frame = rng.integers(0, 256, (height, width, 3), dtype=numpy.uint8)
+    frame[:height // 3] = 0
+    frame[2 * height // 3:] = 255
+    return frame
+
+
+def timed(function) -> tuple[float, numpy.ndarray]:
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        result = function()
+    return (time.perf_counter() - start) / REPEATS, result
+
+
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 3840
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else 2160
+    frame = make_frame(width, height)
+    wc = WordCloud()
+    print(f"{width}x{height} RGB frame, mean of {REPEATS} runs")
+
+    for strategy in MASKING_STRATEGIES:
+        # What a frame cost before: a copy to process, then WordCloud's own pass to make booleans of it
+        legacy_time, legacy_mask = timed(lambda: wc._get_bolean_mask(legacy_process(strategy, frame.copy())))
+        new_time, new_mask = timed(lambda: wc._get_bolean_mask(process_mask(frame, strategy)))
+        same = numpy.array_equal(legacy_mask, new_mask)
+        print(f"{strategy:<25} | legacy: {legacy_time * 1000:7.1f} ms | new: {new_time * 1000:6.1f} ms | "
+              f"speedup x{legacy_time / new_time:5.1f} | same mask: {same}")
+
+    # Things the old code could not do at all
+    rgba = numpy.dstack((frame, numpy.full(frame.shape[:2], 255, dtype=numpy.uint8)))
+    rgba_time, _ = timed(lambda: process_mask(rgba, "Black + White are masked"))
+    tolerance_time, _ = timed(lambda: process_mask(frame, "Black + White are masked", tolerance=16))
+    print(f"{'RGBA with alpha':<25} | {rgba_time * 1000:6.1f} ms")
+    print(f"{'Tolerance 16':<25} | {tolerance_time * 1000:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Word counting throughput with token normalization off and on (folding counted words vs normalizing every token).
+Synthetic chat: Zipf-like Latin and Cyrillic words in random case, with some fullwidth spellings thrown in.
+Run from the repository root: python benchmarks/bench_normalizer.py [tokens_millions]
+"""
+import itertools
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from normalizer import TokenNormalizer  # noqa: E402
+from tokenizer import tokenize  # noqa: E402
+
+MESSAGE_WORDS: int = 12
+REPEATS: int = 3
+
+
+def make_messages(tokens_count: int, seed: int = 42) -> list[str]:
+    rnd = random.Random(seed)
+    vocabulary = [f"word{i}" if i % 2 else f"слово{i}" for i in range(100_000)]
+    cum_weights = list(itertools.accumulate(1 / (i + 1) for i in range(len(vocabulary))))
+    spellings = (str.lower, str.capitalize, str.upper)
+    tokens = [rnd.choice(spellings)(word) for word in rnd.choices(vocabulary, cum_weights=cum_weights, k=tokens_count)]
+    for i in range(0, tokens_count, 50):
+        # Fullwidth letters, NFKC turns them back into ASCII
+        tokens[i] = "".join(chr(ord(char) + 0xFEE0) if char.isascii() else char for char in tokens[i])
+    return [" ".join(tokens[i:i + MESSAGE_WORDS]) for i in range(0, tokens_count, MESSAGE_WORDS)]
+
+
+def best_time(function) -> float:
+    # Best of a few runs, a single run on a busy machine says more about the machine than about the code
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    tokens_count = int(float(sys.argv[1]) * 1_000_000) if len(sys.argv) > 1 else 5_000_000
+    # Tokenizing costs the same in every row, so it is done once and only counting is timed
+    messages = [tokenize(text) for text in make_messages(tokens_count)]
+    print(f"{tokens_count:,} tokens, best of {REPEATS} runs, tokenizing not included")
+
+    words_stat: Counter = Counter()
+
+    def count_plain():
+        words_stat.clear()
+        for words in messages:
+            words_stat.update(words)
+
+    plain_time = best_time(count_plain)
+    print(f"no normalization                 | {plain_time:6.2f} s | {len(words_stat):>9,} distinct words")
+
+    folded: dict = {}
+
+    def fold():
+        folded.clear()
+        folded.update(TokenNormalizer().fold_counts(words_stat))
+
+    fold_time = best_time(fold)
+    print(f"fold counted words               | {plain_time + fold_time:6.2f} s | {len(folded):>9,} distinct words | "
+          f"fold itself {fold_time * 1000:.0f} ms")
+
+    per_token: Counter = Counter()
+    normalizer = TokenNormalizer()
+
+    def count_cached():
+        nonlocal normalizer
+        normalizer = TokenNormalizer()
+        per_token.clear()
+        for words in messages:
+            per_token.update(map(normalizer.normalize, words))
+
+    token_time = best_time(count_cached)
+    print(f"normalize every token (cached)   | {token_time:6.2f} s | {len(per_token):>9,} distinct words | "
+          f"hit rate {normalizer.hit_rate():.1%}")
+
+    def count_uncached():
+        uncached: Counter = Counter()
+        normalize = TokenNormalizer()._normalize_uncached  # noqa
+        for words in messages:
+            uncached.update(map(normalize, words))
+
+    print(f"normalize every token (no cache) | {best_time(count_uncached):6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
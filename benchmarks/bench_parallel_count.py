@@ -0,0 +1,47 @@
+"""
+Compare serial and multi-core word counting on scaled ipsum.txt for different amounts of worker processes.
+Run from the repository root: python benchmarks/bench_parallel_count.py [size_mb]
+"""
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from parallel_count import count_text_file_parallel  # noqa: E402
+from tokenizer import tokenize  # noqa: E402
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ipsum.txt"), encoding="utf-8") as f:
+        ipsum = f.read()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "corpus.txt")
+        with open(file_path, 'w', encoding="utf-8") as f:
+            for _ in range(max(1, size_mb * 2 ** 20 // len(ipsum))):
+                f.write(ipsum)
+
+        start = time.perf_counter()
+        with open(file_path, 'r', encoding="utf-8") as f:
+            serial_result = Counter(tokenize(f.read()))
+        serial_time = time.perf_counter() - start
+        print(f"{size_mb} MB serial: {serial_time:6.2f} s")
+
+        processes = 1
+        while processes <= mp.cpu_count():
+            start = time.perf_counter()
+            parallel_result = count_text_file_parallel(file_path, processes=processes)
+            parallel_time = time.perf_counter() - start
+            assert parallel_result == serial_result, "Parallel result differs from serial!"
+            print(f"{size_mb} MB {processes:>2} processes: {parallel_time:6.2f} s "
+                  f"(x{serial_time / parallel_time:.1f}, {size_mb / parallel_time:.0f} MB/s)")
+            processes *= 2
+
+
+if __name__ == "__main__":
+    main()
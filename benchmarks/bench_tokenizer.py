@@ -0,0 +1,56 @@
+"""
+Compare the old split(" ") + FORBIDDEN_CHAR replace loop with the compiled tokenizer on scaled ipsum.txt.
+Run from the repository root: python benchmarks/bench_tokenizer.py [size_mb ...]
+"""
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from tokenizer import tokenize  # noqa: E402
+
+# Copy of the character list the parsers used before the tokenizer existed
+LEGACY_FORBIDDEN_CHAR: list[str] = [',', '.', '(', ')', '\n', '\'', '"', "*", '%', '&', '?', "!", "…"]
+
+
+def legacy_count(plain_text: str) -> dict[str, int]:
+    words_stat: dict[str, int] = {}
+    for word in plain_text.split(" "):
+        for char in LEGACY_FORBIDDEN_CHAR:
+            word = word.replace(char, "")
+        if word not in words_stat:
+            words_stat[word] = 1
+        else:
+            words_stat[word] += 1
+    return words_stat
+
+
+def tokenizer_count(plain_text: str) -> dict[str, int]:
+    return Counter(tokenize(plain_text))
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 100, 300]
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ipsum.txt"), encoding="utf-8") as f:
+        ipsum = f.read()
+
+    for size_mb in sizes:
+        plain_text = ipsum * max(1, size_mb * 2 ** 20 // len(ipsum))
+
+        start = time.perf_counter()
+        legacy_result = legacy_count(plain_text)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        tokenizer_result = tokenizer_count(plain_text)
+        tokenizer_time = time.perf_counter() - start
+
+        print(f"{size_mb:>5} MB | legacy: {legacy_time:6.2f} s ({len(legacy_result)} distinct) | "
+              f"tokenizer: {tokenizer_time:6.2f} s ({len(tokenizer_result)} distinct) | "
+              f"speedup x{legacy_time / tokenizer_time:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,12 @@
-import json
 import os
 import random
 import sys
 
 import numpy
-import numpy as np
 from PIL import Image
 from PIL.ImageQt import ImageQt
 from PIL import ImageColor
-from wordcloud import WordCloud, STOPWORDS, ImageColorGenerator
+from wordcloud import WordCloud, STOPWORDS
 from matplotlib import pyplot as plt
 from matplotlib import colormaps
 import multiprocessing as mp
@@ -18,6 +16,32 @@ import subprocess
 import text_parse_helpers as parsehelp
 from constants import ParserSortWords
 from constants import FileParsingMode
+from constants import BUILTIN_STOPWORD_LANGUAGES
+from constants import NGRAM_MAX_SIZE
+from constants import LayoutEngine
+from constants import ColorSampling
+from constants import RenderSource
+from constants import PREVIEW_DEBOUNCE_MS
+from constants import PREVIEW_DRAFT_SIDE
+from constants import PREVIEW_DRAFT_MAX_FACTOR
+from constants import RENDER_SEED
+from constants import MASKING_STRATEGIES
+from constants import MASK_MAX_TOLERANCE
+from freq_cache import FrequencyCache
+from chat_index import ChatIndex
+from timeline import iter_timeline_frames
+from stopword_sets import compile_stopwords
+from corpus import build_corpus_table, list_corpus_files
+from normalizer import TokenNormalizer, load_aliases
+from layout_cache import LayoutCache
+from font_metrics import FontMetricsCache, measuring_with
+from layout_engine import using_layout_engine
+from color_sampler import SatColorGenerator
+from mask_processing import load_mask, process_mask
+from coherent_layout import Placement, generate_coherent, placement_of
+from poster import output_size, poster_tiles, render_poster, working_size
+from render_cache import RenderCache, render_key, font_signature, encode_image, file_format
+from svg_export import save_svg
 
 from gui_main import Ui_MainWindow
 from gui_modal_file_open import Ui_dialog_open_file
@@ -27,25 +51,61 @@ from PySide6 import QtGui as qtg
 from PySide6 import QtWidgets as qtw
 
 import time
+from datetime import datetime
+from typing import Callable
 
 
-def frame_worker(filenames_list, config, progress_queue):
-    print(f"Worker {mp.current_process().pid} is processing {filenames_list}")
+def frame_worker(frames_list, config, progress_queue):
+    print(f"Worker {mp.current_process().pid} is processing {len(frames_list)} frames")
 
     """
     Behavior is changed since v0.7.2 because Windows sucks hard at rapid process creation.
     Previous idea "1 frame -- 1 process" worked fine only for Linux with its godlike fork().
     Win users must still struggle (ca. 2x slower than Linux).
+
+    Every frame is (mask file or None, output file name, frequencies or None).
+    Mask videos share one set of frequencies from config, timeline videos bring their own for every frame.
     """
 
-    for file in filenames_list:
-        # TODO allow skipped frames due to incorrect mask. At the end show skipped frames amount!
-        mask_data = numpy.array(Image.open(file))
-        image_colors = ImageColorGenerator(mask_data)
-        mask_numpy = mask_data.copy()
-        mask_numpy = process_mask_colors(config["masking_strategy"], mask_numpy)
+    # Fetch words once, every config access is a round trip to the Manager process
+    shared_frequencies: dict[str, int] = config["frequencies"]
+    # Word sizes measured by previews, this worker adds its own measurements to its copy
+    font_metrics: FontMetricsCache = config["font_metrics"]
+    # Coherent videos get consecutive frames, each one starts from where words were on the previous one
+    coherent: bool = config["coherent"]
+    previous: Placement | None = None
+    previous_key: str | None = None
+    svg_frames: bool = config["svg_frames"]
+    color_sampling: ColorSampling = config["color_sampling"]
+    # Timeline videos often use one mask for many frames in a row, its colour tables are made once for all of them
+    last_mask_file: str | None = None
+    image_colors: SatColorGenerator | None = None
+    # Frames are visited once per run, only the disk layer is of use. It's shared by all workers and later runs
+    render_cache = RenderCache(max_memory_bytes=0)
+    # Everything but words and masks is the same for every frame
+    render_params: dict = {name: config[name] for name in ("width", "height", "bg_color", "max_words", "colormap",
+                                                           "scale", "mode", "min_font_size", "max_font_size",
+                                                           "font_step", "contour_color", "contour_width",
+                                                           "masking_strategy", "mask_tolerance", "need_recolor",
+                                                           "layout_engine", "coherent", "svg_embed_font",
+                                                           "color_sampling")}
+    render_params.update(font=font_signature(config["font_path"]), seed=RENDER_SEED)
+
+    for mask_file, frame_name, frame_frequencies in frames_list:
+        frequencies = shared_frequencies if frame_frequencies is None else frame_frequencies
 
-        wc = WordCloud(stopwords=config["stopwords"],
+        # TODO allow skipped frames due to incorrect mask. At the end show skipped frames amount!
+        mask_data = None
+        mask_numpy = None
+        if mask_file is not None:
+            mask_data = load_mask(mask_file)
+            if mask_file != last_mask_file:
+                image_colors = SatColorGenerator(mask_data, color_sampling, font_metrics=font_metrics)
+                last_mask_file = mask_file
+            mask_numpy = process_mask(mask_data, config["masking_strategy"], config["mask_tolerance"])
+
+        wc = WordCloud(width=config["width"],
+                       height=config["height"],
                        background_color=config["bg_color"],
                        max_words=config["max_words"],
                        colormap=config["colormap"],
@@ -58,20 +118,75 @@ def frame_worker(filenames_list, config, progress_queue):
                        font_step=config["font_step"],
                        contour_color=config["contour_color"],
                        contour_width=config["contour_width"],
+                       random_state=RENDER_SEED,
                        )
+        if svg_frames:
+            frame_name = os.path.splitext(frame_name)[0] + ".svg"
+        frame_path = os.path.join(config["save_dir"], frame_name)
+        image_format = "SVG" if svg_frames else file_format(frame_name)
+
+        key = None
+        cached = None
+        if len(frequencies) > 0:
+            # A coherent frame depends on all frames before it, so the previous key is a part of its own
+            key = render_key(frequencies,
+                             (mask_numpy, mask_data if config["need_recolor"] else None),
+                             dict(render_params, format=image_format, previous=previous_key if coherent else None))
+            cached = render_cache.get(key)
+
+        if cached is not None:
+            # Same inputs as some earlier run, the file is written as it was then
+            encoded_image, wc.layout_ = cached
+            if coherent:
+                previous = placement_of(wc, font_metrics)
+            with open(frame_path, 'wb') as f:
+                f.write(encoded_image)
+            previous_key = key
+            progress_queue.put(1)  # Notify progress
+            continue
+
+        if len(frequencies) == 0:
+            # Quiet period of a timeline, nothing to draw but the frame must still exist
+            wc.layout_ = []
+            if not svg_frames:
+                height, width = mask_numpy.shape[:2] if mask_numpy is not None else (wc.height, wc.width)
+                img = Image.new(wc.mode, (int(width * wc.scale), int(height * wc.scale)), wc.background_color)
+        else:
+            with measuring_with(font_metrics), using_layout_engine(config["layout_engine"]):
+                # Counts are passed as is, WordCloud does not have to re-tokenize anything
+                if coherent:
+                    previous = generate_coherent(wc, frequencies, previous, font_metrics)
+                else:
+                    wc.generate_from_frequencies(frequencies)
 
-        wc.generate(" ".join(config["words_list"]))
-
-        # Only recolor when needed
-        if config["need_recolor"]:
-            wc.recolor(color_func=image_colors)
+                # Only recolor when needed
+                if config["need_recolor"] and mask_data is not None:
+                    wc.recolor(color_func=image_colors)
 
-        img = wc.to_image()
-        # FIXME It is temporary, I will fix it later. Want to make it more flexible
-        img.save(os.path.join(config["save_dir"], f"{file[file.rfind('/') + 1 ::]}"))
+                if not svg_frames:
+                    img = wc.to_image()
+
+        if svg_frames:
+            # Vector frames skip rasterizing and encoding altogether
+            save_svg(wc, frame_path, config["svg_embed_font"], font_metrics)
+            if key is not None:
+                with open(frame_path, 'rb') as f:
+                    render_cache.put(key, f.read(), wc.layout_)
+        elif key is None:
+            img.save(frame_path)
+        else:
+            # Encoded once, the same bytes go to the frame file and to the cache
+            encoded_image = encode_image(img, image_format)
+            with open(frame_path, 'wb') as f:
+                f.write(encoded_image)
+            render_cache.put(key, encoded_image, wc.layout_)
+        if key is not None:
+            previous_key = key
 
         progress_queue.put(1)  # Notify progress
 
+    return font_metrics.lookups, font_metrics.misses
+
 
 def main_worker(file_lists, config, progress_queue):
     print("Started main worker!")
@@ -82,7 +197,10 @@ def main_worker(file_lists, config, progress_queue):
     # TODO would be also nice to have STOP GENERATING functionality. Need to think about it
     try:
         with mp.Pool(processes=mp.cpu_count() - 1) as pool:
-            pool.starmap(frame_worker, [(job, config, progress_queue) for job in file_lists])
+            metrics_stats = pool.starmap(frame_worker, [(job, config, progress_queue) for job in file_lists])
+        lookups = sum(lookups for lookups, _ in metrics_stats)
+        misses = sum(misses for _, misses in metrics_stats)
+        print(f"Font metrics cache hit rate: {1 - misses / max(1, lookups):.1%} of {lookups} measurements")
     except ValueError as e:  # TODO Skipped frames count should appear somewhere here or inside actual job
         print("Something went wrong. Most probably frame is all masked out!\n"
               "Consider changing mask settings.")
@@ -95,30 +213,330 @@ def main_worker(file_lists, config, progress_queue):
     progress_queue.put(2)  # Signal process thread to close (all done)
 
 
-def process_mask_colors(choice: str, mask: numpy.array):
-    if choice == "Black + White are masked":
-        # By default, Wordcloud library is already masking out (not generating words) on #FFFFFF
-        # Thus we just find all black colors and make it white (for mask)
-        mask_blk_color = np.all(mask == [0, 0, 0], axis=-1)
-        mask[mask_blk_color] = [255, 255, 255]
-    elif choice == "White is masked":
-        # Basically do nothing - White is masked by default in Wordcloud library
-        # FIXME VERY IMPORTANT add some threshold possibility
-        pass
-    elif choice == "Black is masked":
-        mask_wht_color = np.all(mask == [255, 255, 255], axis=-1)
-        mask_blk_color = np.all(mask == [0, 0, 0], axis=-1)
-        # Let's do an evil hack -- in order to not hack into lib -- we change mask color to 0xFF - 1
-        # Library will ignore it, coloring will be the same
-        mask[mask_wht_color] = [254, 254, 254]
-        # Make blacks as whites to mask out
-        mask[mask_blk_color] = [255, 255, 255]
-    elif choice == "None are masked":
-        # Use evil hack to draw absolutely everything
-        # Very useful when experimenting with different backgrounds!
-        mask_wht_color = np.all(mask == [255, 255, 255], axis=-1)
-        mask[mask_wht_color] = [254, 254, 254]
-    return mask
+def poster_worker(words_freq: dict[str, int], settings: dict, poster_path: str, progress_queue):
+    """
+    Lay a poster out at working resolution and draw it tile by tile in parallel, see poster.render_poster().
+    Runs in its own process, so a poster many times bigger than the screen never blocks the GUI.
+    :param words_freq: Words and their frequencies.
+    :param settings: See MainScreenWindow.collect_render_settings(), scale sets the poster size.
+    :param poster_path: PNG file to write.
+    :param progress_queue: Gets 1 for every finished tile and 2 at the end.
+    """
+    print(f"Poster worker {mp.current_process().pid} is rendering {poster_path}")
+    try:
+        mask_data = None
+        mask_numpy = None
+        width, height = settings["width"], settings["height"]
+        if settings["mask_path"]:
+            mask_data = load_mask(settings["mask_path"])
+            mask_numpy = process_mask(mask_data, settings["masking_strategy"], settings["mask_tolerance"])
+            height, width = mask_numpy.shape[:2]
+
+        font_metrics = FontMetricsCache()
+        # Words are placed on a canvas of at most POSTER_LAYOUT_SIDE, the rest is done by the scale
+        layout_width, layout_height, scale = working_size(width, height, settings["style"]["scale"])
+        image_colors = None
+        if mask_numpy is not None:
+            if (layout_width, layout_height) != (width, height):
+                # Nearest keeps masked out pixels exactly 255, colours may be smoothed
+                mask_numpy = numpy.array(Image.fromarray(mask_numpy).resize((layout_width, layout_height),
+                                                                            Image.Resampling.NEAREST))
+                mask_data = numpy.array(Image.fromarray(mask_data).resize((layout_width, layout_height)))
+            if settings["use_mask_colors"]:
+                image_colors = SatColorGenerator(mask_data, settings["color_sampling"], font_metrics=font_metrics)
+
+        style: dict = dict(settings["style"], scale=scale)
+        factor = layout_width / width
+        max_font_size: int | None = settings["max_font_size"]
+        wc = WordCloud(width=layout_width,
+                       height=layout_height,
+                       max_words=settings["max_words"],
+                       colormap=settings["colormap"],
+                       mask=mask_numpy,
+                       font_path=settings["font_path"],
+                       min_font_size=max(1, round(settings["min_font_size"] * factor)),
+                       max_font_size=max(1, round(max_font_size * factor)) if max_font_size else None,
+                       font_step=settings["font_step"],
+                       random_state=RENDER_SEED,
+                       **style,
+                       )
+        with measuring_with(font_metrics), using_layout_engine(settings["layout_engine"]):
+            wc.generate_from_frequencies(words_freq)
+        if image_colors is not None:
+            wc.recolor(color_func=image_colors)
+
+        render_poster(wc, poster_path, max(1, mp.cpu_count() - 1), on_tile=lambda: progress_queue.put(1))
+    except (ValueError, OSError) as e:
+        print("Failed to render poster. Most probably frame is all masked out or disk is full!")
+        print("Full trace:")
+        print(e)
+    else:
+        print(f"Poster saved to {poster_path}")
+
+    progress_queue.put(2)  # Signal process thread to close (all done)
+
+
+def compute_words(settings: dict, freq_cache: FrequencyCache, chat_index: ChatIndex | None) -> dict[str, int]:
+    """
+    Parse words depending on the mode. Parsing is skipped if the file was already parsed with same settings.
+    Runs in a background thread, so it must not touch any widgets.
+    :param settings: See MainScreenWindow.collect_parse_settings().
+    :param freq_cache: Cache of parsed files.
+    :param chat_index: Index of the opened chat, needed only if a chat filter is set.
+    :return: Words and their frequencies, max_words of them at most.
+    """
+    parsing_mode: FileParsingMode = settings["parsing_mode"]
+    min_word_size: int = settings["min_word_size"]
+    max_ngram: int = settings["max_ngram"]
+    stopwords: frozenset[str] = settings["stopwords"]
+    normalizer: TokenNormalizer | None = settings["normalizer"]
+    filter_rows = settings["filter_rows"]
+
+    if parsing_mode == FileParsingMode.CORPUS:
+        # Every file is cached separately, only new or changed ones are parsed (in parallel)
+        freq_table = build_corpus_table(settings["corpus_paths"],
+                                        min_word_size,
+                                        stopwords,
+                                        cache=freq_cache,
+                                        max_ngram=max_ngram,
+                                        normalizer=normalizer)
+    elif filter_rows is not None and max_ngram > 1:
+        # Messages of a run are separated by newlines, so phrases don't cross them
+        words_stat, phrases_stat = parsehelp.count_ngrams(chat_index.iter_runs(filter_rows), max_ngram)
+        freq_table = parsehelp.build_phrase_table(words_stat, phrases_stat, min_word_size, stopwords, normalizer)
+    elif filter_rows is not None:
+        # Only the selected slice of the chat is tokenized
+        freq_table = parsehelp.table_from_counts(chat_index.count_words(filter_rows),
+                                                 min_word_size,
+                                                 stopwords,
+                                                 normalizer)
+    else:
+        parse_params: tuple = parsehelp.parse_signature(parsing_mode,
+                                                        min_word_size,
+                                                        stopwords,
+                                                        normalizer,
+                                                        max_ngram=max_ngram)
+        freq_table = freq_cache.get(settings["txt_path"], parse_params)
+        if freq_table is None:
+            freq_table = parsehelp.build_frequency_table(settings["txt_path"],
+                                                         parsing_mode,
+                                                         min_word_size,
+                                                         stopwords,
+                                                         normalizer,
+                                                         max_ngram=max_ngram)
+            freq_cache.put(settings["txt_path"], parse_params, freq_table)
+
+    # Stopwords never got into the table, so we still get max_words words.
+    # Only max_words are drawn anyway, no need to sort the whole vocabulary
+    return dict(freq_table.select(settings["max_words"], settings["sort_type"]))
+
+
+def compute_timeline_frames(settings: dict, chat_index: ChatIndex) -> list[tuple]:
+    """
+    Slide a time window over the indexed chat and make a frame of every window position.
+    It tokenizes every selected message, so like compute_words() it runs in a background thread.
+    :param settings: See MainScreenWindow.collect_parse_settings(), "timeline" must be set.
+    :param chat_index: Index of the opened chat.
+    :return: List of frames for frame_worker.
+    """
+    timeline: dict = settings["timeline"]
+    rows = settings["filter_rows"]
+    if rows is None:
+        rows = numpy.arange(len(chat_index))
+
+    # Masks are optional here, if they are used, they are looped over
+    masks: list[str] | None = timeline["masks"]
+    day: int = 24 * 60 * 60
+
+    frames = []
+    for frame_number, (_, words) in enumerate(
+            iter_timeline_frames(chat_index, rows,
+                                 window_seconds=timeline["window_days"] * day,
+                                 step_seconds=timeline["step_days"] * day,
+                                 max_words=settings["max_words"],
+                                 sorting=settings["sort_type"],
+                                 min_word_size=settings["min_word_size"],
+                                 stopwords=settings["stopwords"],
+                                 normalizer=settings["normalizer"])):
+        mask_file = masks[frame_number % len(masks)] if masks else None
+        frames.append((mask_file, f"frame_{frame_number:06d}.png", dict(words)))
+    return frames
+
+
+def draft_factor(settings: dict, mask_numpy: numpy.ndarray | None) -> float:
+    """
+    How much a draft is shrunk compared to the final layout, so its longer side is about PREVIEW_DRAFT_SIDE.
+    :return: Factor below 1, or 1 if the canvas is small enough to skip the draft.
+    """
+    height, width = mask_numpy.shape[:2] if mask_numpy is not None else (settings["height"], settings["width"])
+    factor = PREVIEW_DRAFT_SIDE / max(width, height)
+    return factor if factor <= PREVIEW_DRAFT_MAX_FACTOR else 1.0
+
+
+def render_draft(settings: dict,
+                 words_freq: dict[str, int],
+                 mask_numpy: numpy.ndarray | None,
+                 mask_data: numpy.ndarray | None,
+                 factor: float) -> tuple[Image.Image, int | None]:
+    """
+    Lay words out on a canvas (and mask) shrunk by factor, then draw it upscaled to the final image size.
+    Text is drawn at full resolution, only positions are coarse, so it's a good enough look at the settings.
+    :param settings: See MainScreenWindow.collect_render_settings().
+    :param words_freq: Words and their frequencies.
+    :param mask_numpy: Processed mask or None.
+    :param mask_data: Original mask for colouring words by it, or None.
+    :param factor: See draft_factor().
+    :return: Draft image and font size of the biggest word scaled back to the final layout (None if none fit).
+    """
+    width = max(1, round(settings["width"] * factor))
+    height = max(1, round(settings["height"] * factor))
+    draft_mask = None
+    image_colors = None
+    if mask_numpy is not None:
+        draft_size = (max(1, round(mask_numpy.shape[1] * factor)), max(1, round(mask_numpy.shape[0] * factor)))
+        # Nearest keeps masked out pixels exactly 255, colours may be smoothed
+        draft_mask = numpy.array(Image.fromarray(mask_numpy).resize(draft_size, Image.Resampling.NEAREST))
+        if settings["use_mask_colors"]:
+            image_colors = SatColorGenerator(numpy.array(Image.fromarray(mask_data).resize(draft_size)),
+                                             settings["color_sampling"])
+
+    style: dict = dict(settings["style"], scale=settings["style"]["scale"] / factor)
+    max_font_size: int | None = settings["max_font_size"]
+    wc = WordCloud(width=width,
+                   height=height,
+                   max_words=settings["max_words"],
+                   colormap=settings["colormap"],
+                   mask=draft_mask,
+                   font_path=settings["font_path"],
+                   min_font_size=max(1, round(settings["min_font_size"] * factor)),
+                   max_font_size=max(1, round(max_font_size * factor)) if max_font_size else None,
+                   font_step=settings["font_step"],
+                   random_state=RENDER_SEED,
+                   **style,
+                   )
+    wc.generate_from_frequencies(words_freq)
+    if image_colors is not None:
+        wc.recolor(color_func=image_colors)
+
+    # Biggest word comes first. Its size is where the final layout starts from
+    biggest_font_size = round(wc.layout_[0][1] / factor) if wc.layout_ else None
+    return wc.to_image(), biggest_font_size
+
+
+def render_preview(settings: dict,
+                   words_freq: dict[str, int],
+                   layout_cache: LayoutCache,
+                   render_cache: RenderCache,
+                   on_draft: Callable[[Image.Image], bool] | None = None,
+                   font_metrics: FontMetricsCache | None = None) -> tuple[Image.Image | None, RenderSource]:
+    """
+    Render a single word cloud image. If only style changed since the last call, the last layout is reused.
+    If the very same image was rendered before, it's taken from the render cache.
+    Otherwise, for big canvases, a quick draft is made first and given to on_draft, then the full layout is computed.
+    Runs in a background thread, so it must not touch any widgets.
+    :param settings: See MainScreenWindow.collect_render_settings().
+    :param words_freq: Words and their frequencies.
+    :param layout_cache: Last word placement.
+    :param render_cache: Earlier rendered images.
+    :param on_draft: Called with the draft image. Returning False stops rendering, e.g. if settings changed again.
+    :param font_metrics: Font and word size cache the layout is measured with, mask colours reuse its boxes.
+    :return: Image and where it came from. Image is None if stopped after the draft.
+    """
+    style: dict = settings["style"]
+    colormap: str = settings["colormap"]
+    use_mask_colors: bool = settings["use_mask_colors"]
+    color_sampling: ColorSampling = settings["color_sampling"]
+    mask_path: str | None = settings["mask_path"]
+    # Everything except style moves words around
+    layout_key: tuple = (tuple(words_freq.items()),
+                         settings["width"],
+                         settings["height"],
+                         settings["max_words"],
+                         (mask_path, settings["mask_mtime"], settings["masking_strategy"], settings["mask_tolerance"])
+                         if mask_path else None,
+                         settings["font_path"],
+                         settings["min_font_size"],
+                         settings["max_font_size"],
+                         settings["font_step"],
+                         settings["layout_engine"])
+
+    wc = layout_cache.lookup(layout_key)
+    if wc is not None:
+        # Same placement, just paint it differently
+        wc = layout_cache.restyle(style, colormap, use_mask_colors, color_sampling)
+        return wc.to_image(), RenderSource.RESTYLED
+
+    mask_data = None
+    mask_numpy = None
+    image_colors = None
+    if mask_path:
+        mask_data = load_mask(mask_path)
+        image_colors = SatColorGenerator(mask_data, color_sampling, font_metrics=font_metrics)
+        # Mask out colors stated in combo box
+        mask_numpy = process_mask(mask_data, settings["masking_strategy"], settings["mask_tolerance"])
+        # For debug purposes
+        # Image.fromarray(mask_numpy, mode='L').show()
+    use_mask_colors = use_mask_colors and image_colors is not None
+    color_key: tuple = (colormap, use_mask_colors, color_sampling if use_mask_colors else None)
+
+    wc = WordCloud(width=settings["width"],
+                   height=settings["height"],
+                   max_words=settings["max_words"],
+                   colormap=colormap,
+                   mask=mask_numpy,
+                   font_path=settings["font_path"],
+                   min_font_size=settings["min_font_size"],
+                   max_font_size=settings["max_font_size"],
+                   font_step=settings["font_step"],
+                   random_state=RENDER_SEED,
+                   **style,
+                   )
+
+    max_font_size: int | None = settings["max_font_size"]
+    factor = draft_factor(settings, mask_numpy)
+    drafted = on_draft is not None and factor < 1
+    # Same as layout_key but by content, so it survives restarts and renamed files. Style is not a part of it:
+    # previews are cached without images, drawing a layout takes a fraction of a second.
+    # Drafted layouts start from the draft's font size, they may differ from undrafted ones a bit
+    key = render_key(words_freq,
+                     (mask_numpy, mask_data if use_mask_colors else None),
+                     {"width": settings["width"],
+                      "height": settings["height"],
+                      "max_words": settings["max_words"],
+                      "font": font_signature(settings["font_path"]),
+                      "min_font_size": settings["min_font_size"],
+                      "max_font_size": max_font_size,
+                      "font_step": settings["font_step"],
+                      "layout_engine": settings["layout_engine"],
+                      "color": color_key,
+                      "seed": RENDER_SEED,
+                      "drafted": drafted})
+    cached = render_cache.get(key)
+    if cached is not None:
+        _, wc.layout_ = cached
+        # Restyling works on it just as on a freshly generated one
+        layout_cache.store(layout_key, wc, color_key, image_colors)
+        return wc.to_image(), RenderSource.RENDER_CACHE
+
+    # Draft first, so there is something to look at while the full layout is computed
+    if drafted:
+        draft_image, biggest_font_size = render_draft(settings, words_freq, mask_numpy, mask_data, factor)
+        if not on_draft(draft_image):
+            return None, RenderSource.LAYOUT
+        if max_font_size is None:
+            # Saves WordCloud a trial layout of the first two words just to guess this size
+            max_font_size = biggest_font_size
+
+    # Real counts define word sizes, WordCloud does not have to re-tokenize anything
+    wc.generate_from_frequencies(words_freq, max_font_size=max_font_size)
+
+    # Only recolor when needed
+    if use_mask_colors:
+        wc.recolor(color_func=image_colors)
+
+    layout_cache.store(layout_key, wc, color_key, image_colors)
+    render_cache.put(key, None, wc.layout_)
+    return wc.to_image(), RenderSource.LAYOUT
 
 
 if __name__ == "__main__":
@@ -145,6 +563,81 @@ if __name__ == "__main__":
             self.queue_signal.emit(2)
 
 
+    # Parses and renders a preview off the GUI thread, one job at a time
+    class RenderJobWorker(qtc.QThread):
+        draft_ready = qtc.Signal(int, object, float)
+        job_done = qtc.Signal(int, object)
+
+        def __init__(self, job_id: int, parse_settings: dict, render_settings: dict | None,
+                     freq_cache: FrequencyCache, chat_index: ChatIndex | None, layout_cache: LayoutCache,
+                     font_metrics: FontMetricsCache, render_cache: RenderCache):
+            super().__init__()
+            self.__cancelled = False
+            self.__job_id = job_id
+            self.__parse_settings = parse_settings
+            self.__render_settings = render_settings  # None means words are parsed for a video
+            self.__freq_cache = freq_cache
+            self.__chat_index = chat_index
+            self.__layout_cache = layout_cache
+            self.__font_metrics = font_metrics
+            self.__render_cache = render_cache
+
+        # Layout can't be interrupted half-way, so cancelling only skips stages which did not start yet
+        def cancel(self):
+            self.__cancelled = True
+
+        # Called automatically on start() method
+        def run(self):
+            result: dict = {"image": None}
+            try:
+                result["words_freq"] = compute_words(self.__parse_settings, self.__freq_cache, self.__chat_index)
+                if (not self.__cancelled and self.__render_settings is None
+                        and self.__parse_settings.get("timeline") is not None):
+                    result["frames"] = compute_timeline_frames(self.__parse_settings, self.__chat_index)
+                if self.__cancelled:
+                    result["cancelled"] = True
+                elif self.__render_settings is not None and len(result["words_freq"]) > 0:
+                    render_start = time.perf_counter()
+
+                    def on_draft(draft_image: Image.Image) -> bool:
+                        result["draft_ms"] = (time.perf_counter() - render_start) * 1000
+                        self.draft_ready.emit(self.__job_id, draft_image, result["draft_ms"])
+                        # No point in refining a draft whose settings are already outdated
+                        return not self.__cancelled
+
+                    with measuring_with(self.__font_metrics), \
+                            using_layout_engine(self.__render_settings["layout_engine"]):
+                        result["image"], result["source"] = render_preview(self.__render_settings,
+                                                                           result["words_freq"],
+                                                                           self.__layout_cache,
+                                                                           self.__render_cache,
+                                                                           on_draft,
+                                                                           self.__font_metrics)
+                    result["render_ms"] = (time.perf_counter() - render_start) * 1000
+                    result["cancelled"] = result["image"] is None
+            except Exception as e:  # Anything WordCloud or a parser throws ends up in the status bar
+                result["error"] = e
+            self.job_done.emit(self.__job_id, result)
+
+
+    # Reads a whole chat export into a ChatIndex off the GUI thread
+    class ChatIndexWorker(qtc.QThread):
+        index_done = qtc.Signal(int, object)
+
+        def __init__(self, job_id: int, file_path: str, parent: qtc.QObject):
+            super().__init__(parent)
+            self.__job_id = job_id
+            self.__file_path = file_path
+
+        # Called automatically on start() method
+        def run(self):
+            try:
+                result = ChatIndex.build(self.__file_path)
+            except Exception as e:  # Broken export, full disk... ends up in the status bar
+                result = e
+            self.index_done.emit(self.__job_id, result)
+
+
     # Modal dialog for choosing file to open
     class ModalFileOpenDialog(qtw.QDialog):
 
@@ -153,24 +646,43 @@ if __name__ == "__main__":
 
             # Internal public variable for storing path to text file
             self.file_path: str = ""
+            self.file_paths: list[str] = []  # All files in corpus mode, file_path is then just for display
             self.parsing_mode: FileParsingMode = FileParsingMode.JSON
 
             self.ui = Ui_dialog_open_file()
             self.ui.setupUi(self)
 
             # Make sure it corresponds to orders of FileParsingMode in constants!
+            # The last one is a corpus as well, it's just picked as a folder
             self.ui.cmb_sel_type.addItems(("Telegram chat dump (*.json)",
-                                           "Plain text file (*.txt)"))
+                                           "Plain text file (*.txt)",
+                                           "Many chats and texts (*.json *.txt)",
+                                           "Folder with chats and texts"))
 
             self.ui.btn_ok.clicked.connect(self.open_file_select_window)
 
         def open_file_select_window(self):
             # Select the parsing mode according to the choice
-            self.parsing_mode = self.ui.cmb_sel_type.currentIndex()
+            self.parsing_mode = min(self.ui.cmb_sel_type.currentIndex(), FileParsingMode.CORPUS)
+            self.file_paths = []
+
+            if self.ui.cmb_sel_type.currentIndex() > FileParsingMode.CORPUS:
+                self.file_path = qtw.QFileDialog.getExistingDirectory(self, "Select Folder")
+                if len(self.file_path) > 0:
+                    self.file_paths = list_corpus_files([self.file_path])
+            elif self.parsing_mode == FileParsingMode.CORPUS:
+                self.file_paths = list_corpus_files(
+                    qtw.QFileDialog.getOpenFileNames(self,
+                                                     "Select Files",
+                                                     filter=f"{self.ui.cmb_sel_type.currentText()}")[0])
+                self.file_path = os.path.commonpath(self.file_paths) if self.file_paths else ""
+            else:
+                self.file_path = qtw.QFileDialog.getOpenFileName(self,
+                                                                 "Select File",
+                                                                 filter=f"{self.ui.cmb_sel_type.currentText()}")[0]
 
-            self.file_path = qtw.QFileDialog.getOpenFileName(self,
-                                                             "Select File",
-                                                             filter=f"{self.ui.cmb_sel_type.currentText()}")[0]
+            if self.parsing_mode == FileParsingMode.CORPUS and len(self.file_paths) == 0:
+                self.file_path = ""  # Nothing to parse in there
             self.close()
 
 
@@ -198,10 +710,25 @@ if __name__ == "__main__":
             self.font_path = None
             self.wordcloud_image = None
             self.wordcloud_image_qt = None
+            self.draft_image_qt = None  # QPixmap is made from it, it has to live as long as the preview shows it
             # Those below are mostly to prevent stylechecker yapping (what is bro yappin' 'bout?)
             self.stopword_read = None
             self.max_font_size = None
-            self.words_list = None
+            self.words_freq = None
+
+            # Parsed words of previously used files, survives app restarts
+            self.freq_cache = FrequencyCache()
+            # Last word placement, so colour/style changes don't place all words again
+            self.layout_cache = LayoutCache()
+            # Word sizes measured by previews, video workers start with a copy of it
+            self.font_metrics = FontMetricsCache()
+            # Previews rendered before, survives app restarts. Video workers share its disk part
+            self.render_cache = RenderCache()
+
+            # Background rendering. Every job gets a new ID, results of older jobs are thrown away
+            self.render_job_id = 0
+            self.render_worker = None
+            self.pending_render_job = None  # Newest job waiting for the running one to stop
 
             # Additional windows
             self.window_modal_open_file = ModalFileOpenDialog(self)  # Modal dialog for choosing type of files to load
@@ -212,15 +739,30 @@ if __name__ == "__main__":
 
             self.ui.statusbar.showMessage("Awaiting text file...")
 
+            self.chat_index = None
+            # Index is built in the background. Every build gets a new ID, results of older ones are thrown away
+            self.chat_index_job_id = 0
+            self.chat_index_building = False
+            # Token normalization
+            self.aliases_path = None
+            self.normalizer = None
+            self.normalizer_key = None  # Settings the normalizer was made with, its cache is kept while they match
+            self.stopword_language_chks: dict[str, qtw.QCheckBox] = {
+                language_code: getattr(self.ui, f"stopwords_{language_code}_chk")
+                for language_code in BUILTIN_STOPWORD_LANGUAGES.values()}
 
             # Add items to combos
             self.ui.sort_combo.addItems(("Most Popular", "Least Popular"))
             self.ui.color_mode_combo.addItems(("RGB", "RGBA"))
             self.ui.color_map_combo.addItems(list(colormaps))
-            self.ui.color_to_mask_combo.addItems(("Black + White are masked",
-                                                  "Black is masked",
-                                                  "White is masked",
-                                                  "None are masked"))
+            self.ui.color_to_mask_combo.addItems(list(MASKING_STRATEGIES))
+            # Make sure these two correspond to orders of LayoutEngine and ColorSampling in constants!
+            self.ui.layout_engine_combo.addItems(("WordCloud", "NumPy (fast)"))
+            self.ui.color_sampling_combo.addItems(("Mean mask colour", "Median mask colour", "Dominant mask colour"))
+            # Limits which live in constants
+            self.ui.max_phrase_len_spin.setMaximum(NGRAM_MAX_SIZE)
+            self.ui.mask_tolerance_spin.setMaximum(MASK_MAX_TOLERANCE)
+            self.ui.chat_date_to_edit.setDate(qtc.QDate.currentDate())
 
             # Connect signals
             self.ui.path_json_btn.clicked.connect(self.get_text_file_path)
@@ -231,14 +773,22 @@ if __name__ == "__main__":
             self.ui.generate_vid_btn.clicked.connect(lambda: self.generate_wordcloud(True))
             self.ui.use_mask_chkbox.clicked.connect(self.use_mask_clicked)
             self.ui.save_btn.clicked.connect(self.save_wordcloud)
+            self.ui.save_poster_btn.clicked.connect(self.save_poster)
             self.ui.bg_color_pick_btn.clicked.connect(self.pick_bg_color)
             self.ui.mask_color_pick_btn.clicked.connect(self.pick_mask_color)
             self.ui.use_mask_colors_chk.clicked.connect(self.use_mask_colors_clicked)
+            self.ui.chat_index_btn.clicked.connect(self.build_chat_index)
+            self.ui.timeline_chk.clicked.connect(self.update_video_button)
+            self.ui.aliases_btn.clicked.connect(self.get_aliases_path)
+            self.setup_live_preview()
+
+            self.update_chat_filter_widgets()
 
         def use_mask_clicked(self):
             if self.ui.use_mask_chkbox.isChecked():
                 self.ui.use_mask_colors_chk.setEnabled(True)
                 self.ui.color_to_mask_combo.setEnabled(True)
+                self.ui.mask_tolerance_spin.setEnabled(True)
                 # Disable size controls, they are overridden by mask dimensions
                 self.ui.img_width_spin.setEnabled(False)
                 self.ui.img_height_spin.setEnabled(False)
@@ -247,14 +797,17 @@ if __name__ == "__main__":
                 self.ui.use_mask_colors_chk.setChecked(False)  # Uncheck it to release color map combo box if disabled
                 self.use_mask_colors_clicked()  # Lock or unlock color map combo box
                 self.ui.color_to_mask_combo.setEnabled(False)
+                self.ui.mask_tolerance_spin.setEnabled(False)
                 self.ui.img_width_spin.setEnabled(True)
                 self.ui.img_height_spin.setEnabled(True)
 
         def use_mask_colors_clicked(self):
             if self.ui.use_mask_colors_chk.isChecked():
                 self.ui.color_map_combo.setEnabled(False)
+                self.ui.color_sampling_combo.setEnabled(True)
             else:
                 self.ui.color_map_combo.setEnabled(True)
+                self.ui.color_sampling_combo.setEnabled(False)
 
         def get_text_file_path(self):
             """
@@ -270,6 +823,7 @@ if __name__ == "__main__":
                 self.ui.preview_lbl.setEnabled(False)
                 self.ui.generate_btn.setEnabled(False)
                 self.ui.save_btn.setEnabled(False)
+                self.ui.save_poster_btn.setEnabled(False)
                 self.ui.generate_vid_btn.setEnabled(False)
                 self.ui.statusbar.showMessage("Awaiting text file...")
                 return
@@ -278,16 +832,187 @@ if __name__ == "__main__":
             # TODO it would be nice to additionally add some validation functionality.
             # At least so it would check for ["message"] fields in JSON.
 
-            self.ui.path_json_edit.setText(str(self.txt_path))
+            if self.window_modal_open_file.parsing_mode == FileParsingMode.CORPUS:
+                self.ui.path_json_edit.setText(f"{self.txt_path} ({len(self.window_modal_open_file.file_paths)} files)")
+            else:
+                self.ui.path_json_edit.setText(str(self.txt_path))
             self.ui.preview_lbl.setEnabled(True)
             self.ui.generate_btn.setEnabled(True)
             self.ui.save_btn.setEnabled(True)
+            self.ui.save_poster_btn.setEnabled(True)
 
             # Needed to correctly enable "Generate Video" button
-            if self.ui.use_mask_chkbox.isEnabled():
-                self.ui.generate_vid_btn.setEnabled(True)
+            self.update_video_button()
             self.ui.statusbar.showMessage("Ready!")
 
+            # Pick up an existing index, building a new one is up to the user since it reads the whole export
+            self.chat_index = None
+            self.chat_index_job_id += 1  # Index of the previous file may still be building
+            self.chat_index_building = False
+            if self.window_modal_open_file.parsing_mode == FileParsingMode.JSON:
+                self.chat_index = ChatIndex.load(self.txt_path)
+            self.update_chat_filter_widgets()
+
+        def get_aliases_path(self):
+            """
+            Open file dialog to get a path for .txt file with word aliases. Cancelling it unloads aliases.
+            :return: None
+            """
+            self.aliases_path = qtw.QFileDialog.getOpenFileName(self, "Select File", filter="Aliases (*.txt)")[0]
+            if len(self.aliases_path) == 0:
+                self.aliases_path = None
+                self.ui.aliases_btn.setText("Aliases...")
+                self.ui.statusbar.showMessage("Aliases unloaded")
+            else:
+                self.ui.aliases_btn.setText(os.path.basename(self.aliases_path))
+                self.ui.statusbar.showMessage("Aliases load OK")
+
+        def current_normalizer(self) -> TokenNormalizer | None:
+            """
+            Normalizer for current settings. It is reused while settings stay the same, so its cache stays warm.
+            :return: TokenNormalizer or None if nothing is normalized.
+            """
+            aliases_mtime = os.stat(self.aliases_path).st_mtime_ns if self.aliases_path is not None else None
+            key = (self.ui.casefold_chk.isChecked(), self.ui.nfkc_chk.isChecked(), self.aliases_path, aliases_mtime)
+            if key != self.normalizer_key:
+                aliases = load_aliases(self.aliases_path) if self.aliases_path is not None else None
+                self.normalizer = TokenNormalizer(casefold=key[0], nfkc=key[1], aliases=aliases)
+                self.normalizer_key = key
+            return None if self.normalizer.is_identity else self.normalizer
+
+        def setup_live_preview(self):
+            """
+            When live preview is checked, any setting change regenerates the preview once settings stop changing
+            for PREVIEW_DEBOUNCE_MS.
+            :return: None
+            """
+            self.live_preview_timer = qtc.QTimer(self)
+            self.live_preview_timer.setSingleShot(True)
+            self.live_preview_timer.setInterval(PREVIEW_DEBOUNCE_MS)
+            self.live_preview_timer.timeout.connect(self.live_preview_update)
+
+            for spin in (self.ui.img_width_spin, self.ui.img_height_spin, self.ui.max_word_spin,
+                         self.ui.min_word_len_spin, self.ui.scaling_spin, self.ui.min_font_size_spin,
+                         self.ui.max_font_size_spin, self.ui.font_step_spin, self.ui.mask_thick_spin,
+                         self.ui.max_phrase_len_spin, self.ui.mask_tolerance_spin):
+                spin.valueChanged.connect(self.schedule_live_preview)
+            for combo in (self.ui.sort_combo, self.ui.color_mode_combo, self.ui.color_map_combo,
+                          self.ui.color_to_mask_combo, self.ui.chat_sender_combo, self.ui.layout_engine_combo,
+                          self.ui.color_sampling_combo):
+                combo.currentIndexChanged.connect(self.schedule_live_preview)
+            for color_edit in (self.ui.bg_color_edit, self.ui.mask_color_edit):
+                color_edit.textChanged.connect(self.schedule_live_preview)
+            for date_edit in (self.ui.chat_date_from_edit, self.ui.chat_date_to_edit):
+                date_edit.dateChanged.connect(self.schedule_live_preview)
+            for chk in (self.ui.use_mask_chkbox, self.ui.use_mask_colors_chk, self.ui.chat_date_chk,
+                        self.ui.casefold_chk, self.ui.nfkc_chk, *self.stopword_language_chks.values()):
+                chk.toggled.connect(self.schedule_live_preview)
+            self.ui.live_preview_chk.toggled.connect(self.schedule_live_preview)
+
+        def schedule_live_preview(self):
+            # Restarting the timer on every change means only the last one of a burst renders
+            if self.ui.live_preview_chk.isChecked():
+                self.live_preview_timer.start()
+
+        def live_preview_update(self):
+            # Disabled Generate means there is nothing to render or a video is in progress
+            if self.ui.live_preview_chk.isChecked() and self.ui.generate_btn.isEnabled():
+                self.generate_wordcloud(False)
+
+        def update_chat_filter_widgets(self):
+            """
+            Fill sender list from the loaded index and lock filter widgets if there is no index.
+            :return: None
+            """
+            is_json: bool = (self.txt_path is not None and len(self.txt_path) > 0
+                             and self.window_modal_open_file.parsing_mode == FileParsingMode.JSON)
+            has_index: bool = self.chat_index is not None
+
+            self.ui.chat_sender_combo.clear()
+            self.ui.chat_sender_combo.addItem("All senders", None)
+            if has_index:
+                for sender_id, sender_name in zip(self.chat_index.senders, self.chat_index.sender_names):
+                    self.ui.chat_sender_combo.addItem(sender_name, sender_id)
+                if len(self.chat_index) > 0:
+                    first_day = datetime.fromtimestamp(int(self.chat_index.timestamps.min()))
+                    last_day = datetime.fromtimestamp(int(self.chat_index.timestamps.max()))
+                    self.ui.chat_date_from_edit.setDate(qtc.QDate(first_day.year, first_day.month, first_day.day))
+                    self.ui.chat_date_to_edit.setDate(qtc.QDate(last_day.year, last_day.month, last_day.day))
+
+            self.ui.chat_index_btn.setEnabled(is_json and not self.chat_index_building)
+            self.ui.chat_sender_combo.setEnabled(has_index)
+            self.ui.chat_date_chk.setEnabled(has_index)
+            self.ui.chat_date_from_edit.setEnabled(has_index)
+            self.ui.chat_date_to_edit.setEnabled(has_index)
+            self.ui.timeline_chk.setEnabled(has_index)
+            self.ui.timeline_window_spin.setEnabled(has_index)
+            self.ui.timeline_step_spin.setEnabled(has_index)
+            if not has_index:
+                self.ui.chat_date_chk.setChecked(False)
+                self.ui.timeline_chk.setChecked(False)
+            self.update_video_button()
+
+        def update_video_button(self):
+            """
+            Video needs either masks (a frame per mask) or a timeline (a frame per time window).
+            Both need a loaded text file.
+            :return: None
+            """
+            has_frames: bool = self.mask_path is not None or self.ui.timeline_chk.isChecked()
+            self.ui.generate_vid_btn.setEnabled(self.ui.generate_btn.isEnabled() and has_frames)
+
+        def build_chat_index(self):
+            """
+            Read the whole export once and save a columnar index next to it. It runs in a ChatIndexWorker,
+            filters that need the index are locked until it's done, see chat_index_done().
+            :return: None
+            """
+            self.chat_index_job_id += 1
+            self.chat_index = None
+            self.chat_index_building = True
+            self.update_chat_filter_widgets()
+            worker = ChatIndexWorker(self.chat_index_job_id, self.txt_path, self)
+            worker.index_done.connect(self.chat_index_done)
+            worker.finished.connect(worker.deleteLater)
+            worker.start()
+            self.ui.statusbar.showMessage("Indexing chat, it may take a while...")
+
+        def chat_index_done(self, job_id: int, result: ChatIndex | Exception):
+            """
+            Unlock chat filters with a freshly built index. Indexes of files that are not open anymore are dropped.
+            :param job_id: ID given in build_chat_index().
+            :param result: Built index or what it failed with.
+            :return: None
+            """
+            if job_id != self.chat_index_job_id:
+                return
+            self.chat_index_building = False
+            if isinstance(result, Exception):
+                self.ui.statusbar.showMessage(f"Failed to index chat: {result}")
+                qtw.QApplication.beep()
+            else:
+                self.chat_index = result
+                self.ui.statusbar.showMessage(f"Chat indexed: {len(self.chat_index)} messages")
+            self.update_chat_filter_widgets()
+
+        def chat_filter_rows(self):
+            """
+            Rows of the chat index selected by filter widgets.
+            :return: Array with row numbers or None if no filter is active.
+            """
+            sender_id = self.ui.chat_sender_combo.currentData()
+            if self.chat_index is None or (sender_id is None and not self.ui.chat_date_chk.isChecked()):
+                return None
+
+            start = end = None
+            if self.ui.chat_date_chk.isChecked():
+                date_from = self.ui.chat_date_from_edit.date()
+                date_to = self.ui.chat_date_to_edit.date().addDays(1)  # Include the last day
+                start = int(datetime(date_from.year(), date_from.month(), date_from.day()).timestamp())
+                end = int(datetime(date_to.year(), date_to.month(), date_to.day()).timestamp())
+
+            return self.chat_index.select(sender_ids=None if sender_id is None else [sender_id], start=start, end=end)
+
 
         def get_stopwords_path(self):
             """
@@ -308,10 +1033,9 @@ if __name__ == "__main__":
             Open file dialog to get a path for image mask.
             :return: None
             """
-            # FIXME I also want PNG but it requires more study bc it immediately crashes rn
             self.mask_path = qtw.QFileDialog.getOpenFileNames(self,
                                                             "Select File",
-                                                             filter="Mask files (*.jpg);;"
+                                                             filter="Mask files (*.jpg *.jpeg *.png);;"
                                                                     "[NOT IMPLEMENTED] Video files (*.mp4)")[0]
             if len(self.mask_path) == 0:
                 self.ui.path_mask_edit.setText("No valid file provided!")
@@ -321,7 +1045,7 @@ if __name__ == "__main__":
                 self.ui.use_mask_chkbox.setChecked(False)
                 self.ui.use_mask_colors_chk.setEnabled(False)
                 self.ui.use_mask_colors_chk.setChecked(False)
-                self.ui.generate_vid_btn.setEnabled(False)
+                self.update_video_button()  # Timeline video does not need masks
                 self.use_mask_clicked()
                 self.use_mask_colors_clicked()
             else:
@@ -330,8 +1054,7 @@ if __name__ == "__main__":
                 self.ui.use_mask_chkbox.setEnabled(True)
                 # This is needed to enable Generate Video button only if .json words are correctly parsed
                 # I can understand it if generate and save buttons are active.
-                if self.ui.generate_btn.isEnabled():
-                    self.ui.generate_vid_btn.setEnabled(True)
+                self.update_video_button()
 
         def get_font_path(self):
             """
@@ -369,24 +1092,64 @@ if __name__ == "__main__":
                 # Enable buttons
                 self.ui.generate_btn.setEnabled(True)
                 self.ui.save_btn.setEnabled(True)
-                self.ui.generate_vid_btn.setEnabled(True)
+                self.ui.save_poster_btn.setEnabled(True)
+                self.update_video_button()
 
 
         @staticmethod
-        def split_list_to_jobs(jobs_list: list[str], jobs_num: int):
+        def split_list_to_jobs(jobs_list: list[str], jobs_num: int, consecutive: bool = False):
+            if consecutive:
+                # Every worker gets one unbroken run of frames, so only run borders start from scratch
+                run_length = -(-len(jobs_list) // jobs_num)
+                for i in range(0, jobs_num):
+                    yield jobs_list[i * run_length:(i + 1) * run_length]
+                return
             for i in range(0, jobs_num):
                 yield jobs_list[i::jobs_num]
 
         def generate_wordcloud(self, is_video: bool):
+            """
+            Collect settings and hand parsing + rendering over to a background RenderJobWorker.
+            Nothing heavy runs in the GUI thread, the result comes back in render_job_done().
+            :param is_video: Start video generation once words are ready instead of rendering a preview.
+            :return: None
+            """
+            try:
+                parse_settings: dict = self.collect_parse_settings()
+                render_settings: dict = self.collect_render_settings()
+            except ValueError as e:
+                # E.g. a colour which is still being typed in, live preview gets here a lot
+                self.ui.statusbar.showMessage(f"Invalid setting: {e}")
+                return
+
+            if is_video:
+                self.frames_save_path = qtw.QFileDialog.getExistingDirectory(self,
+                                                                             "Select directory to store video frames")
+                if self.frames_save_path == '':
+                    self.ui.statusbar.showMessage("Select correct directory!")
+                    qtw.QApplication.beep()
+                    return
+
+                if self.ui.timeline_chk.isChecked():
+                    # Frames are counted by the worker too, it tokenizes the whole selected part of the chat
+                    parse_settings["timeline"] = {
+                        "window_days": self.ui.timeline_window_spin.value(),
+                        "step_days": self.ui.timeline_step_spin.value(),
+                        "masks": self.mask_path if (self.ui.use_mask_chkbox.isChecked() and self.mask_path) else None,
+                    }
+
+            # Video reads the rest of its settings from widgets once words are ready
+            self.start_render_job(parse_settings, None if is_video else render_settings)
+
+        def collect_parse_settings(self) -> dict:
+            """
+            Read everything parsing depends on from widgets, see compute_words().
+            :return: Dict with parse settings.
+            """
             # -----------------------------------------------------
-            # Load Stopwords if path is provided
-            if self.stopwords_path is not None:
-                stopword_file = open(self.stopwords_path, 'r', encoding="utf-8")
-                self.stopword_read = stopword_file.read().splitlines()
-                stopword_file.close()
-            else:
-                # Otherwise skip
-                self.stopword_read = None
+            # Stopwords file + checked built-in sets, compiled once. File is re-read only if it was changed
+            stopword_languages = [code for code, chk in self.stopword_language_chks.items() if chk.isChecked()]
+            self.stopword_read = compile_stopwords(self.stopwords_path, stopword_languages)
             # -----------------------------------------------------
 
             # -----------------------------------------------------
@@ -397,155 +1160,275 @@ if __name__ == "__main__":
                 sort_type = ParserSortWords.ASCENDING
             # -----------------------------------------------------
 
+            parsing_mode: FileParsingMode = self.window_modal_open_file.parsing_mode
+            return {
+                "txt_path": self.txt_path,
+                "parsing_mode": parsing_mode,
+                "corpus_paths": list(self.window_modal_open_file.file_paths),
+                "filter_rows": self.chat_filter_rows() if parsing_mode == FileParsingMode.JSON else None,
+                "min_word_size": int(self.ui.min_word_len_spin.text()),
+                "max_ngram": self.ui.max_phrase_len_spin.value(),
+                "normalizer": self.current_normalizer(),
+                "stopwords": self.stopword_read,
+                "sort_type": sort_type,
+                "max_words": int(self.ui.max_word_spin.text()),
+            }
+
+        def collect_render_settings(self) -> dict:
+            """
+            Read everything preview rendering depends on from widgets, see render_preview().
+            :return: Dict with render settings.
+            """
             # Make NONE if 0 is selected since Wordcloud lib accepts only such logic
             if int(self.ui.max_font_size_spin.text()) == 0:
                 self.max_font_size = None
             else:
                 self.max_font_size = int(self.ui.max_font_size_spin.text())
 
-            # Parse data depending on the mode
-            if self.window_modal_open_file.parsing_mode == FileParsingMode.JSON:
-                # Load JSON file
-                json_file = open(self.txt_path, 'r', encoding="utf-8")
-                json_read = json_file.read()
-                json_data = json.loads(json_read)
-                json_file.close()
-
-                # Parse words using specialized parser function for JSON
-                self.words_list: list[str] = (
-                    list(word[0] for word in parsehelp.parse_json_chat(json_data,
-                                                                    min_word_size=int(self.ui.min_word_len_spin.text()),
-                                                                    sorting=sort_type))
-                )
-            elif self.window_modal_open_file.parsing_mode == FileParsingMode.PLAIN_TXT:
-                plain_txt_file = open(self.txt_path, 'r', encoding="utf-8")
-                plain_txt_read = plain_txt_file.read()
-                plain_txt_file.close()
-                # Parse words using specialized parser function for plain text
-                self.words_list: list[str] = (
-                    list(word[0] for word in parsehelp.parse_plain_text(plain_txt_read,
-                                                                        min_word_size=int(self.ui.min_word_len_spin.text()),
-                                                                        sorting=sort_type))
-                )
-
-            if len(self.words_list) == 0:
-                self.ui.statusbar.showMessage("All words filtered! Nothing to show...")
-                qtw.QApplication.beep()
-                return
+            use_mask: bool = self.ui.use_mask_chkbox.isChecked() and self.mask_path is not None
+            return {
+                "width": int(self.ui.img_width_spin.text()),
+                "height": int(self.ui.img_height_spin.text()),
+                "max_words": int(self.ui.max_word_spin.text()),
+                "mask_path": self.mask_path[0] if use_mask else None,
+                "mask_mtime": os.stat(self.mask_path[0]).st_mtime_ns if use_mask else None,
+                "masking_strategy": self.ui.color_to_mask_combo.currentText(),
+                "mask_tolerance": self.ui.mask_tolerance_spin.value(),
+                "font_path": self.font_path,
+                "min_font_size": int(self.ui.min_font_size_spin.text()),
+                "max_font_size": self.max_font_size,
+                "font_step": int(self.ui.font_step_spin.text()),
+                "layout_engine": LayoutEngine(self.ui.layout_engine_combo.currentIndex()),
+                "colormap": self.ui.color_map_combo.currentText(),
+                "use_mask_colors": self.ui.use_mask_colors_chk.isChecked(),
+                "color_sampling": ColorSampling(self.ui.color_sampling_combo.currentIndex()),
+                # Only drawing depends on these, see layout_cache.STYLE_ATTRIBUTES
+                "style": {
+                    "background_color": self.hex_color_to_tuple(self.ui.bg_color_edit.text()),
+                    "mode": self.ui.color_mode_combo.currentText(),
+                    "scale": float(self.ui.scaling_spin.text().replace(',', '.')),
+                    "contour_color": self.hex_color_to_tuple(self.ui.mask_color_edit.text()),
+                    "contour_width": int(self.ui.mask_thick_spin.text()),
+                },
+            }
 
-            # If not a video, just process a single frame
-            if not is_video:
-                # TODO Revise a bit later
-                mask_numpy = None
-                if self.ui.use_mask_chkbox.isChecked():
-                    if self.mask_path is not None:
-                        mask_data = numpy.array(Image.open(self.mask_path[0]))
-                        image_colors = ImageColorGenerator(mask_data)
-                        mask_numpy = mask_data.copy()
-
-                        # Mask out colors stated in combo box
-                        mask_numpy = process_mask_colors(self.ui.color_to_mask_combo.currentText(), mask_numpy)
-                        # For debug purposes
-                        # Image.fromarray(mask_numpy, mode='RGB').show()
-
-                wc = WordCloud(width=int(self.ui.img_width_spin.text()),
-                               height=int(self.ui.img_height_spin.text()),
-                               stopwords=self.stopword_read,
-                               background_color=self.hex_color_to_tuple(self.ui.bg_color_edit.text()),
-                               max_words=int(self.ui.max_word_spin.text()),
-                               colormap=self.ui.color_map_combo.currentText(),
-                               scale=float(self.ui.scaling_spin.text().replace(',', '.')),
-                               mode=self.ui.color_mode_combo.currentText(),
-                               mask=mask_numpy,
-                               font_path=self.font_path,
-                               min_font_size=int(self.ui.min_font_size_spin.text()),
-                               max_font_size=self.max_font_size,
-                               font_step=int(self.ui.font_step_spin.text()),
-                               contour_color=self.hex_color_to_tuple(self.ui.mask_color_edit.text()),
-                               contour_width=int(self.ui.mask_thick_spin.text()),
-                               )
-
-                wc.generate(" ".join(self.words_list))
+        def start_render_job(self, parse_settings: dict, render_settings: dict | None):
+            """
+            Run a job in the background. Only one job runs at a time: if one is running already, it is asked to stop
+            and the new job waits for it. A job which waited and got replaced by an even newer one is never started.
+            :param parse_settings: See collect_parse_settings().
+            :param render_settings: See collect_render_settings(). None means video.
+            :return: None
+            """
+            self.render_job_id += 1
+            job = (self.render_job_id, parse_settings, render_settings)
+            if render_settings is None:
+                # Video is started once its words are ready, no preview should replace it until then
+                self.ui.generate_btn.setEnabled(False)
+                self.ui.generate_vid_btn.setEnabled(False)
+            if self.render_worker is not None and self.render_worker.isRunning():
+                self.render_worker.cancel()
+                self.pending_render_job = job
+                self.ui.statusbar.showMessage("Waiting for the previous render to stop...")
+                return
+            self.run_render_job(job)
+
+        def run_render_job(self, job: tuple):
+            job_id, parse_settings, render_settings = job
+            self.render_worker = RenderJobWorker(job_id, parse_settings, render_settings,
+                                                 self.freq_cache, self.chat_index, self.layout_cache, self.font_metrics,
+                                                 self.render_cache)
+            self.render_worker.draft_ready.connect(self.render_draft_ready)
+            self.render_worker.job_done.connect(self.render_job_done)
+            self.render_worker.finished.connect(self.render_worker_finished)
+            self.ui.statusbar.showMessage("Rendering..." if render_settings is not None else "Parsing...")
+            self.render_worker.start()
+
+        def render_worker_finished(self):
+            # Caches are free now, the newest waiting job (if any) can go
+            if self.pending_render_job is not None:
+                job, self.pending_render_job = self.pending_render_job, None
+                self.run_render_job(job)
+
+        def render_draft_ready(self, job_id: int, draft_image: Image.Image, draft_ms: float):
+            """
+            Show a draft while the full layout is still being computed. It's never saved, saving waits for the final.
+            :param job_id: ID given in start_render_job().
+            :param draft_image: Image of the reduced layout, already upscaled to the final size.
+            :param draft_ms: How long the draft took.
+            :return: None
+            """
+            if job_id != self.render_job_id:
+                return
+            self.draft_image_qt = ImageQt(draft_image)
+            self.ui.preview_lbl.setPixmap(qtg.QPixmap.fromImage(self.draft_image_qt))
+            self.ui.statusbar.showMessage(f"Draft in {draft_ms:.0f} ms, refining...")
 
-                # Only recolor when needed
-                if self.ui.use_mask_colors_chk.isChecked():
-                    wc.recolor(color_func=image_colors)
+        def render_job_done(self, job_id: int, result: dict):
+            """
+            Show results of a background job. Results of outdated jobs are dropped.
+            :param job_id: ID given in start_render_job().
+            :param result: See RenderJobWorker.run().
+            :return: None
+            """
+            if job_id != self.render_job_id or result.get("cancelled"):
+                return
 
-                self.wordcloud_image = wc.to_image()  # For future saving purposes
-                self.wordcloud_image_qt = ImageQt(self.wordcloud_image)
-                # Spandau Ballet "Journeys To Glory" -->
-                # an album everyone who reads this should undoubtedly listen to RIGHT NOW (c)
-                # (c) vled & ruslan4ik & qwysam & chappyxd
-                self.ui.preview_lbl.setPixmap(qtg.QPixmap.fromImage(self.wordcloud_image_qt))
+            if result["image"] is None:
+                # Words for a video are here, buttons are locked again by start_video() if it goes on
+                self.ui.generate_btn.setEnabled(True)
+                self.update_video_button()
 
-            else:  # Else process as a video
-                self.frames_save_path = qtw.QFileDialog.getExistingDirectory(self,
-                                                                 "Select directory to store video frames")
-                if self.frames_save_path == '':
-                    self.ui.statusbar.showMessage("Select correct directory!")
-                    qtw.QApplication.beep()
-                    return
+            if "error" in result:
+                self.ui.statusbar.showMessage(f"Failed: {result['error']}")
+                qtw.QApplication.beep()
+                return
 
-                # Split jobs to multiprocess them
-                self.split_job = list(self.split_list_to_jobs(self.mask_path, (mp.cpu_count() - 1)))
+            self.words_freq = result["words_freq"]
+            if len(self.words_freq) == 0:
+                self.ui.statusbar.showMessage("All words filtered! Nothing to show...")
+                qtw.QApplication.beep()
+                return
 
-                # Manager for storing config between the processes (wordcloud parameters)
-                self.manager = mp.Manager()
+            if result["image"] is None:
+                self.start_video(result.get("frames"))
+                return
 
-                self.cfg_dict = self.manager.dict({
-                    "stopwords": self.stopword_read,
-                    "bg_color": self.hex_color_to_tuple(self.ui.bg_color_edit.text()),
-                    "max_words": int(self.ui.max_word_spin.text()),
-                    "colormap": self.ui.color_map_combo.currentText(),
-                    "scale": float(self.ui.scaling_spin.text().replace(',', '.')),
-                    "mode": self.ui.color_mode_combo.currentText(),
-                    "font_path": self.font_path,
-                    "min_font_size": int(self.ui.min_font_size_spin.text()),
-                    "max_font_size": self.max_font_size,
-                    "font_step": int(self.ui.font_step_spin.text()),
-                    "contour_color": self.hex_color_to_tuple(self.ui.mask_color_edit.text()),
-                    "contour_width": int(self.ui.mask_thick_spin.text()),
-                    "masking_strategy": self.ui.color_to_mask_combo.currentText(),
-                    "need_recolor": self.ui.use_mask_colors_chk.isChecked(),
-                    "save_dir": self.frames_save_path,
-                    # TBH this is probably not a very good idea, let's still leave it here for now TODO
-                    "words_list": self.words_list,
-                })
-
-                # Queue for progress updates
-                self.progress_queue = self.manager.Queue()
-
-                # Reset + resize progress bar
-                self.ui.progressBar.setValue(0)
-                self.ui.progressBar.setMaximum(len(self.mask_path))
-                self.ui.statusbar.showMessage("Let's hope for the best! Processing...")
-
-                # Prepare spinners to display a cute character you can spend time with while waiting for the processing
-                self.movie = qtg.QMovie(os.path.join(f"{BASE_DIR_PTH}",
-                                                     "spinners",
-                                                     random.choice(os.listdir(f"{BASE_DIR_PTH}/spinners"))))
-                self.movie.setScaledSize(qtc.QSize(256, 256))
-                self.ui.preview_lbl.setMovie(self.movie)
-                self.movie.start()
-
-                # Disable buttons to not mess with a processing
-                self.ui.generate_btn.setEnabled(False)
-                self.ui.save_btn.setEnabled(False)
-                self.ui.generate_vid_btn.setEnabled(False)
+            self.wordcloud_image = result["image"]  # For future saving purposes
+            self.wordcloud_image_qt = ImageQt(self.wordcloud_image)
+            # Spandau Ballet "Journeys To Glory" -->
+            # an album everyone who reads this should undoubtedly listen to RIGHT NOW (c)
+            # (c) vled & ruslan4ik & qwysam & chappyxd
+            self.ui.preview_lbl.setPixmap(qtg.QPixmap.fromImage(self.wordcloud_image_qt))
+            if result["source"] == RenderSource.RESTYLED:
+                self.ui.statusbar.showMessage(f"Layout reused, restyled in {result['render_ms']:.0f} ms")
+            elif result["source"] == RenderSource.RENDER_CACHE:
+                self.ui.statusbar.showMessage(f"Restored from render cache in {result['render_ms']:.0f} ms")
+            else:
+                draft_note = f"draft after {result['draft_ms']:.0f} ms, " if "draft_ms" in result else ""
+                self.ui.statusbar.showMessage(f"Layout computed in {result['render_ms']:.0f} ms ({draft_note}"
+                                              f"font metrics hit rate {self.font_metrics.hit_rate():.0%})")
 
-                # Thread for maintaining the progress bar and misc.
-                self.observing_thread = ProgressListenerWorker(self.progress_queue)
-                self.observing_thread.queue_signal.connect(self.process_queue_updates)
+        def start_video(self, frames: list[tuple] | None):
+            """
+            Split frames between processes and start video generation. Words must be in self.words_freq already.
+            :param frames: Timeline frames made by the worker, see compute_timeline_frames(). None means mask frames.
+            :return: None
+            """
+            if frames is None:
+                # One frame per mask, all of them share the same words
+                frames = [(mask_file, os.path.basename(mask_file), None) for mask_file in self.mask_path]
+
+            # Split jobs to multiprocess them
+            self.split_job = list(self.split_list_to_jobs(frames,
+                                                          (mp.cpu_count() - 1),
+                                                          consecutive=self.ui.coherent_video_chk.isChecked()))
+
+            # Manager for storing config between the processes (wordcloud parameters)
+            self.manager = mp.Manager()
+
+            self.cfg_dict = self.manager.dict({
+                "width": int(self.ui.img_width_spin.text()),
+                "height": int(self.ui.img_height_spin.text()),
+                "bg_color": self.hex_color_to_tuple(self.ui.bg_color_edit.text()),
+                "max_words": int(self.ui.max_word_spin.text()),
+                "colormap": self.ui.color_map_combo.currentText(),
+                "scale": float(self.ui.scaling_spin.text().replace(',', '.')),
+                "mode": self.ui.color_mode_combo.currentText(),
+                "font_path": self.font_path,
+                "min_font_size": int(self.ui.min_font_size_spin.text()),
+                "max_font_size": self.max_font_size,
+                "font_step": int(self.ui.font_step_spin.text()),
+                "contour_color": self.hex_color_to_tuple(self.ui.mask_color_edit.text()),
+                "contour_width": int(self.ui.mask_thick_spin.text()),
+                "masking_strategy": self.ui.color_to_mask_combo.currentText(),
+                "mask_tolerance": self.ui.mask_tolerance_spin.value(),
+                "need_recolor": self.ui.use_mask_colors_chk.isChecked(),
+                "save_dir": self.frames_save_path,
+                # TBH this is probably not a very good idea, let's still leave it here for now TODO
+                "frequencies": self.words_freq,
+                "font_metrics": self.font_metrics,
+                "layout_engine": LayoutEngine(self.ui.layout_engine_combo.currentIndex()),
+                "coherent": self.ui.coherent_video_chk.isChecked(),
+                "svg_frames": self.ui.svg_frames_chk.isChecked(),
+                "svg_embed_font": self.ui.svg_embed_font_chk.isChecked(),
+                "color_sampling": ColorSampling(self.ui.color_sampling_combo.currentIndex()),
+            })
+
+            self.start_background_process(main_worker, (self.split_job, self.cfg_dict), len(frames))
+
+        def start_background_process(self, target: Callable, args: tuple, steps: int):
+            """
+            Run a long job in a separate process while a spinner is shown and GUI buttons are locked.
+            self.manager must be created already.
+            :param target: Top level function, gets args and a progress queue. It puts 1 into the queue
+            after every step and 2 when it's done.
+            :param args: Arguments before the queue.
+            :param steps: Progress bar maximum.
+            :return: None
+            """
+            # Queue for progress updates
+            self.progress_queue = self.manager.Queue()
+
+            # Reset + resize progress bar
+            self.ui.progressBar.setValue(0)
+            self.ui.progressBar.setMaximum(steps)
+            self.ui.statusbar.showMessage("Let's hope for the best! Processing...")
+
+            # Prepare spinners to display a cute character you can spend time with while waiting for the processing
+            self.movie = qtg.QMovie(os.path.join(f"{BASE_DIR_PTH}",
+                                                 "spinners",
+                                                 random.choice(os.listdir(f"{BASE_DIR_PTH}/spinners"))))
+            self.movie.setScaledSize(qtc.QSize(256, 256))
+            self.ui.preview_lbl.setMovie(self.movie)
+            self.movie.start()
+
+            # Disable buttons to not mess with a processing
+            self.ui.generate_btn.setEnabled(False)
+            self.ui.save_btn.setEnabled(False)
+            self.ui.save_poster_btn.setEnabled(False)
+            self.ui.generate_vid_btn.setEnabled(False)
+
+            # Thread for maintaining the progress bar and misc.
+            self.observing_thread = ProgressListenerWorker(self.progress_queue)
+            self.observing_thread.queue_signal.connect(self.process_queue_updates)
+
+            self.observing_thread.start()
+
+            # Start main worker process (brigadier)
+            self.worker_process = mp.Process(target=target, args=(*args, self.progress_queue))
+            self.worker_process.start()
+
+        def save_poster(self):
+            """
+            Render words of the last preview as a poster with current settings, see poster_worker().
+            :return: None
+            """
+            if not self.words_freq:
+                self.ui.statusbar.showMessage("Generate a preview first!")
+                qtw.QApplication.beep()
+                return
+            try:
+                settings: dict = self.collect_render_settings()
+            except ValueError as e:
+                self.ui.statusbar.showMessage(f"Invalid setting: {e}")
+                return
 
-                self.observing_thread.start()
+            poster_path = qtw.QFileDialog.getSaveFileName(self, "Select where to save poster", filter="Poster (*.png)")
+            if poster_path[0] == '':
+                return
 
-                # Start main worker process (brigadier)
-                self.worker_process = mp.Process(target=main_worker,
-                                                 args=(self.split_job,
-                                                       self.cfg_dict,
-                                                       self.progress_queue))
-                self.worker_process.start()
+            if settings["mask_path"]:
+                width, height = Image.open(settings["mask_path"]).size
+            else:
+                width, height = settings["width"], settings["height"]
+            poster_width, poster_height = output_size(*working_size(width, height, settings["style"]["scale"]))
 
+            self.manager = mp.Manager()
+            self.start_background_process(poster_worker,
+                                          (self.words_freq, settings, poster_path[0]),
+                                          len(poster_tiles(poster_width, poster_height)))
+            self.ui.statusbar.showMessage(f"Rendering a {poster_width}x{poster_height} poster...")
 
         def pick_bg_color(self):
             # TODO ShowAlphaChannel could vary regarding on which mode is selected in combo. For now always on
@@ -565,8 +1448,19 @@ if __name__ == "__main__":
             if self.wordcloud_image is not None:
                 save_path = qtw.QFileDialog.getSaveFileName(self,
                                                             "Select directory where to save wordcloud",
-                                                            filter="Wordcloud (*.png)")
-                if save_path[0] != '':
+                                                            filter="Wordcloud (*.png);;Vector wordcloud (*.svg)")
+                if save_path[0] == '':
+                    return
+                if save_path[1].endswith("(*.svg)") or save_path[0].lower().endswith(".svg"):
+                    # Layout of the preview is in the layout cache, but a running job may be replacing it
+                    if self.render_worker is not None and self.render_worker.isRunning():
+                        self.ui.statusbar.showMessage("Wait for the preview to finish!")
+                        qtw.QApplication.beep()
+                        return
+                    svg_path = save_path[0] if save_path[0].lower().endswith(".svg") else save_path[0] + ".svg"
+                    save_svg(self.layout_cache.wordcloud, svg_path, self.ui.svg_embed_font_chk.isChecked(),
+                             self.font_metrics)
+                else:
                     self.wordcloud_image.save(save_path[0])
             else:
                 self.ui.statusbar.showMessage("Nothing to save!")
@@ -0,0 +1,198 @@
+import mmap
+import os
+from collections import Counter
+from datetime import datetime
+from typing import Iterator
+
+import numpy
+
+from constants import CHAT_INDEX_BLOB_SUFFIX
+from constants import CHAT_INDEX_SUFFIX
+from stream_readers import iter_json_messages
+from tokenizer import tokenize
+
+_INDEX_VERSION: int = 1
+
+
+def message_timestamp(message: dict) -> int:
+    """
+    Unix time of a Telegram message. New exports have "date_unixtime", old ones only ISO "date".
+    """
+    if "date_unixtime" in message:
+        return int(message["date_unixtime"])
+    if "date" in message:
+        return int(datetime.fromisoformat(message["date"]).timestamp())
+    return 0
+
+
+class ChatIndex:
+    """
+    Columnar index over a Telegram JSON export.
+    Every text message is one row: sender code, timestamp and [start, end) offsets into a UTF-8 blob with all texts.
+    Texts in the blob are separated by newlines, so a run of consecutive rows can be tokenized with one call.
+    Columns are stored in <export>.wcindex.npz, the blob in <export>.wcindex.txt which is memory-mapped on load.
+    """
+
+    def __init__(self,
+                 senders: list[str],
+                 sender_names: list[str],
+                 sender_codes: numpy.ndarray,
+                 timestamps: numpy.ndarray,
+                 offsets: numpy.ndarray,
+                 blob: bytes | mmap.mmap):
+        self.senders = senders  # from_id of every sender
+        self.sender_names = sender_names  # Display names, same order
+        self.sender_codes = sender_codes  # int32 per row, -1 if unknown
+        self.timestamps = timestamps  # int64 unix time per row
+        self.offsets = offsets  # int64, row i text is blob[offsets[i]:offsets[i + 1] - 1]
+        self.blob = blob
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @staticmethod
+    def index_paths(file_path: str) -> tuple[str, str]:
+        return file_path + CHAT_INDEX_SUFFIX, file_path + CHAT_INDEX_BLOB_SUFFIX
+
+    @classmethod
+    def build(cls, file_path: str) -> "ChatIndex":
+        """
+        Stream the export once and write the index next to it.
+        :param file_path: Path to the Telegram chat export.
+        :return: Loaded ChatIndex.
+        """
+        columns_path, blob_path = cls.index_paths(file_path)
+        source_stat = os.stat(file_path)
+
+        sender_lookup: dict[str, int] = {}
+        sender_names: list[str] = []
+        sender_codes: list[int] = []
+        timestamps: list[int] = []
+        offsets: list[int] = [0]
+
+        with open(blob_path + ".tmp", 'wb') as blob_file:
+            position = 0
+            for message in iter_json_messages(file_path):
+                text = message.get("text")
+                # Same rule as the parser: omit empty messages and nested messages (like links etc.)
+                if type(text) is list or not text:
+                    continue
+
+                sender_id = message.get("from_id")
+                if sender_id is None:
+                    sender_codes.append(-1)
+                else:
+                    if sender_id not in sender_lookup:
+                        sender_lookup[sender_id] = len(sender_lookup)
+                        sender_names.append(message.get("from") or sender_id)
+                    sender_codes.append(sender_lookup[sender_id])
+                timestamps.append(message_timestamp(message))
+
+                encoded = text.encode("utf-8") + b"\n"
+                blob_file.write(encoded)
+                position += len(encoded)
+                offsets.append(position)
+
+        with open(columns_path + ".tmp", 'wb') as columns_file:
+            numpy.savez(columns_file,
+                        version=numpy.array([_INDEX_VERSION]),
+                        source=numpy.array([source_stat.st_size, source_stat.st_mtime_ns], dtype=numpy.int64),
+                        senders=numpy.array(list(sender_lookup), dtype=str),
+                        sender_names=numpy.array(sender_names, dtype=str),
+                        sender_codes=numpy.array(sender_codes, dtype=numpy.int32),
+                        timestamps=numpy.array(timestamps, dtype=numpy.int64),
+                        offsets=numpy.array(offsets, dtype=numpy.int64))
+        os.replace(blob_path + ".tmp", blob_path)
+        os.replace(columns_path + ".tmp", columns_path)
+
+        return cls.load(file_path)
+
+    @classmethod
+    def load(cls, file_path: str) -> "ChatIndex | None":
+        """
+        Load the index of an export if it exists and is up-to-date.
+        :param file_path: Path to the Telegram chat export (not to the index).
+        :return: ChatIndex or None if there is no valid index.
+        """
+        columns_path, blob_path = cls.index_paths(file_path)
+        try:
+            source_stat = os.stat(file_path)
+            with numpy.load(columns_path) as columns:
+                if int(columns["version"][0]) != _INDEX_VERSION:
+                    return None
+                if columns["source"].tolist() != [source_stat.st_size, source_stat.st_mtime_ns]:
+                    return None  # Export was changed after indexing
+                senders = columns["senders"].tolist()
+                sender_names = columns["sender_names"].tolist()
+                sender_codes = columns["sender_codes"]
+                timestamps = columns["timestamps"]
+                offsets = columns["offsets"]
+
+            if offsets[-1] == 0:
+                blob = b""  # mmap can't map empty files
+            else:
+                with open(blob_path, 'rb') as blob_file:
+                    blob = mmap.mmap(blob_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, KeyError, ValueError):
+            return None
+
+        return cls(senders, sender_names, sender_codes, timestamps, offsets, blob)
+
+    @classmethod
+    def load_or_build(cls, file_path: str) -> "ChatIndex":
+        return cls.load(file_path) or cls.build(file_path)
+
+    def select(self,
+               sender_ids: list[str] | None = None,
+               start: int | None = None,
+               end: int | None = None) -> numpy.ndarray:
+        """
+        Find rows matching a filter. Everything is vectorized, so it takes milliseconds even for millions of rows.
+        :param sender_ids: Keep only messages from these from_id's. None means everyone.
+        :param start: Keep only messages sent at or after this unix time.
+        :param end: Keep only messages sent before this unix time.
+        :return: Sorted array of row numbers.
+        """
+        keep = numpy.ones(len(self), dtype=bool)
+        if sender_ids is not None:
+            codes = [self.senders.index(sender_id) for sender_id in sender_ids if sender_id in self.senders]
+            keep &= numpy.isin(self.sender_codes, codes)
+        if start is not None:
+            keep &= self.timestamps >= start
+        if end is not None:
+            keep &= self.timestamps < end
+        return numpy.flatnonzero(keep)
+
+    def text(self, row: int) -> str:
+        """
+        :return: Text of one message (without the separating newline).
+        """
+        return self.blob[self.offsets[row]:self.offsets[row + 1] - 1].decode("utf-8")
+
+    def iter_runs(self, rows: numpy.ndarray) -> Iterator[str]:
+        """
+        Decode texts of selected rows, consecutive rows are decoded as one newline-separated piece.
+        :param rows: Sorted row numbers, e.g. from select().
+        :return: Generator of text pieces.
+        """
+        if len(rows) == 0:
+            return
+        # Split selected rows into runs of consecutive numbers
+        breaks = numpy.flatnonzero(numpy.diff(rows) != 1) + 1
+        run_starts = numpy.concatenate(([rows[0]], rows[breaks]))
+        run_ends = numpy.concatenate((rows[breaks - 1], [rows[-1]])) + 1
+        for run_start, run_end in zip(run_starts.tolist(), run_ends.tolist()):
+            yield self.blob[self.offsets[run_start]:self.offsets[run_end]].decode("utf-8")
+
+    def count_words(self, rows: numpy.ndarray | None = None) -> Counter:
+        """
+        Count words of selected rows only.
+        :param rows: Row numbers from select(). None means all messages.
+        :return: Counter with words and their frequencies.
+        """
+        if rows is None:
+            rows = numpy.arange(len(self))
+        words_stat: Counter = Counter()
+        for text in self.iter_runs(rows):
+            words_stat.update(tokenize(text))
+        return words_stat
@@ -0,0 +1,152 @@
+from operator import itemgetter
+from random import Random
+
+import numpy
+from PIL import Image
+from PIL import ImageDraw
+from wordcloud import WordCloud
+
+from constants import COHERENT_MAX_GROWTH
+from font_metrics import FontMetricsCache
+from layout_engine import SatOccupancyMap
+
+# Word -> (font size, orientation, centre row, centre column, colour). What the next frame starts from
+Placement = dict[str, tuple[int, int | None, int, int, str]]
+
+
+def placement_of(wordcloud: WordCloud, font_metrics: FontMetricsCache) -> Placement:
+    """
+    :param wordcloud: WordCloud after generate_from_frequencies().
+    :param font_metrics: Font and word size cache, words were just measured so these are lookups.
+    :return: Where and how its words were drawn. Centres rather than corners, so a word that grows or shrinks
+    on the next frame stays where it was.
+    """
+    placement: Placement = {}
+    draw = ImageDraw.Draw(Image.new("L", (1, 1)))
+    for (word, _), font_size, (pos_x, pos_y), orientation, color in wordcloud.layout_:
+        _, box_size = font_metrics.word_box(draw, wordcloud.font_path, font_size, orientation, word)
+        placement[word] = (font_size, orientation, pos_x + box_size[3] // 2, pos_y + box_size[2] // 2, color)
+    return placement
+
+
+def generate_coherent(wordcloud: WordCloud,
+                      frequencies: dict[str, int],
+                      previous: Placement | None,
+                      font_metrics: FontMetricsCache) -> Placement:
+    """
+    Like wordcloud.generate_from_frequencies(), but every word that was on the previous frame is first tried
+    at the same spot, same orientation and colour. Only words whose spot is now taken or masked out are searched
+    for like WordCloud does, so frames of a smooth mask animation barely move and most words cost one lookup.
+    Font sizes follow this frame's frequencies, so a timeline still shows words growing and shrinking.
+    Seeded frames always use the NumPy occupancy map (layout_engine.SatOccupancyMap) at 1 px blocks,
+    it can check a single spot.
+    :param wordcloud: WordCloud with this frame's mask and settings, its layout_ is filled in.
+    :param frequencies: Words and their frequencies.
+    :param previous: Placement returned for the previous frame, None makes a usual layout.
+    :param font_metrics: Font and word size cache.
+    :return: Placement of this frame, pass it as previous for the next one.
+    """
+    if not previous:
+        wordcloud.generate_from_frequencies(frequencies)
+        return placement_of(wordcloud, font_metrics)
+
+    # Sorted and normalized just like WordCloud does it
+    frequencies = sorted(frequencies.items(), key=itemgetter(1), reverse=True)[:wordcloud.max_words]
+    max_frequency = float(frequencies[0][1])
+    frequencies = [(word, freq / max_frequency) for word, freq in frequencies]
+    random_state = wordcloud.random_state
+    if not isinstance(random_state, Random):
+        random_state = Random(random_state)  # Seed or None, like WordCloud does it
+
+    if wordcloud.mask is not None:
+        boolean_mask = wordcloud._get_bolean_mask(wordcloud.mask)
+        height, width = wordcloud.mask.shape[:2]
+    else:
+        boolean_mask = None
+        height, width = wordcloud.height, wordcloud.width
+    # Exact to a pixel: words of the previous frame are packed tight, coarser blocks would find their spots taken
+    occupancy = SatOccupancyMap(height, width, boolean_mask, block=1)
+
+    img_grey = Image.new("L", (width, height))
+    draw = ImageDraw.Draw(img_grey)
+    margin = wordcloud.margin
+    # Sizes go on from the previous frame's biggest word, so the picture keeps its scale
+    font_size = wordcloud.max_font_size or max(font_size for font_size, *_ in previous.values())
+    last_freq = 1.
+    layout = []
+
+    for word, freq in frequencies:
+        if freq == 0:
+            continue
+        scaling = wordcloud.relative_scaling
+        if scaling != 0:
+            font_size = int(round((scaling * (freq / float(last_freq)) + (1 - scaling)) * font_size))
+
+        result = None
+        old = previous.get(word)
+        if old is not None:
+            old_font_size, orientation, centre_x, centre_y, color = old
+            # Growing all at once would push neighbours off their spots, so words grow a bit every frame
+            font_size = min(font_size, max(old_font_size + 1, round(old_font_size * COHERENT_MAX_GROWTH)))
+            # Old spot first, from this frame's size down to the old one
+            for try_font_size in range(font_size, min(font_size, old_font_size) - 1, -wordcloud.font_step):
+                if try_font_size < wordcloud.min_font_size:
+                    break
+                transposed_font, box_size = font_metrics.word_box(draw, wordcloud.font_path, try_font_size,
+                                                                  orientation, word)
+                # Without the margin: WordCloud's own search is off by a pixel, so old neighbours may be that close
+                size_x, size_y = box_size[3], box_size[2]
+                result = occupancy.try_position(centre_x - size_x // 2, centre_y - size_y // 2, size_x, size_y)
+                if result is not None:
+                    result = (result[0] - margin // 2, result[1] - margin // 2)  # Where the margin box would start
+                    font_size = try_font_size
+                    break
+
+            if result is None:
+                # Spot is taken or masked out now, take the closest free one, at most as big as it was
+                font_size = min(font_size, old_font_size)
+            while result is None and font_size >= wordcloud.min_font_size:
+                transposed_font, box_size = font_metrics.word_box(draw, wordcloud.font_path, font_size, orientation,
+                                                                  word)
+                size_x, size_y = box_size[3] + margin, box_size[2] + margin
+                result = occupancy.nearest_position(centre_x - size_x // 2, centre_y - size_y // 2, size_x, size_y)
+                if result is None:
+                    font_size -= wordcloud.font_step
+        else:
+            # New word, the same steps as WordCloud takes
+            color = None
+            orientation = None if random_state.random() < wordcloud.prefer_horizontal else Image.ROTATE_90
+            tried_other_orientation = False
+            while font_size >= wordcloud.min_font_size:
+                transposed_font, box_size = font_metrics.word_box(draw, wordcloud.font_path, font_size, orientation,
+                                                                  word)
+                result = occupancy.sample_position(box_size[3] + margin, box_size[2] + margin, random_state)
+                if result is not None:
+                    break
+                if not tried_other_orientation and wordcloud.prefer_horizontal < 1:
+                    orientation = Image.ROTATE_90
+                    tried_other_orientation = True
+                else:
+                    font_size -= wordcloud.font_step
+                    orientation = None
+
+        if result is None:
+            break  # Even the smallest font did not fit, nothing else will
+
+        pos_x, pos_y = result[0] + margin // 2, result[1] + margin // 2
+        draw.text((pos_y, pos_x), word, fill="white", font=transposed_font)
+        if color is None:
+            color = wordcloud.color_func(word, font_size=font_size, position=(pos_x, pos_y), orientation=orientation,
+                                         random_state=random_state, font_path=wordcloud.font_path)
+        layout.append(((word, freq), font_size, (pos_x, pos_y), orientation, color))
+
+        # Only the word's own area is read back, not the whole canvas
+        area = occupancy.touched_area(*result)
+        if area is not None:
+            top, left, bottom, right = area
+            occupancy.take(numpy.asarray(img_grey.crop((left, top, right, bottom))), top, left)
+        last_freq = freq
+
+    wordcloud.words_ = dict(frequencies)
+    wordcloud.layout_ = layout
+    return placement_of(wordcloud, font_metrics)
@@ -0,0 +1,111 @@
+import math
+
+import numpy
+from PIL import Image
+from PIL import ImageDraw
+
+from constants import COLOR_SAMPLER_DOMINANT_BITS
+from constants import COLOR_SAMPLER_SAMPLES
+from constants import ColorSampling
+from font_metrics import FontMetricsCache
+
+
+class SatColorGenerator:
+    """
+    Drop-in replacement of wordcloud.ImageColorGenerator: colours every word by the mask image under it.
+    ImageColorGenerator loads the font and averages the whole box of a word for every word. Here fonts and boxes
+    come from FontMetricsCache (the same boxes the layout has measured), and the mean is read from per-channel
+    summed-area tables made once per image, so it costs the same for a word of any size.
+    Median and dominant colours look at an evenly spread sample of at most COLOR_SAMPLER_SAMPLES pixels.
+    Tables are made on first use, so a generator costs nothing until words are coloured by it. Making the mean table
+    reads the whole image once, about as much as ImageColorGenerator reads for one full canvas of words, so keep
+    the generator around for as long as the image is the same: every later recolor is nearly free.
+    Unlike ImageColorGenerator, the box is not transposed (it took width for height) and greyscale images work.
+    Alpha channel is ignored, same as there.
+    """
+
+    def __init__(self,
+                 image: numpy.ndarray,
+                 sampling: ColorSampling = ColorSampling.MEAN,
+                 default_color: tuple | None = None,
+                 font_metrics: FontMetricsCache | None = None):
+        """
+        :param image: Image to take colours from, same size as the canvas. Greyscale, RGB or RGBA.
+        :param sampling: How a word's colour is made of the pixels under it. May be changed later.
+        :param default_color: Colour of words outside of the image, (r, g, b). None raises ValueError there.
+        :param font_metrics: Cache to measure words with, the one the layout was made with is all lookups.
+        """
+        if image.ndim not in (2, 3):
+            raise ValueError(f"SatColorGenerator needs an image with ndim 2 or 3, got {image.ndim}")
+        if image.ndim == 3 and image.shape[2] not in (3, 4):
+            raise ValueError(f"A color image needs to have 3 or 4 channels, got {image.shape[2]}")
+        self.image: numpy.ndarray = image[:, :, :3] if image.ndim == 3 else image[:, :, None]
+        self.sampling = sampling
+        self.default_color = default_color
+        self.font_metrics = font_metrics if font_metrics is not None else FontMetricsCache()
+        self._draw = ImageDraw.Draw(Image.new("L", (1, 1)))
+        self._integral: numpy.ndarray | None = None
+        self._bins: numpy.ndarray | None = None
+
+    def _color(self, color) -> str:
+        if len(color) == 1:
+            color = (color[0], color[0], color[0])  # Greyscale
+        return "rgb(%d, %d, %d)" % tuple(color)
+
+    def _mean(self, top: int, left: int, bottom: int, right: int) -> str:
+        if self._integral is None:
+            height, width, channels = self.image.shape
+            # Sums wrap around in uint32, but the sum of any box fits, so box sums still come out right
+            dtype = numpy.uint32 if height * width * 255 < 1 << 32 else numpy.uint64
+            self._integral = numpy.zeros((height + 1, width + 1, channels), dtype=dtype)
+            self._integral[1:, 1:] = self.image
+            # In place, a 4K table is ~100 MB and it's all memory bandwidth
+            numpy.add.accumulate(self._integral, axis=0, out=self._integral)
+            numpy.add.accumulate(self._integral, axis=1, out=self._integral)
+        integral = self._integral
+        total = integral[bottom, right] - integral[top, right] - integral[bottom, left] + integral[top, left]
+        return self._color(total / ((bottom - top) * (right - left)))
+
+    def _sample(self, top: int, left: int, bottom: int, right: int) -> tuple[int, int]:
+        # Step between sampled rows and columns, so there are at most COLOR_SAMPLER_SAMPLES of them
+        step = max(1, math.ceil(math.sqrt((bottom - top) * (right - left) / COLOR_SAMPLER_SAMPLES)))
+        return step, step // 2  # Offset, so a box of one step still gets its middle pixel
+
+    def _median(self, top: int, left: int, bottom: int, right: int) -> str:
+        step, offset = self._sample(top, left, bottom, right)
+        patch = self.image[top + offset:bottom:step, left + offset:right:step]
+        return self._color(numpy.median(patch.reshape(-1, patch.shape[2]), axis=0))
+
+    def _dominant(self, top: int, left: int, bottom: int, right: int) -> str:
+        if self._bins is None:
+            # Every pixel's colour bin, from the top bits of its channels
+            shift = 8 - COLOR_SAMPLER_DOMINANT_BITS
+            self._bins = numpy.zeros(self.image.shape[:2], dtype=numpy.uint32)
+            for channel in range(self.image.shape[2]):
+                self._bins <<= COLOR_SAMPLER_DOMINANT_BITS
+                self._bins |= self.image[:, :, channel] >> shift
+        step, offset = self._sample(top, left, bottom, right)
+        bins = self._bins[top + offset:bottom:step, left + offset:right:step].ravel()
+        # Mean of the pixels of the most common bin, not the bin itself, so the colour is not posterized
+        patch = self.image[top + offset:bottom:step, left + offset:right:step].reshape(-1, self.image.shape[2])
+        return self._color(patch[bins == numpy.argmax(numpy.bincount(bins))].mean(axis=0))
+
+    def __call__(self, word, font_size, font_path, position, orientation, **kwargs) -> str:
+        """
+        Same signature as WordCloud colour functions.
+        :return: Colour as "rgb(r, g, b)".
+        """
+        _, box = self.font_metrics.word_box(self._draw, font_path, font_size, orientation, word)
+        top, left = position
+        bottom = min(top + box[3], self.image.shape[0])
+        right = min(left + box[2], self.image.shape[1])
+        if bottom <= top or right <= left:
+            if self.default_color is None:
+                raise ValueError("SatColorGenerator is smaller than the canvas")
+            return "rgb(%d, %d, %d)" % tuple(self.default_color)
+
+        if self.sampling == ColorSampling.MEDIAN:
+            return self._median(top, left, bottom, right)
+        if self.sampling == ColorSampling.DOMINANT:
+            return self._dominant(top, left, bottom, right)
+        return self._mean(top, left, bottom, right)
@@ -1,16 +1,140 @@
 import enum
+import os
 
-# This should be upgraded in the future.
-# For example, I can't add '-' since it can be inside of a word.
-# TODO Please fix the algorithm in newer versions
-FORBIDDEN_CHAR: list[str] = [',', '.', '(', ')', '\n', '\'', '"', "*", '%', '&', '?', "!", "…"]
+# Word is a run of letters/digits. Hyphens are allowed only inside of it ("well-known" but not "-" or "--word").
+# Everything else (any whitespace, Unicode punctuation, symbols) separates words.
+TOKEN_PATTERN: str = r"\w+(?:[-\u2010\u2011]\w+)*"
+# Apostrophes are removed before splitting, so "don't" becomes "dont" like it always was
+TOKEN_GLUE_CHARS: str = "'\u2019\u02bc`"
+
+# Phrases never cross these: sentence ends, commas, brackets, quotes and line breaks (so message borders too)
+PHRASE_BREAK_PATTERN: str = r"[.,!?;:()\[\]{}\"\u00ab\u00bb\u201c\u201d\u2026\n\r]+"
+
+# How many distinct words TokenNormalizer remembers. Chats are Zipfian, so this covers nearly every token
+NORMALIZE_CACHE_SIZE: int = 1 << 18
+
+# Built-in stopword sets, display name -> language code. Files live in /stopwords, English comes from WordCloud
+BUILTIN_STOPWORD_LANGUAGES: dict[str, str] = {
+    "English": "en",
+    "Russian": "ru",
+    "Ukrainian": "uk",
+}
+
+# How many characters streaming JSON parser reads at once. 1M chars is a few MB of RAM at most.
+JSON_STREAM_CHUNK_SIZE: int = 1 << 20
+# How many bytes of memory-mapped plain text are decoded at once
+TEXT_WINDOW_SIZE: int = 4 << 20
+
+# Parallel counting. Files smaller than the threshold are not worth spawning a process pool for.
+PARALLEL_PARSE_MIN_FILE_SIZE: int = 64 << 20
+PARALLEL_CHUNK_SIZE: int = 16 << 20  # Bytes of plain text per job
+PARALLEL_MESSAGES_PER_JOB: int = 20000  # Telegram messages per job
+
+# Approximate counting (heavy_hitters.py). Rough size of one tracked word in a dict, used to turn a memory cap
+# into capacity. Short word, its count and its error take ~200 bytes in CPython.
+HEAVY_HITTERS_BYTES_PER_WORD: int = 200
+
+# Phrases (n-grams). Rare ones are pruned while counting to keep memory bounded, see heavy_hitters.py
+NGRAM_MAX_SIZE: int = 3
+NGRAM_MEMORY_LIMIT: int = 128 << 20
+NGRAM_MIN_COUNT: int = 3  # Phrases seen less often are not worth drawing
+
+# Word frequency cache, so the same file is not parsed again on every Generate click
+FREQ_CACHE_DIR: str = os.path.join(os.path.expanduser("~"), ".cache", "wordcloud_factory", "frequencies")
+FREQ_CACHE_MAX_DISK_BYTES: int = 512 << 20
+FREQ_CACHE_MAX_MEMORY_ENTRIES: int = 8
+
+# Rendered images and their layouts, keyed by everything they are made of (render_cache.py)
+RENDER_CACHE_DIR: str = os.path.join(os.path.expanduser("~"), ".cache", "wordcloud_factory", "renders")
+RENDER_CACHE_MAX_DISK_BYTES: int = 2 << 30
+RENDER_CACHE_MAX_MEMORY_BYTES: int = 256 << 20
+# Every WordCloud gets this seed, so the same settings always give the same picture and can be cached
+RENDER_SEED: int = 42
+
+# Live preview waits for settings to stop changing for this long before rendering
+PREVIEW_DEBOUNCE_MS: int = 300
+# Big previews are first laid out on a canvas shrunk to about this many pixels on the longer side.
+# If that's not at least 2x smaller than the real canvas, the draft is skipped
+PREVIEW_DRAFT_SIDE: int = 384
+PREVIEW_DRAFT_MAX_FACTOR: float = 0.5
+
+# Word boxes measured by WordCloud, see font_metrics.py. An entry is ~300 bytes, so this is ~150 MB at most
+FONT_METRICS_CACHE_SIZE: int = 1 << 19
+# Loaded fonts, one per size. Each holds a FreeType face, so only a few are kept
+FONT_OBJECTS_CACHE_SIZE: int = 64
+
+# NumPy layout engine (layout_engine.py) keeps occupancy on a grid of about this many blocks on the longer side.
+# Smaller canvases are exact to a pixel, 4K ones use 4x4 px blocks
+LAYOUT_GRID_SIDE: int = 1024
+
+# Coherent videos: a word may grow by this much from one frame to the next, so it doesn't push neighbours away
+COHERENT_MAX_GROWTH: float = 1.1
+
+# Median and dominant mask colours look at no more than this many pixels of a word's box
+COLOR_SAMPLER_SAMPLES: int = 1024
+# Dominant mask colour groups pixels by this many top bits of every channel
+COLOR_SAMPLER_DOMINANT_BITS: int = 3
+
+# Mask strategies as named in the mask combo of MainScreenWindow: (black is masked, white is masked)
+MASKING_STRATEGIES: dict[str, tuple[bool, bool]] = {
+    "Black + White are masked": (True, True),
+    "Black is masked": (True, False),
+    "White is masked": (False, True),
+    "None are masked": (False, False),
+}
+# How far from pure black or white a colour may be and still count as it, so JPEG noise is masked too
+MASK_TOLERANCE: int = 0
+MASK_MAX_TOLERANCE: int = 127
+# Pixels of PNG masks more transparent than this are always masked out
+MASK_ALPHA_THRESHOLD: int = 128
+# Masks are processed this many rows at a time, so temporary arrays stay in CPU cache even on 4K frames
+MASK_BAND_ROWS: int = 64
+
+# Posters are laid out with the longer side at most this big and then scaled up (poster.py)
+POSTER_LAYOUT_SIDE: int = 4096
+# Posters are drawn in square tiles of this side, memory use depends on it and on the poster width
+POSTER_TILE_SIDE: int = 1024
+
+# Columnar index of a Telegram export is saved next to it with these suffixes
+CHAT_INDEX_SUFFIX: str = ".wcindex.npz"
+CHAT_INDEX_BLOB_SUFFIX: str = ".wcindex.txt"
 
 
 class ParserSortWords(enum.Enum):
     ASCENDING = 1,   # From least to most used
     DESCENDING = 0,  # From most to least used
 
+
+# Make sure it corresponds to orders of layout engine combo in MainScreenWindow
+class LayoutEngine(enum.IntEnum):
+    WORDCLOUD = 0,  # Stock IntegralOccupancyMap
+    NUMPY_SAT = 1,  # layout_engine.SatOccupancyMap
+
+
+# Where a preview image came from, see app.render_preview()
+class RenderSource(enum.IntEnum):
+    LAYOUT = 0,        # Words were placed from scratch
+    RESTYLED = 1,      # Last layout was reused, only drawn again
+    RENDER_CACHE = 2,  # Rendered earlier with the same inputs, see render_cache.py
+
+
+# How a word's colour is taken from the mask under it (color_sampler.py).
+# Make sure it corresponds to orders of mask colour combo in MainScreenWindow
+class ColorSampling(enum.IntEnum):
+    MEAN = 0,      # Average colour, exact
+    MEDIAN = 1,    # Per channel median of a sample of pixels, ignores thin outlines and specks
+    DOMINANT = 2,  # Most common colour of a sample of pixels
+
+
 # Make sure it corresponds to orders of checkbox in ModalFileOpenDialog
 class FileParsingMode(enum.IntEnum):
     JSON = 0,
     PLAIN_TXT = 1,
+    CORPUS = 2,  # Many JSON and TXT files at once
+
+
+# In corpus mode type of every file is detected by its extension
+CORPUS_FILE_MODES: dict[str, FileParsingMode] = {
+    ".json": FileParsingMode.JSON,
+    ".txt": FileParsingMode.PLAIN_TXT,
+}
@@ -0,0 +1,103 @@
+import multiprocessing as mp
+import os
+from typing import Iterable
+
+from constants import CHAT_INDEX_BLOB_SUFFIX
+from constants import CORPUS_FILE_MODES
+from constants import FileParsingMode
+from freq_cache import FrequencyCache
+from freq_table import FrequencyTable
+from normalizer import TokenNormalizer
+from parallel_count import default_processes_count
+from text_parse_helpers import build_frequency_table
+from text_parse_helpers import parse_signature
+
+
+def corpus_file_mode(file_path: str) -> FileParsingMode | None:
+    """
+    Guess how to parse a file of a corpus by its extension.
+    :return: FileParsingMode or None if the file is not a chat export or a text.
+    """
+    if file_path.endswith(CHAT_INDEX_BLOB_SUFFIX):
+        return None  # Texts of an already indexed chat, counting them again would double the chat
+    return CORPUS_FILE_MODES.get(os.path.splitext(file_path)[1].lower())
+
+
+def list_corpus_files(paths: Iterable[str]) -> list[str]:
+    """
+    Expand selected files and directories into a sorted list of files which can be parsed.
+    Directories are walked recursively, unknown files are skipped.
+    :param paths: Files and/or directories.
+    :return: Sorted list of unique file paths.
+    """
+    found: set[str] = set()
+    for path in paths:
+        if os.path.isdir(path):
+            for dir_path, _, file_names in os.walk(path):
+                found.update(os.path.join(dir_path, name) for name in file_names)
+        else:
+            found.add(path)
+    return sorted(path for path in found if corpus_file_mode(path) is not None)
+
+
+def _build_file_table_job(job: tuple) -> tuple[str, FrequencyTable]:
+    file_path, min_word_size, stopwords, normalizer, max_ngram = job
+    # Worker processes are daemonic and can't start pools, so even big files are counted serially here
+    return file_path, build_frequency_table(file_path, corpus_file_mode(file_path), min_word_size, stopwords,
+                                            normalizer, allow_parallel=False, max_ngram=max_ngram)
+
+
+def build_corpus_table(file_paths: list[str],
+                       min_word_size: int = 0,
+                       stopwords: frozenset[str] | None = None,
+                       cache: FrequencyCache | None = None,
+                       processes: int | None = None,
+                       max_ngram: int = 1,
+                       normalizer: TokenNormalizer | None = None) -> FrequencyTable:
+    """
+    Count words of many chat exports and texts and merge them into one table.
+    Every file is cached on its own with the same key as if it was opened alone,
+    so after one export of a corpus is updated only that export is parsed again.
+    Files missing in the cache are parsed in parallel, one file per job.
+    :param file_paths: Files of the corpus, see list_corpus_files().
+    :param min_word_size: You can pop too short words right at the moment of parsing if you want.
+    :param stopwords: Lowercase words which never get into the table, see stopword_sets.compile_stopwords().
+    :param cache: Cache of per-file results or None.
+    :param processes: Amount of worker processes. Default is CPU count - 1.
+    :param max_ngram: Also count phrases up to this many words, see text_parse_helpers.count_ngrams().
+    :param normalizer: Merges spellings of the same word, see normalizer.TokenNormalizer. None keeps words as they are.
+    :return: FrequencyTable with all words of all files.
+    """
+    def file_params(file_path: str) -> tuple:
+        return parse_signature(corpus_file_mode(file_path), min_word_size, stopwords, normalizer, max_ngram=max_ngram)
+
+    tables: list[FrequencyTable] = []
+    missing: list[str] = []
+    for file_path in file_paths:
+        freq_table = None
+        if cache is not None:
+            freq_table = cache.get(file_path, file_params(file_path))
+        if freq_table is None:
+            missing.append(file_path)
+        else:
+            tables.append(freq_table)
+
+    if len(missing) == 1:
+        # Single file can use all cores by itself
+        file_path = missing[0]
+        parsed = [(file_path, build_frequency_table(file_path, corpus_file_mode(file_path), min_word_size, stopwords,
+                                                    normalizer, max_ngram=max_ngram))]
+    elif missing:
+        processes = min(processes or default_processes_count(), len(missing))
+        jobs = [(file_path, min_word_size, stopwords, normalizer, max_ngram) for file_path in missing]
+        with mp.Pool(processes=processes) as pool:
+            parsed = list(pool.imap_unordered(_build_file_table_job, jobs))
+    else:
+        parsed = []
+
+    for file_path, freq_table in parsed:
+        if cache is not None:
+            cache.put(file_path, file_params(file_path), freq_table)
+        tables.append(freq_table)
+
+    return FrequencyTable.merge(tables)
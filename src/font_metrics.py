@@ -0,0 +1,141 @@
+import contextlib
+from typing import Callable
+
+import wordcloud.wordcloud
+from PIL import ImageDraw
+from PIL import ImageFont
+
+from constants import FONT_METRICS_CACHE_SIZE
+from constants import FONT_OBJECTS_CACHE_SIZE
+
+
+class FontMetricsCache:
+    """
+    Remembers text bounding boxes by (font path, font size, orientation, word), plus loaded fonts by (path, size).
+    WordCloud measures every word at every font size it tries while looking for space, and it loads the font
+    file again for every try. Frames of a video draw the same words with the same font, so after the first frame
+    nearly every measurement is a lookup.
+    Only boxes are pickled, so a warm cache can be handed to worker processes. Their own misses stay theirs.
+    """
+
+    def __init__(self, max_entries: int = FONT_METRICS_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.boxes: dict[tuple, tuple] = {}
+        self._reset_fonts()
+
+    def _reset_fonts(self):
+        self._fonts: dict[tuple, ImageFont.FreeTypeFont] = {}
+        self.lookups = 0
+        self.misses = 0
+
+    # Loaded fonts can't be pickled and are cheap to load again, counters are per process
+    def __getstate__(self) -> dict:
+        return {"max_entries": self.max_entries, "boxes": self.boxes}
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._reset_fonts()
+
+    def __len__(self) -> int:
+        return len(self.boxes)
+
+    def font(self, font_path: str, size: int) -> ImageFont.FreeTypeFont:
+        """
+        :return: Font of this size, loaded once.
+        """
+        key = (font_path, size)
+        font = self._fonts.get(key)
+        if font is None:
+            if len(self._fonts) >= FONT_OBJECTS_CACHE_SIZE:
+                self._fonts.clear()  # Every font holds a FreeType face, don't keep hundreds of sizes around
+            font = self._fonts[key] = ImageFont.truetype(font_path, size)
+        return font
+
+    def text_bbox(self, key: tuple, measure: Callable[[], tuple]) -> tuple:
+        """
+        :param key: Everything the box depends on.
+        :param measure: Measures the text if it's not cached yet.
+        :return: Bounding box.
+        """
+        self.lookups += 1
+        box = self.boxes.get(key)
+        if box is None:
+            self.misses += 1
+            if len(self.boxes) >= self.max_entries:
+                self.boxes.clear()  # Rare, word lists are short. Starting over is simpler than LRU bookkeeping
+            box = self.boxes[key] = measure()
+        return box
+
+    def word_box(self,
+                 draw: ImageDraw.ImageDraw,
+                 font_path: str,
+                 size: int,
+                 orientation: int | None,
+                 word: str) -> tuple[ImageFont.TransposedFont, tuple]:
+        """
+        Measure a word the way WordCloud does, for layouts made outside of it.
+        :return: Font to draw the word with and its bounding box.
+        """
+        font = ImageFont.TransposedFont(self.font(font_path, size), orientation=orientation)
+        key = (font_path, size, orientation, word, (0, 0), "lt")  # Same key as _MeasuringDraw makes
+        return font, self.text_bbox(key, lambda: draw.textbbox((0, 0), word, font=font, anchor="lt"))
+
+    def hit_rate(self) -> float:
+        """
+        :return: Share of measurements that were looked up.
+        """
+        return 1 - self.misses / max(1, self.lookups)
+
+
+class _CachedImageFont:
+    # Stands in for PIL.ImageFont inside wordcloud, see measuring_with()
+    TransposedFont = ImageFont.TransposedFont
+
+    def __init__(self, cache: FontMetricsCache):
+        self.cache = cache
+
+    def truetype(self, font=None, size=10, *args, **kwargs):
+        if args or kwargs or not isinstance(font, str):
+            return ImageFont.truetype(font, size, *args, **kwargs)
+        return self.cache.font(font, size)
+
+
+class _MeasuringDraw(ImageDraw.ImageDraw):
+    # ImageDraw which looks text boxes up instead of laying text out every time
+
+    def __init__(self, im, mode, cache: FontMetricsCache):
+        super().__init__(im, mode)
+        self.cache = cache
+
+    def textbbox(self, xy, text, font=None, anchor=None, *args, **kwargs):
+        if args or kwargs or not isinstance(font, ImageFont.TransposedFont):
+            return super().textbbox(xy, text, font, anchor, *args, **kwargs)
+        key = (font.font.path, font.font.size, font.orientation, text, tuple(xy), anchor)
+        return self.cache.text_bbox(key, lambda: super(_MeasuringDraw, self).textbbox(xy, text, font, anchor))
+
+
+class _CachedImageDraw:
+    # Stands in for PIL.ImageDraw inside wordcloud, see measuring_with()
+
+    def __init__(self, cache: FontMetricsCache):
+        self.cache = cache
+
+    def Draw(self, im, mode=None):  # noqa: N802 -- same name as PIL's
+        return _MeasuringDraw(im, mode, self.cache)
+
+
+@contextlib.contextmanager
+def measuring_with(cache: FontMetricsCache):
+    """
+    Make WordCloud load fonts and measure words through the cache while inside this block.
+    WordCloud has no way to pass fonts in, so the PIL modules it uses are swapped for the time of the block.
+    Only one thread of a process may render at a time, which is how the app works anyway.
+    :param cache: Cache to use.
+    """
+    module = wordcloud.wordcloud
+    original = module.ImageFont, module.ImageDraw
+    module.ImageFont, module.ImageDraw = _CachedImageFont(cache), _CachedImageDraw(cache)
+    try:
+        yield cache
+    finally:
+        module.ImageFont, module.ImageDraw = original
@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import struct
+import zlib
+from collections import OrderedDict
+
+import numpy
+
+from constants import FREQ_CACHE_DIR
+from constants import FREQ_CACHE_MAX_DISK_BYTES
+from constants import FREQ_CACHE_MAX_MEMORY_ENTRIES
+from freq_table import FrequencyTable
+
+# Entry file layout: MAGIC + zlib(words count (u32) + counts (u64 array) + words joined with \0 in UTF-8)
+_ENTRY_MAGIC: bytes = b"WCFF\x02"
+_ENTRY_SUFFIX: str = ".wcf"
+_INDEX_FILE: str = "index.json"
+_INDEX_MAX_ENTRIES: int = 1024
+_HASH_BLOCK_SIZE: int = 1 << 20
+
+
+def hash_file(file_path: str) -> str:
+    """
+    Content hash of a file, read block by block.
+    """
+    file_hash = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as f:
+        while block := f.read(_HASH_BLOCK_SIZE):
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
+
+def encode_table(freq_table: FrequencyTable) -> bytes:
+    """
+    Pack a FrequencyTable into a compact binary blob.
+    """
+    payload = (struct.pack("<I", len(freq_table))
+               + freq_table.counts.astype("<u8").tobytes()
+               + "\0".join(freq_table.words).encode("utf-8"))
+    return _ENTRY_MAGIC + zlib.compress(payload, 1)
+
+
+def decode_table(blob: bytes) -> FrequencyTable:
+    """
+    Unpack a blob created by encode_table().
+    """
+    if not blob.startswith(_ENTRY_MAGIC):
+        raise ValueError("Not a word frequency cache entry")
+    payload = zlib.decompress(blob[len(_ENTRY_MAGIC):])
+    words_count = struct.unpack_from("<I", payload)[0]
+    counts_end = 4 + 8 * words_count
+    counts = numpy.frombuffer(payload, dtype="<u8", count=words_count, offset=4).astype(numpy.int64)
+    words = payload[counts_end:].decode("utf-8").split("\0") if words_count > 0 else []
+    return FrequencyTable(words, counts)
+
+
+class FrequencyCache:
+    """
+    Two-level cache of parsed word frequencies.
+    Entries are keyed by the content hash of the source file plus the parser settings.
+    Content hashes are remembered per (path, size, mtime), so a file is hashed only once until it is changed.
+    Memory layer is a small LRU, disk layer is a directory with one compressed file per entry,
+    least recently used files are removed when the directory grows over the size limit.
+    """
+
+    def __init__(self,
+                 cache_dir: str = FREQ_CACHE_DIR,
+                 max_disk_bytes: int = FREQ_CACHE_MAX_DISK_BYTES,
+                 max_memory_entries: int = FREQ_CACHE_MAX_MEMORY_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_entries = max_memory_entries
+        self._memory: OrderedDict[str, FrequencyTable] = OrderedDict()
+        self._content_hashes: dict[str, str] | None = None  # Loaded lazily from the index file
+
+    def get(self, file_path: str, parse_params: tuple) -> FrequencyTable | None:
+        """
+        Look up parsed words for a file.
+        :param file_path: Path to the source file.
+        :param parse_params: Everything that influences the parsing result (mode, min word length, tokenizer...).
+        :return: FrequencyTable or None if nothing is cached.
+        """
+        key = self._entry_key(file_path, parse_params)
+
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+
+        entry_path = os.path.join(self.cache_dir, key + _ENTRY_SUFFIX)
+        try:
+            with open(entry_path, 'rb') as f:
+                freq_table = decode_table(f.read())
+            os.utime(entry_path)  # Mark as recently used for eviction
+        except (OSError, ValueError, zlib.error, struct.error):
+            return None
+
+        self._remember(key, freq_table)
+        return freq_table
+
+    def put(self, file_path: str, parse_params: tuple, freq_table: FrequencyTable):
+        """
+        Store parsed words for a file in both layers.
+        :param file_path: Path to the source file.
+        :param parse_params: Same tuple as used for get().
+        :param freq_table: Parser result.
+        """
+        key = self._entry_key(file_path, parse_params)
+        self._remember(key, freq_table)
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            entry_path = os.path.join(self.cache_dir, key + _ENTRY_SUFFIX)
+            # Write to a temporary file first, so a crash never leaves half-written entry behind
+            with open(entry_path + ".tmp", 'wb') as f:
+                f.write(encode_table(freq_table))
+            os.replace(entry_path + ".tmp", entry_path)
+            self._evict_disk()
+        except OSError as e:
+            # Cache is just an optimization, never fail parsing because of it
+            print(f"Failed to write word frequency cache: {e}")
+
+    def _remember(self, key: str, freq_table: FrequencyTable):
+        self._memory[key] = freq_table
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _entry_key(self, file_path: str, parse_params: tuple) -> str:
+        content_hash = self._content_hash(file_path)
+        return hashlib.blake2b(f"{content_hash}|{parse_params!r}".encode("utf-8"), digest_size=20).hexdigest()
+
+    def _content_hash(self, file_path: str) -> str:
+        file_stat = os.stat(file_path)
+        stat_key = f"{os.path.abspath(file_path)}|{file_stat.st_size}|{file_stat.st_mtime_ns}"
+
+        if self._content_hashes is None:
+            self._content_hashes = self._load_index()
+        if stat_key in self._content_hashes:
+            return self._content_hashes[stat_key]
+
+        # File is new or was modified, it has to be hashed (only once)
+        content_hash = hash_file(file_path)
+        self._content_hashes[stat_key] = content_hash
+        while len(self._content_hashes) > _INDEX_MAX_ENTRIES:
+            del self._content_hashes[next(iter(self._content_hashes))]
+        self._save_index()
+        return content_hash
+
+    def _load_index(self) -> dict[str, str]:
+        try:
+            with open(os.path.join(self.cache_dir, _INDEX_FILE), 'r', encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(os.path.join(self.cache_dir, _INDEX_FILE), 'w', encoding="utf-8") as f:
+                json.dump(self._content_hashes, f)
+        except OSError as e:
+            print(f"Failed to write word frequency cache index: {e}")
+
+    def _evict_disk(self):
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(_ENTRY_SUFFIX):
+                entry_stat = entry.stat()
+                entries.append((entry_stat.st_mtime, entry_stat.st_size, entry.path))
+
+        total_size = sum(size for _, size, _ in entries)
+        # Oldest first
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_disk_bytes:
+                break
+            os.remove(path)
+            total_size -= size
@@ -0,0 +1,113 @@
+import heapq
+from typing import Iterable, Iterator
+
+import numpy
+
+from constants import ParserSortWords
+
+
+class FrequencyTable:
+    """
+    Word frequencies stored as a list of words plus a parallel NumPy array of counts.
+    Selecting the most (or least) popular words is done with argpartition, so there is no need
+    to sort the whole vocabulary when only max_words of it are going to be drawn.
+    Words with equal frequencies are always ordered alphabetically, so results are deterministic.
+    """
+
+    def __init__(self, words: list[str], counts: numpy.ndarray):
+        if len(words) != len(counts):
+            raise ValueError(f"Got {len(words)} words but {len(counts)} counts")
+        self.words = words
+        self.counts = counts.astype(numpy.int64, copy=False)
+
+    @classmethod
+    def from_dict(cls,
+                  words_stat: dict[str, int],
+                  min_word_size: int = 0,
+                  stopwords: frozenset[str] | None = None) -> "FrequencyTable":
+        """
+        Build a table from a dict (or Counter), dropping too short words and stopwords in the same pass.
+        :param words_stat: Dict with words and their frequencies.
+        :param min_word_size: Words shorter than this are not added.
+        :param stopwords: Lowercase words which are not added, see stopword_sets.compile_stopwords().
+        :return: New FrequencyTable.
+        """
+        if stopwords:
+            words = [word for word in words_stat if len(word) >= min_word_size and word.lower() not in stopwords]
+        elif min_word_size > 0:
+            words = [word for word in words_stat if len(word) >= min_word_size]
+        else:
+            words = list(words_stat)
+        counts = numpy.fromiter((words_stat[word] for word in words), dtype=numpy.int64, count=len(words))
+        return cls(words, counts)
+
+    @classmethod
+    def merge(cls, tables: Iterable["FrequencyTable"]) -> "FrequencyTable":
+        """
+        Sum frequencies of several tables, e.g. of every file of a corpus.
+        :param tables: Tables to merge.
+        :return: New FrequencyTable.
+        """
+        words_stat: dict[str, int] = {}
+        for table in tables:
+            get = words_stat.get
+            for word, count in table.items():
+                words_stat[word] = get(word, 0) + count
+        return cls.from_dict(words_stat)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def items(self) -> Iterator[tuple[str, int]]:
+        return zip(self.words, self.counts.tolist())
+
+    def to_dict(self) -> dict[str, int]:
+        return dict(self.items())
+
+    def top_k(self, k: int) -> list[tuple[str, int]]:
+        """
+        :return: k most popular words, from most to least used.
+        """
+        return self._select(-self.counts, k)
+
+    def bottom_k(self, k: int) -> list[tuple[str, int]]:
+        """
+        :return: k least popular words, from least to most used.
+        """
+        return self._select(self.counts, k)
+
+    def select(self, max_words: int | None, sorting: ParserSortWords) -> list[tuple[str, int]]:
+        """
+        Get words the way parsers return them.
+        :param max_words: How many words are needed. None means all of them.
+        :param sorting: How to sort words -- from most used to least or vice-versa
+        :return: List of tuple pairs ("word": str, frequency: int).
+        """
+        if max_words is None:
+            max_words = len(self)
+        if sorting == ParserSortWords.DESCENDING:
+            return self.top_k(max_words)
+        return self.bottom_k(max_words)
+
+    def _select(self, keys: numpy.ndarray, k: int) -> list[tuple[str, int]]:
+        # Smallest keys win, ties are broken by word
+        k = max(0, min(k, len(self)))
+        if k == 0:
+            return []
+
+        if k == len(self):
+            selected = numpy.arange(len(self))
+        else:
+            threshold = keys[numpy.argpartition(keys, k - 1)[k - 1]]
+            # Everything strictly better than the k-th key is in for sure...
+            selected = numpy.flatnonzero(keys < threshold)
+            # ...and the rest is taken from words sharing the k-th key, alphabetically
+            tied = numpy.flatnonzero(keys == threshold).tolist()
+            tied = heapq.nsmallest(k - len(selected), tied, key=self.words.__getitem__)
+            selected = numpy.concatenate((selected, numpy.array(tied, dtype=selected.dtype)))
+
+        # Sort only the selected part: alphabetically first, then stable by key
+        selected = numpy.array(sorted(selected.tolist(), key=self.words.__getitem__), dtype=numpy.int64)
+        selected = selected[numpy.argsort(keys[selected], kind="stable")]
+
+        return [(self.words[i], count) for i, count in zip(selected.tolist(), self.counts[selected].tolist())]
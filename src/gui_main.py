@@ -3,7 +3,7 @@
 ################################################################################
 ## Form generated from reading UI file 'app.ui'
 ##
-## Created by: Qt User Interface Compiler version 6.8.1
+## Created by: Qt User Interface Compiler version 6.12.0
 ##
 ## WARNING! All changes made in this file will be lost when recompiling UI file!
 ################################################################################
@@ -16,12 +16,12 @@ from PySide6.QtGui import (QAction, QBrush, QColor, QConicalGradient,
     QIcon, QImage, QKeySequence, QLinearGradient,
     QPainter, QPalette, QPixmap, QRadialGradient,
     QTransform)
-from PySide6.QtWidgets import (QApplication, QCheckBox, QComboBox, QDoubleSpinBox,
-    QFrame, QGridLayout, QHBoxLayout, QLabel,
-    QLineEdit, QMainWindow, QMenu, QMenuBar,
-    QProgressBar, QPushButton, QScrollArea, QSizePolicy,
-    QSpacerItem, QSpinBox, QStatusBar, QVBoxLayout,
-    QWidget)
+from PySide6.QtWidgets import (QApplication, QCheckBox, QComboBox, QDateEdit,
+    QDoubleSpinBox, QFrame, QGridLayout, QHBoxLayout,
+    QLabel, QLineEdit, QMainWindow, QMenu,
+    QMenuBar, QProgressBar, QPushButton, QScrollArea,
+    QSizePolicy, QSpacerItem, QSpinBox, QStatusBar,
+    QVBoxLayout, QWidget)
 
 class Ui_MainWindow(object):
     def setupUi(self, MainWindow):
@@ -59,6 +59,11 @@ class Ui_MainWindow(object):
 
         self.verticalLayout_4.addWidget(self.generate_btn)
 
+        self.live_preview_chk = QCheckBox(self.verticalFrame_2)
+        self.live_preview_chk.setObjectName(u"live_preview_chk")
+
+        self.verticalLayout_4.addWidget(self.live_preview_chk)
+
 
         self.horizontalLayout_8.addLayout(self.verticalLayout_4)
 
@@ -68,6 +73,12 @@ class Ui_MainWindow(object):
 
         self.horizontalLayout_8.addWidget(self.save_btn)
 
+        self.save_poster_btn = QPushButton(self.verticalFrame_2)
+        self.save_poster_btn.setObjectName(u"save_poster_btn")
+        self.save_poster_btn.setEnabled(False)
+
+        self.horizontalLayout_8.addWidget(self.save_poster_btn)
+
         self.generate_vid_btn = QPushButton(self.verticalFrame_2)
         self.generate_vid_btn.setObjectName(u"generate_vid_btn")
         self.generate_vid_btn.setEnabled(False)
@@ -142,6 +153,85 @@ class Ui_MainWindow(object):
 
         self.verticalLayout.addLayout(self.horizontalLayout_3)
 
+        self.chat_sender_layout = QHBoxLayout()
+        self.chat_sender_layout.setObjectName(u"chat_sender_layout")
+        self.chat_sender_combo = QComboBox(self.subframe_settings_1)
+        self.chat_sender_combo.setObjectName(u"chat_sender_combo")
+
+        self.chat_sender_layout.addWidget(self.chat_sender_combo)
+
+        self.chat_index_btn = QPushButton(self.subframe_settings_1)
+        self.chat_index_btn.setObjectName(u"chat_index_btn")
+        self.chat_index_btn.setMaximumSize(QSize(50, 16777215))
+
+        self.chat_sender_layout.addWidget(self.chat_index_btn)
+
+
+        self.verticalLayout.addLayout(self.chat_sender_layout)
+
+        self.chat_date_chk = QCheckBox(self.subframe_settings_1)
+        self.chat_date_chk.setObjectName(u"chat_date_chk")
+
+        self.verticalLayout.addWidget(self.chat_date_chk)
+
+        self.chat_date_layout = QHBoxLayout()
+        self.chat_date_layout.setObjectName(u"chat_date_layout")
+        self.chat_date_from_edit = QDateEdit(self.subframe_settings_1)
+        self.chat_date_from_edit.setObjectName(u"chat_date_from_edit")
+        self.chat_date_from_edit.setCalendarPopup(True)
+
+        self.chat_date_layout.addWidget(self.chat_date_from_edit)
+
+        self.chat_date_to_edit = QDateEdit(self.subframe_settings_1)
+        self.chat_date_to_edit.setObjectName(u"chat_date_to_edit")
+        self.chat_date_to_edit.setCalendarPopup(True)
+
+        self.chat_date_layout.addWidget(self.chat_date_to_edit)
+
+
+        self.verticalLayout.addLayout(self.chat_date_layout)
+
+        self.timeline_chk = QCheckBox(self.subframe_settings_1)
+        self.timeline_chk.setObjectName(u"timeline_chk")
+
+        self.verticalLayout.addWidget(self.timeline_chk)
+
+        self.timeline_layout = QHBoxLayout()
+        self.timeline_layout.setObjectName(u"timeline_layout")
+        self.timeline_window_spin = QSpinBox(self.subframe_settings_1)
+        self.timeline_window_spin.setObjectName(u"timeline_window_spin")
+        self.timeline_window_spin.setMinimum(1)
+        self.timeline_window_spin.setMaximum(3650)
+        self.timeline_window_spin.setValue(30)
+
+        self.timeline_layout.addWidget(self.timeline_window_spin)
+
+        self.timeline_step_spin = QSpinBox(self.subframe_settings_1)
+        self.timeline_step_spin.setObjectName(u"timeline_step_spin")
+        self.timeline_step_spin.setMinimum(1)
+        self.timeline_step_spin.setMaximum(3650)
+        self.timeline_step_spin.setValue(1)
+
+        self.timeline_layout.addWidget(self.timeline_step_spin)
+
+
+        self.verticalLayout.addLayout(self.timeline_layout)
+
+        self.coherent_video_chk = QCheckBox(self.subframe_settings_1)
+        self.coherent_video_chk.setObjectName(u"coherent_video_chk")
+
+        self.verticalLayout.addWidget(self.coherent_video_chk)
+
+        self.svg_frames_chk = QCheckBox(self.subframe_settings_1)
+        self.svg_frames_chk.setObjectName(u"svg_frames_chk")
+
+        self.verticalLayout.addWidget(self.svg_frames_chk)
+
+        self.svg_embed_font_chk = QCheckBox(self.subframe_settings_1)
+        self.svg_embed_font_chk.setObjectName(u"svg_embed_font_chk")
+
+        self.verticalLayout.addWidget(self.svg_embed_font_chk)
+
         self.lbl_stop_file = QLabel(self.subframe_settings_1)
         self.lbl_stop_file.setObjectName(u"lbl_stop_file")
         self.lbl_stop_file.setWordWrap(True)
@@ -170,6 +260,46 @@ class Ui_MainWindow(object):
 
         self.verticalLayout.addLayout(self.horizontalLayout_4)
 
+        self.stopword_languages_layout = QHBoxLayout()
+        self.stopword_languages_layout.setObjectName(u"stopword_languages_layout")
+        self.stopwords_en_chk = QCheckBox(self.subframe_settings_1)
+        self.stopwords_en_chk.setObjectName(u"stopwords_en_chk")
+
+        self.stopword_languages_layout.addWidget(self.stopwords_en_chk)
+
+        self.stopwords_ru_chk = QCheckBox(self.subframe_settings_1)
+        self.stopwords_ru_chk.setObjectName(u"stopwords_ru_chk")
+
+        self.stopword_languages_layout.addWidget(self.stopwords_ru_chk)
+
+        self.stopwords_uk_chk = QCheckBox(self.subframe_settings_1)
+        self.stopwords_uk_chk.setObjectName(u"stopwords_uk_chk")
+
+        self.stopword_languages_layout.addWidget(self.stopwords_uk_chk)
+
+
+        self.verticalLayout.addLayout(self.stopword_languages_layout)
+
+        self.normalization_layout = QHBoxLayout()
+        self.normalization_layout.setObjectName(u"normalization_layout")
+        self.casefold_chk = QCheckBox(self.subframe_settings_1)
+        self.casefold_chk.setObjectName(u"casefold_chk")
+
+        self.normalization_layout.addWidget(self.casefold_chk)
+
+        self.nfkc_chk = QCheckBox(self.subframe_settings_1)
+        self.nfkc_chk.setObjectName(u"nfkc_chk")
+
+        self.normalization_layout.addWidget(self.nfkc_chk)
+
+        self.aliases_btn = QPushButton(self.subframe_settings_1)
+        self.aliases_btn.setObjectName(u"aliases_btn")
+
+        self.normalization_layout.addWidget(self.aliases_btn)
+
+
+        self.verticalLayout.addLayout(self.normalization_layout)
+
         self.lbl_png_file = QLabel(self.subframe_settings_1)
         self.lbl_png_file.setObjectName(u"lbl_png_file")
         self.lbl_png_file.setWordWrap(True)
@@ -270,6 +400,19 @@ class Ui_MainWindow(object):
 
         self.verticalLayout_7.addWidget(self.min_word_len_spin)
 
+        self.lbl_max_phrase_len = QLabel(self.subframe_settings_1)
+        self.lbl_max_phrase_len.setObjectName(u"lbl_max_phrase_len")
+
+        self.verticalLayout_7.addWidget(self.lbl_max_phrase_len)
+
+        self.max_phrase_len_spin = QSpinBox(self.subframe_settings_1)
+        self.max_phrase_len_spin.setObjectName(u"max_phrase_len_spin")
+        self.max_phrase_len_spin.setMinimum(1)
+        self.max_phrase_len_spin.setMaximum(3)
+        self.max_phrase_len_spin.setValue(1)
+
+        self.verticalLayout_7.addWidget(self.max_phrase_len_spin)
+
         self.lbl_sort_word = QLabel(self.subframe_settings_1)
         self.lbl_sort_word.setObjectName(u"lbl_sort_word")
 
@@ -392,6 +535,16 @@ class Ui_MainWindow(object):
 
         self.verticalLayout_11.addWidget(self.font_step_spin)
 
+        self.layout_engine_lbl = QLabel(self.frame_4)
+        self.layout_engine_lbl.setObjectName(u"layout_engine_lbl")
+
+        self.verticalLayout_11.addWidget(self.layout_engine_lbl)
+
+        self.layout_engine_combo = QComboBox(self.frame_4)
+        self.layout_engine_combo.setObjectName(u"layout_engine_combo")
+
+        self.verticalLayout_11.addWidget(self.layout_engine_combo)
+
 
         self.verticalLayout_9.addLayout(self.verticalLayout_11)
 
@@ -463,12 +616,30 @@ class Ui_MainWindow(object):
 
         self.verticalLayout_12.addWidget(self.use_mask_colors_chk)
 
+        self.color_sampling_combo = QComboBox(self.frame_4)
+        self.color_sampling_combo.setObjectName(u"color_sampling_combo")
+        self.color_sampling_combo.setEnabled(False)
+
+        self.verticalLayout_12.addWidget(self.color_sampling_combo)
+
         self.color_to_mask_combo = QComboBox(self.frame_4)
         self.color_to_mask_combo.setObjectName(u"color_to_mask_combo")
         self.color_to_mask_combo.setEnabled(False)
 
         self.verticalLayout_12.addWidget(self.color_to_mask_combo)
 
+        self.mask_tolerance_lbl = QLabel(self.frame_4)
+        self.mask_tolerance_lbl.setObjectName(u"mask_tolerance_lbl")
+
+        self.verticalLayout_12.addWidget(self.mask_tolerance_lbl)
+
+        self.mask_tolerance_spin = QSpinBox(self.frame_4)
+        self.mask_tolerance_spin.setObjectName(u"mask_tolerance_spin")
+        self.mask_tolerance_spin.setEnabled(False)
+        self.mask_tolerance_spin.setMaximum(127)
+
+        self.verticalLayout_12.addWidget(self.mask_tolerance_spin)
+
         self.label_18 = QLabel(self.frame_4)
         self.label_18.setObjectName(u"label_18")
 
@@ -553,13 +724,73 @@ class Ui_MainWindow(object):
         self.actionAbout.setText(QCoreApplication.translate("MainWindow", u"About", None))
         self.actionHelp_me.setText(QCoreApplication.translate("MainWindow", u"Help me", None))
         self.generate_btn.setText(QCoreApplication.translate("MainWindow", u"Generate Image", None))
+#if QT_CONFIG(tooltip)
+        self.live_preview_chk.setToolTip(QCoreApplication.translate("MainWindow", u"Regenerate the image whenever settings change", None))
+#endif // QT_CONFIG(tooltip)
+        self.live_preview_chk.setText(QCoreApplication.translate("MainWindow", u"Live preview", None))
         self.save_btn.setText(QCoreApplication.translate("MainWindow", u"Save Image", None))
+#if QT_CONFIG(tooltip)
+        self.save_poster_btn.setToolTip(QCoreApplication.translate("MainWindow", u"Save the words of the preview as a print-size PNG of width * scale by height * scale.\n"
+"It's drawn in tiles, so it fits in memory whatever the size.", None))
+#endif // QT_CONFIG(tooltip)
+        self.save_poster_btn.setText(QCoreApplication.translate("MainWindow", u"Save poster", None))
         self.generate_vid_btn.setText(QCoreApplication.translate("MainWindow", u"Generate Video", None))
         self.preview_lbl.setText(QCoreApplication.translate("MainWindow", u"*Please generate a Wordcloud to see preview*", None))
         self.lbl_json_file.setText(QCoreApplication.translate("MainWindow", u"Select a text file with words:", None))
         self.path_json_btn.setText(QCoreApplication.translate("MainWindow", u"...", None))
+#if QT_CONFIG(tooltip)
+        self.chat_sender_combo.setToolTip(QCoreApplication.translate("MainWindow", u"Build an index of the chat to filter by sender or date", None))
+#endif // QT_CONFIG(tooltip)
+        self.chat_index_btn.setText(QCoreApplication.translate("MainWindow", u"Index", None))
+        self.chat_date_chk.setText(QCoreApplication.translate("MainWindow", u"Only messages between:", None))
+        self.chat_date_from_edit.setDisplayFormat(QCoreApplication.translate("MainWindow", u"yyyy-MM-dd", None))
+        self.chat_date_to_edit.setDisplayFormat(QCoreApplication.translate("MainWindow", u"yyyy-MM-dd", None))
+#if QT_CONFIG(tooltip)
+        self.timeline_chk.setToolTip(QCoreApplication.translate("MainWindow", u"Generate Video makes one frame per time window of the chat.\n"
+"Masks, if loaded, are used frame by frame in a loop.", None))
+#endif // QT_CONFIG(tooltip)
+        self.timeline_chk.setText(QCoreApplication.translate("MainWindow", u"Timeline video, window/step [days]:", None))
+#if QT_CONFIG(tooltip)
+        self.coherent_video_chk.setToolTip(QCoreApplication.translate("MainWindow", u"Every frame starts from where words were on the previous one,\n"
+"so they don't jump around and layout is a lot faster", None))
+#endif // QT_CONFIG(tooltip)
+        self.coherent_video_chk.setText(QCoreApplication.translate("MainWindow", u"Coherent video: words keep their places", None))
+#if QT_CONFIG(tooltip)
+        self.svg_frames_chk.setToolTip(QCoreApplication.translate("MainWindow", u"Frames are written as vector images, nothing is rasterized", None))
+#endif // QT_CONFIG(tooltip)
+        self.svg_frames_chk.setText(QCoreApplication.translate("MainWindow", u"Video frames as SVG", None))
+#if QT_CONFIG(tooltip)
+        self.svg_embed_font_chk.setToolTip(QCoreApplication.translate("MainWindow", u"Only glyphs of the drawn words are embedded.\n"
+"SVG looks the same on machines without the font", None))
+#endif // QT_CONFIG(tooltip)
+        self.svg_embed_font_chk.setText(QCoreApplication.translate("MainWindow", u"Embed font into SVG", None))
         self.lbl_stop_file.setText(QCoreApplication.translate("MainWindow", u"[OPTIONAL] Select a .txt file with stop keywords:", None))
         self.path_stop_btn.setText(QCoreApplication.translate("MainWindow", u"...", None))
+#if QT_CONFIG(tooltip)
+        self.stopwords_en_chk.setToolTip(QCoreApplication.translate("MainWindow", u"Also filter common English words", None))
+#endif // QT_CONFIG(tooltip)
+        self.stopwords_en_chk.setText(QCoreApplication.translate("MainWindow", u"English", None))
+#if QT_CONFIG(tooltip)
+        self.stopwords_ru_chk.setToolTip(QCoreApplication.translate("MainWindow", u"Also filter common Russian words", None))
+#endif // QT_CONFIG(tooltip)
+        self.stopwords_ru_chk.setText(QCoreApplication.translate("MainWindow", u"Russian", None))
+#if QT_CONFIG(tooltip)
+        self.stopwords_uk_chk.setToolTip(QCoreApplication.translate("MainWindow", u"Also filter common Ukrainian words", None))
+#endif // QT_CONFIG(tooltip)
+        self.stopwords_uk_chk.setText(QCoreApplication.translate("MainWindow", u"Ukrainian", None))
+#if QT_CONFIG(tooltip)
+        self.casefold_chk.setToolTip(QCoreApplication.translate("MainWindow", u"\"Hello\" and \"hello\" are the same word", None))
+#endif // QT_CONFIG(tooltip)
+        self.casefold_chk.setText(QCoreApplication.translate("MainWindow", u"Ignore case", None))
+#if QT_CONFIG(tooltip)
+        self.nfkc_chk.setToolTip(QCoreApplication.translate("MainWindow", u"Fullwidth, ligature and other compatibility forms of letters are the same (NFKC)", None))
+#endif // QT_CONFIG(tooltip)
+        self.nfkc_chk.setText(QCoreApplication.translate("MainWindow", u"Unify Unicode", None))
+#if QT_CONFIG(tooltip)
+        self.aliases_btn.setToolTip(QCoreApplication.translate("MainWindow", u"Load a .txt with one word per line followed by its forms:\n"
+"be: am, is, are, was, were", None))
+#endif // QT_CONFIG(tooltip)
+        self.aliases_btn.setText(QCoreApplication.translate("MainWindow", u"Aliases...", None))
 #if QT_CONFIG(tooltip)
         self.lbl_png_file.setToolTip(QCoreApplication.translate("MainWindow", u"Select multiple frames to have a possibility to form a video (woah)", None))
 #endif // QT_CONFIG(tooltip)
@@ -569,6 +800,11 @@ class Ui_MainWindow(object):
         self.lbl_height.setText(QCoreApplication.translate("MainWindow", u"Desired image Height [px]:", None))
         self.lbl_max_word.setText(QCoreApplication.translate("MainWindow", u"Max. amount of words:", None))
         self.lbl_min_word_len.setText(QCoreApplication.translate("MainWindow", u"Min. word length:", None))
+        self.lbl_max_phrase_len.setText(QCoreApplication.translate("MainWindow", u"Max. words in phrase:", None))
+#if QT_CONFIG(tooltip)
+        self.max_phrase_len_spin.setToolTip(QCoreApplication.translate("MainWindow", u"1 draws single words only, 2-3 also draws common phrases.\n"
+"Not used by timeline videos.", None))
+#endif // QT_CONFIG(tooltip)
         self.lbl_sort_word.setText(QCoreApplication.translate("MainWindow", u"Sort words:", None))
         self.lbl_scaling.setText(QCoreApplication.translate("MainWindow", u"Scaling factor:", None))
         self.path_font_lbl.setText(QCoreApplication.translate("MainWindow", u"[OPTIONAL] Font path:", None))
@@ -576,6 +812,11 @@ class Ui_MainWindow(object):
         self.min_font_size_lbl.setText(QCoreApplication.translate("MainWindow", u"Min. font size:", None))
         self.max_font_size_lbl.setText(QCoreApplication.translate("MainWindow", u"Max. font size (0 - Image height):", None))
         self.font_step_lbl.setText(QCoreApplication.translate("MainWindow", u"Font step:", None))
+        self.layout_engine_lbl.setText(QCoreApplication.translate("MainWindow", u"Layout engine:", None))
+#if QT_CONFIG(tooltip)
+        self.layout_engine_combo.setToolTip(QCoreApplication.translate("MainWindow", u"NumPy engine is many times faster with thousands of words or big masks.\n"
+"On big canvases words are packed a bit looser.", None))
+#endif // QT_CONFIG(tooltip)
         self.color_mode_lbl.setText(QCoreApplication.translate("MainWindow", u"Color mode:", None))
         self.color_map_lbl.setText(QCoreApplication.translate("MainWindow", u"Color map:", None))
         self.label_17.setText(QCoreApplication.translate("MainWindow", u"Background color:", None))
@@ -586,6 +827,15 @@ class Ui_MainWindow(object):
         self.use_mask_colors_chk.setToolTip(QCoreApplication.translate("MainWindow", u"<html><head/><body><p>Ignore &quot;Color Map&quot; parameter and try to use colors from mask image.</p></body></html>", None))
 #endif // QT_CONFIG(tooltip)
         self.use_mask_colors_chk.setText(QCoreApplication.translate("MainWindow", u"Use colors from mask", None))
+#if QT_CONFIG(tooltip)
+        self.color_sampling_combo.setToolTip(QCoreApplication.translate("MainWindow", u"How a word's colour is taken from the mask under it.\n"
+"Median and dominant ignore thin outlines and small details", None))
+#endif // QT_CONFIG(tooltip)
+        self.mask_tolerance_lbl.setText(QCoreApplication.translate("MainWindow", u"Mask tolerance:", None))
+#if QT_CONFIG(tooltip)
+        self.mask_tolerance_spin.setToolTip(QCoreApplication.translate("MainWindow", u"How far from pure black or white a colour may be to be masked.\n"
+"Raise it for JPG masks with noisy edges. Transparent parts of PNG masks are always masked", None))
+#endif // QT_CONFIG(tooltip)
         self.label_18.setText(QCoreApplication.translate("MainWindow", u"Mask contour color:", None))
         self.mask_color_edit.setText(QCoreApplication.translate("MainWindow", u"#000000FF", None))
         self.mask_color_pick_btn.setText(QCoreApplication.translate("MainWindow", u"Pick", None))
@@ -0,0 +1,114 @@
+import itertools
+from collections import Counter
+from typing import Iterable
+
+import numpy
+
+from constants import HEAVY_HITTERS_BYTES_PER_WORD
+from freq_table import FrequencyTable
+
+
+def capacity_for_memory(memory_bytes: int) -> int:
+    """
+    How many words SpaceSavingCounter may keep to stay within a memory budget.
+    Counter grows up to twice its capacity between prunes plus one batch of capacity words, so that is taken into
+    account.
+    :param memory_bytes: Memory budget for counting.
+    :return: Capacity for SpaceSavingCounter.
+    """
+    return max(1, memory_bytes // (3 * HEAVY_HITTERS_BYTES_PER_WORD))
+
+
+class SpaceSavingCounter:
+    """
+    Approximate word counter with bounded memory (batched Space-Saving).
+    Words are counted in a plain Counter, which is pruned back to `capacity` most popular words
+    every time it grows over twice that. Words are added in batches of `capacity`, so it never holds more than
+    three times `capacity` words, however long the token lists passed to update() are.
+    Pruned counts are not lost without a trace: the biggest of them becomes `error_bound`, and words which
+    (re)appear later start from it, so counts are never underestimated.
+
+    Guarantees for any word w with true frequency f(w):
+      * count(w) - error(w) <= f(w) <= count(w) for every word that is kept;
+      * every word with f(w) > error_bound is kept.
+    So the true top words are all in the result as long as their frequencies are above error_bound.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("Capacity must be at least 1")
+        self.capacity = capacity
+        self.error_bound: int = 0  # Max count that was ever pruned
+        self._counts: Counter = Counter()
+        # Overestimation of every word added before the last prune. Words missing here came after it.
+        self._errors: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def update(self, words: Iterable[str]):
+        """
+        Count words, like Counter.update(). Pass whole token lists, not single words, the loop is in C then.
+        """
+        if isinstance(words, (list, tuple)) and len(words) <= self.capacity:
+            batches = (words,)  # Messages and sentences, the common case
+        else:
+            # A 4 MB window of text has far more distinct words than a small capacity, prune within it too
+            words = iter(words)
+            batches = iter(lambda: list(itertools.islice(words, self.capacity)), [])
+        for batch in batches:
+            self._counts.update(batch)
+            if len(self._counts) > 2 * self.capacity:
+                self._prune()
+
+    def _settle(self):
+        # Words that came after the last prune may have been pruned before, add the possible loss to them
+        counts, errors = self._counts, self._errors
+        if len(errors) == len(counts):
+            return
+        error_bound = self.error_bound
+        for word in counts.keys() - errors.keys():
+            counts[word] += error_bound
+            errors[word] = error_bound
+
+    def _prune(self):
+        self._settle()
+        words = list(self._counts)
+        counts = numpy.fromiter(self._counts.values(), dtype=numpy.int64, count=len(words))
+        pruned_idx = numpy.argpartition(-counts, self.capacity)[self.capacity:]
+        self.error_bound = max(self.error_bound, int(counts[pruned_idx].max()))
+        for i in pruned_idx.tolist():
+            del self._counts[words[i]]
+            del self._errors[words[i]]
+
+    def items(self):
+        """
+        :return: Kept words and their estimated counts, like dict.items().
+        """
+        self._settle()
+        return self._counts.items()
+
+    def guaranteed_counts(self) -> dict:
+        """
+        :return: Kept words and their guaranteed counts (estimated count minus its error), never above the true ones.
+                 After a prune every newcomer is overestimated by error_bound, so thresholds must use these.
+        """
+        self._settle()
+        errors = self._errors
+        return {word: count - errors[word] for word, count in self._counts.items()}
+
+    def error(self, word: str) -> int:
+        """
+        :return: How much the count of a kept word may be overestimated.
+        """
+        self._settle()
+        return self._errors.get(word, self.error_bound)
+
+    def to_table(self, min_word_size: int = 0, stopwords: frozenset[str] | None = None) -> FrequencyTable:
+        """
+        :param min_word_size: Words shorter than this are not added.
+        :param stopwords: Lowercase words which are not added.
+        :return: FrequencyTable with estimated counts of all kept words.
+        """
+        self._settle()
+        return FrequencyTable.from_dict(self._counts, min_word_size, stopwords)
@@ -0,0 +1,79 @@
+from wordcloud import WordCloud
+
+from color_sampler import SatColorGenerator
+from constants import ColorSampling
+
+# WordCloud attributes which are only used when drawing the image, changing them never moves a word
+STYLE_ATTRIBUTES: tuple[str, ...] = ("background_color", "mode", "scale", "contour_color", "contour_width")
+
+
+class LayoutCache:
+    """
+    Keeps the last generated WordCloud together with everything its word placement (layout_) depends on.
+    If only colours or style change, the same WordCloud is restyled and recolored, which takes milliseconds,
+    instead of placing every word again, which takes seconds on big masks.
+    """
+
+    def __init__(self):
+        self.layout_key: tuple | None = None
+        self.wordcloud: WordCloud | None = None
+        self.color_key: tuple | None = None  # What the current word colours were made with
+        self.image_colors: SatColorGenerator | None = None  # Colour function of the mask the layout was made with
+
+    def lookup(self, layout_key: tuple) -> WordCloud | None:
+        """
+        :param layout_key: Everything placement depends on: words, size, mask, font settings...
+        :return: WordCloud with a ready layout or None if it has to be generated.
+        """
+        if self.wordcloud is not None and layout_key == self.layout_key:
+            return self.wordcloud
+        return None
+
+    def store(self,
+              layout_key: tuple,
+              wordcloud: WordCloud,
+              color_key: tuple,
+              image_colors: SatColorGenerator | None = None):
+        """
+        Remember a freshly generated WordCloud.
+        :param layout_key: Same tuple as used for lookup().
+        :param wordcloud: WordCloud after generate_from_frequencies() (and recolor() if any).
+        :param color_key: What its colours were made with, see restyle().
+        :param image_colors: Mask colour function, so "use mask colors" can be switched on later without a layout.
+        """
+        self.layout_key = layout_key
+        self.wordcloud = wordcloud
+        self.color_key = color_key
+        self.image_colors = image_colors
+
+    def restyle(self,
+                style: dict,
+                colormap: str,
+                use_image_colors: bool,
+                color_sampling: ColorSampling = ColorSampling.MEAN) -> WordCloud:
+        """
+        Apply new style to the cached WordCloud. Words are recolored only if colouring settings changed,
+        so e.g. a new background keeps word colours as they were.
+        :param style: New values of STYLE_ATTRIBUTES.
+        :param colormap: Matplotlib colormap name.
+        :param use_image_colors: Colour words by the mask image instead of the colormap.
+        :param color_sampling: How mask colours are taken, see color_sampler.SatColorGenerator.
+        :return: Restyled WordCloud, call to_image() on it.
+        """
+        wordcloud = self.wordcloud
+        for name in STYLE_ATTRIBUTES:
+            setattr(wordcloud, name, style[name])
+
+        use_image_colors = use_image_colors and self.image_colors is not None
+        color_key = (colormap, use_image_colors, color_sampling if use_image_colors else None)
+        if color_key != self.color_key:
+            wordcloud.colormap = colormap
+            if use_image_colors:
+                # Tables of the mask stay, switching between modes costs just the colouring
+                self.image_colors.sampling = color_sampling
+                wordcloud.recolor(color_func=self.image_colors)
+            else:
+                # Same seed as the layout, so the same settings always give the same colours
+                wordcloud.recolor(random_state=wordcloud.random_state, colormap=colormap)
+            self.color_key = color_key
+        return wordcloud
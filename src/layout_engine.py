@@ -0,0 +1,170 @@
+import contextlib
+import math
+from random import Random
+
+import numpy
+import wordcloud.wordcloud
+
+from constants import LAYOUT_GRID_SIDE
+from constants import LayoutEngine
+
+
+class SatOccupancyMap:
+    """
+    Drop-in replacement of WordCloud's IntegralOccupancyMap. Occupancy is kept on a grid of square blocks
+    (1 px on small canvases, a few px on 4K masks, see LAYOUT_GRID_SIDE) together with its summed-area table.
+    All free positions for a box are found at once with NumPy, and after a word is drawn only the blocks it touched
+    are added to the table instead of recomputing everything below and right of it.
+    Occupancy never goes down during a layout, so a box size that did not fit once is remembered and every box at
+    least as big is rejected without looking. That happens a lot: WordCloud shrinks a word 1 px at a time
+    until it fits.
+    Positions are block-aligned and a block is taken if any of its pixels is, so on big canvases words are packed
+    a tiny bit looser than with the stock engine.
+    """
+
+    def __init__(self, height: int, width: int, mask: numpy.ndarray | None, block: int | None = None):
+        self.height = height
+        self.width = width
+        self.block = block or max(1, math.ceil(max(height, width) / LAYOUT_GRID_SIDE))
+        rows, cols = math.ceil(height / self.block), math.ceil(width / self.block)
+        # Blocks sticking out of the canvas are taken, so boxes never hang over the edge
+        padded = numpy.ones((rows * self.block, cols * self.block), dtype=bool)
+        padded[:height, :width] = mask if mask is not None else False
+        self.occupied: numpy.ndarray = padded.reshape(rows, self.block, cols, self.block).any(axis=(1, 3))
+
+        self.integral = numpy.zeros((rows + 1, cols + 1), dtype=numpy.int32)
+        self.integral[1:, 1:] = self.occupied.cumsum(axis=0, dtype=numpy.int32).cumsum(axis=1)
+        self.failed_sizes: list[tuple[int, int]] = []
+        self.last_size: tuple[int, int] = (0, 0)
+
+    def _free_positions(self, size_x: int, size_y: int) -> tuple[numpy.ndarray, int]:
+        # Flat indices of free block positions for a box and the row length they are counted in
+        rows = math.ceil(size_x / self.block)
+        cols = math.ceil(size_y / self.block)
+        integral = self.integral
+        if (rows >= integral.shape[0] or cols >= integral.shape[1]
+                or any(rows >= failed_rows and cols >= failed_cols for failed_rows, failed_cols in self.failed_sizes)):
+            return numpy.empty(0, dtype=numpy.intp), 1
+
+        # Sum of every rows * cols window at once, zero means free
+        window = integral[rows:, cols:] - integral[:-rows, cols:]
+        window -= integral[rows:, :-cols]
+        window += integral[:-rows, :-cols]
+        free = numpy.flatnonzero(window == 0)
+        if len(free) == 0:
+            self.failed_sizes.append((rows, cols))
+        return free, integral.shape[1] - cols
+
+    def sample_position(self, size_x: int, size_y: int, random_state: Random) -> tuple[int, int] | None:
+        """
+        Same contract as IntegralOccupancyMap: x is a row and y is a column.
+        :return: Random top left corner of a free size_x * size_y box or None if there is no space for it.
+        """
+        free, row_length = self._free_positions(size_x, size_y)
+        if len(free) == 0:
+            return None
+        self.last_size = (size_x, size_y)
+        row, col = divmod(int(free[random_state.randint(0, len(free) - 1)]), row_length)
+        return row * self.block, col * self.block
+
+    def nearest_position(self, pos_x: int, pos_y: int, size_x: int, size_y: int) -> tuple[int, int] | None:
+        """
+        :return: Top left corner of a free size_x * size_y box closest to pos_x, pos_y or None if there is no space.
+        """
+        free, row_length = self._free_positions(size_x, size_y)
+        if len(free) == 0:
+            return None
+        rows, cols = numpy.divmod(free, row_length)
+        nearest = numpy.argmin((rows - pos_x // self.block) ** 2 + (cols - pos_y // self.block) ** 2)
+        self.last_size = (size_x, size_y)
+        return int(rows[nearest]) * self.block, int(cols[nearest]) * self.block
+
+    def try_position(self, pos_x: int, pos_y: int, size_x: int, size_y: int) -> tuple[int, int] | None:
+        """
+        Check one particular spot instead of searching for any.
+        :return: Top left corner moved onto the block grid if the box is free there, else None.
+        """
+        block = self.block
+        row, col = max(0, pos_x) // block, max(0, pos_y) // block
+        rows, cols = math.ceil(size_x / block), math.ceil(size_y / block)
+        integral = self.integral
+        if row + rows >= integral.shape[0] or col + cols >= integral.shape[1]:
+            return None
+        taken = (integral[row + rows, col + cols] - integral[row, col + cols]
+                 - integral[row + rows, col] + integral[row, col])
+        if taken:
+            return None
+        self.last_size = (size_x, size_y)
+        return row * block, col * block
+
+    def touched_area(self, pos_x: int, pos_y: int) -> tuple[int, int, int, int] | None:
+        """
+        Pixels which may have changed after the word of the last found box was drawn at pos_x, pos_y.
+        It's the word's box plus a block around it, in case glyphs stick out of their measured box a bit.
+        Only whole blocks, the partial ones at the edges are taken from the start.
+        :return: Top, left, bottom, right (exclusive) or None if there are no whole blocks there.
+        """
+        block = self.block
+        size_x, size_y = self.last_size
+        row_from = max(0, pos_x // block - 1)
+        row_to = min(self.height // block, (pos_x + size_x) // block + 2)
+        col_from = max(0, pos_y // block - 1)
+        col_to = min(self.width // block, (pos_y + size_y) // block + 2)
+        if row_from >= row_to or col_from >= col_to:
+            return None
+        return row_from * block, col_from * block, row_to * block, col_to * block
+
+    def take(self, region: numpy.ndarray, top: int, left: int):
+        """
+        Mark blocks of a canvas region as taken where it has non-zero pixels.
+        :param region: Pixels of touched_area(), non-zero is taken.
+        :param top: Top of the region.
+        :param left: Left of the region.
+        """
+        block = self.block
+        row_from, col_from = top // block, left // block
+        row_to, col_to = row_from + region.shape[0] // block, col_from + region.shape[1] // block
+        taken = region.reshape(row_to - row_from, block, col_to - col_from, block).any(axis=(1, 3))
+        occupied = self.occupied[row_from:row_to, col_from:col_to]
+        added = taken & ~occupied
+        occupied |= taken
+
+        # Every table cell below and right of a new block grows by the amount of new blocks above-left of it
+        added = added.cumsum(axis=0, dtype=numpy.int32).cumsum(axis=1)
+        integral = self.integral
+        integral[row_from + 1:row_to + 1, col_from + 1:col_to + 1] += added
+        integral[row_to + 1:, col_from + 1:col_to + 1] += added[-1]
+        integral[row_from + 1:row_to + 1, col_to + 1:] += added[:, -1:]
+        integral[row_to + 1:, col_to + 1:] += added[-1, -1]
+
+    def update(self, img_array: numpy.ndarray, pos_x: int, pos_y: int):
+        """
+        Take blocks under the word which was just drawn at pos_x, pos_y.
+        :param img_array: Whole canvas, non-zero is taken.
+        :param pos_x: Row of the word.
+        :param pos_y: Column of the word.
+        """
+        area = self.touched_area(pos_x, pos_y)
+        if area is not None:
+            top, left, bottom, right = area
+            self.take(img_array[top:bottom, left:right], top, left)
+
+
+@contextlib.contextmanager
+def using_layout_engine(engine: LayoutEngine):
+    """
+    Make WordCloud place words with the given engine while inside this block.
+    WordCloud creates its occupancy map by itself, so the class it uses is swapped for the time of the block.
+    Like font_metrics.measuring_with(), only one thread of a process may render at a time.
+    :param engine: LayoutEngine.
+    """
+    if engine == LayoutEngine.WORDCLOUD:
+        yield
+        return
+    module = wordcloud.wordcloud
+    original = module.IntegralOccupancyMap
+    module.IntegralOccupancyMap = SatOccupancyMap
+    try:
+        yield
+    finally:
+        module.IntegralOccupancyMap = original
@@ -0,0 +1,78 @@
+import numpy
+from PIL import Image
+
+from constants import MASK_ALPHA_THRESHOLD
+from constants import MASK_BAND_ROWS
+from constants import MASK_TOLERANCE
+from constants import MASKING_STRATEGIES
+
+
+def load_mask(mask_path: str) -> numpy.ndarray:
+    """
+    Open a mask image as greyscale, RGB or RGBA, whatever is closest to the file.
+    Palette images (most PNG masks saved by editors) become RGBA if they have transparency and RGB otherwise.
+    16-bit greyscale (I;16, or I from older Pillow) is scaled down to 8 bits, converting it would clip it instead.
+    :param mask_path: JPG, PNG or anything else Pillow opens.
+    :return: uint8 array, (height, width) or (height, width, 3 or 4).
+    """
+    with Image.open(mask_path) as image:
+        if image.mode in ("L", "RGB", "RGBA"):
+            return numpy.asarray(image)
+        if image.mode == "I" or image.mode.startswith("I;16"):
+            return (numpy.clip(numpy.asarray(image), 0, 65535) >> 8).astype(numpy.uint8)
+        if image.mode in ("LA", "PA", "La", "RGBa") or "transparency" in image.info:
+            return numpy.asarray(image.convert("RGBA"))
+        return numpy.asarray(image.convert("RGB"))
+
+
+def process_mask(image: numpy.ndarray,
+                 strategy: str,
+                 tolerance: int = MASK_TOLERANCE,
+                 alpha_threshold: int = MASK_ALPHA_THRESHOLD) -> numpy.ndarray:
+    """
+    Turn a mask image into what WordCloud wants: 255 where words must not go, 0 where they may.
+    Every pixel is looked at once, band by band, with no temporary copies of the image. A pixel is black if
+    its brightest channel is at most tolerance and white if its darkest one is at least 255 - tolerance.
+    Pixels with alpha below alpha_threshold are masked out whatever the strategy.
+    The image itself is never changed, so it can still be used for mask colours.
+    :param image: Mask as load_mask() gives it: greyscale, RGB or RGBA uint8.
+    :param strategy: Key of MASKING_STRATEGIES.
+    :param tolerance: 0 matches only pure #000000 and #FFFFFF.
+    :param alpha_threshold: 0 ignores the alpha channel.
+    :return: uint8 array of the same height and width.
+    """
+    mask_black, mask_white = MASKING_STRATEGIES[strategy]
+    pixels = image if image.ndim == 3 else image[:, :, None]
+    height, width, channels = pixels.shape
+    has_alpha = channels in (2, 4)
+    colors = channels - has_alpha
+
+    result = numpy.zeros((height, width), dtype=numpy.uint8)
+    darkest = numpy.empty((MASK_BAND_ROWS, width), dtype=numpy.uint8)
+    brightest = numpy.empty((MASK_BAND_ROWS, width), dtype=numpy.uint8)
+    hits = numpy.empty((MASK_BAND_ROWS, width), dtype=numpy.bool_)
+    for top in range(0, height, MASK_BAND_ROWS):
+        band = pixels[top:top + MASK_BAND_ROWS]
+        rows = band.shape[0]
+        # Comparisons write booleans straight into the result, they are made 0 or 255 at the end
+        flags = result[top:top + rows].view(numpy.bool_)
+        band_hits = hits[:rows]
+        if mask_white:
+            low = band[:, :, 0]
+            if colors == 3:
+                low = numpy.minimum(low, band[:, :, 1], out=darkest[:rows])
+                numpy.minimum(low, band[:, :, 2], out=low)
+            numpy.greater_equal(low, 255 - tolerance, out=band_hits)
+            flags |= band_hits
+        if mask_black:
+            high = band[:, :, 0]
+            if colors == 3:
+                high = numpy.maximum(high, band[:, :, 1], out=brightest[:rows])
+                numpy.maximum(high, band[:, :, 2], out=high)
+            numpy.less_equal(high, tolerance, out=band_hits)
+            flags |= band_hits
+        if has_alpha and alpha_threshold > 0:
+            numpy.less(band[:, :, -1], alpha_threshold, out=band_hits)
+            flags |= band_hits
+    result *= 255
+    return result
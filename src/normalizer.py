@@ -0,0 +1,134 @@
+import hashlib
+import unicodedata
+
+from constants import NORMALIZE_CACHE_SIZE
+
+
+def load_aliases(file_path: str) -> dict[str, str]:
+    """
+    Load a lemma/alias dictionary. One lemma per line followed by its forms: "be: am, is, are, was, were".
+    Empty lines and lines starting with # are skipped.
+    :param file_path: Path to the .txt file.
+    :return: Dict form -> lemma.
+    """
+    aliases: dict[str, str] = {}
+    with open(file_path, 'r', encoding="utf-8") as alias_file:
+        for line in alias_file:
+            line = line.strip()
+            if not line or line.startswith("#") or ":" not in line:
+                continue
+            lemma, forms = line.split(":", 1)
+            for form in forms.split(","):
+                if form.strip():
+                    aliases[form.strip()] = lemma.strip()
+    return aliases
+
+
+class TokenNormalizer:
+    """
+    Turns different spellings of a word into one: Unicode NFKC ("ｈｅｌｌｏ" -> "hello"), case folding
+    ("Hello" -> "hello") and a user dictionary of aliases ("is" -> "be").
+    Meant to be run on distinct words of counted text (see fold_counts()), not on every token: casefolding an ASCII
+    word costs about as much as looking it up in a big dict, so caching per token does not pay off.
+    Results are still memoized in one flat dict, which is simply emptied when it gets full, because the same words
+    are folded again and again by timeline windows. Plain dicts of strings are not tracked by the garbage collector,
+    unlike functools.lru_cache nodes.
+    Chat vocabularies are very Zipfian, so almost every lookup is a hit.
+    """
+
+    def __init__(self,
+                 casefold: bool = True,
+                 nfkc: bool = True,
+                 aliases: dict[str, str] | None = None,
+                 cache_size: int = NORMALIZE_CACHE_SIZE):
+        self.casefold = casefold
+        self.nfkc = nfkc
+        self.cache_size = cache_size
+        # Aliases go through the same steps, so "Is" in the dictionary still matches "is" in a chat
+        self.aliases: dict[str, str] = {}
+        for form, lemma in (aliases or {}).items():
+            self.aliases[self._normalize_spelling(form)] = self._normalize_spelling(lemma)
+        self._reset_cache()
+
+    def _reset_cache(self):
+        self._cache: dict[str, str] = {}
+        self.lookups = 0
+        self.misses = 0
+
+    # Workers get a normalizer with an empty cache of their own, there is no point in pickling it
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        for key in ("_cache", "lookups", "misses"):
+            del state[key]
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._reset_cache()
+
+    @property
+    def is_identity(self) -> bool:
+        return not (self.casefold or self.nfkc or self.aliases)
+
+    def _normalize_spelling(self, word: str) -> str:
+        if self.nfkc and not word.isascii():  # ASCII is NFKC already
+            word = unicodedata.normalize("NFKC", word)
+        if self.casefold:
+            word = word.casefold()
+        return word
+
+    def _normalize_uncached(self, word: str) -> str:
+        word = self._normalize_spelling(word)
+        return self.aliases.get(word, word)
+
+    def _lookup(self, word: str) -> str:
+        normalized = self._normalize_uncached(word)
+        self.misses += 1
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[word] = normalized
+        return normalized
+
+    def normalize(self, word: str) -> str:
+        """
+        :return: Normalized spelling of a word.
+        """
+        self.lookups += 1
+        normalized = self._cache.get(word)
+        return normalized if normalized is not None else self._lookup(word)
+
+    def fold_counts(self, words_stat) -> dict:
+        """
+        Merge counts of words (or phrase tuples) which normalize to the same thing.
+        Folding counted words touches every distinct word once instead of every token.
+        :param words_stat: Dict, Counter or SpaceSavingCounter with counted words or phrase tuples.
+        :return: Dict with normalized words (or tuples) and summed frequencies.
+        """
+        folded: dict = {}
+        get = folded.get
+        normalize = self.normalize
+        cache = self._cache  # Words are looked up inline, a method call per word costs more than the lookup itself
+        lookup = self._lookup
+        words_count = 0
+        for word, count in words_stat.items():
+            if type(word) is str:
+                key = cache[word] if word in cache else lookup(word)
+                words_count += 1
+            else:
+                key = tuple(map(normalize, word))
+            folded[key] = get(key, 0) + count
+        self.lookups += words_count
+        return folded
+
+    def hit_rate(self) -> float:
+        """
+        :return: Share of lookups that did not have to normalize anything.
+        """
+        return 1 - self.misses / max(1, self.lookups)
+
+    def signature(self) -> str:
+        """
+        Short string which changes whenever normalization settings change. Used as a part of cache keys.
+        """
+        aliases_hash = hashlib.blake2b(repr(sorted(self.aliases.items())).encode("utf-8"), digest_size=8).hexdigest()
+        return f"casefold={self.casefold}|nfkc={self.nfkc}|aliases={aliases_hash}"
@@ -0,0 +1,142 @@
+import multiprocessing as mp
+import os
+import re
+from collections import Counter
+from collections import deque
+from itertools import islice
+from typing import Iterable, Iterator
+
+from constants import PARALLEL_CHUNK_SIZE
+from constants import PARALLEL_MESSAGES_PER_JOB
+from tokenizer import tokenize
+
+# ASCII whitespace never appears inside a UTF-8 multibyte sequence, so it is always safe to cut there
+_WHITESPACE_BYTES_RE: re.Pattern = re.compile(rb"[ \t\n\r\f\v]")
+
+
+def default_processes_count() -> int:
+    # Same rule as video generation: leave one core for the GUI
+    return max(1, mp.cpu_count() - 1)
+
+
+def split_text_file(file_path: str, chunk_size: int = PARALLEL_CHUNK_SIZE) -> list[tuple[int, int]]:
+    """
+    Split a text file into byte ranges which end on whitespace, so no word is cut in half.
+    :param file_path: Path to the text file.
+    :param chunk_size: Approximate size of one range in bytes.
+    :return: List of (start, end) byte offsets covering the whole file.
+    """
+    file_size = os.path.getsize(file_path)
+    ranges: list[tuple[int, int]] = []
+
+    with open(file_path, 'rb') as f:
+        start = 0
+        while start < file_size:
+            end = start + chunk_size
+            if end >= file_size:
+                end = file_size
+            else:
+                # Move the border forward until we meet whitespace
+                f.seek(end)
+                while True:
+                    block = f.read(4096)
+                    if not block:
+                        end = file_size
+                        break
+                    found = _WHITESPACE_BYTES_RE.search(block)
+                    if found is not None:
+                        end += found.start()
+                        break
+                    end += len(block)
+            ranges.append((start, end))
+            start = end
+
+    return ranges
+
+
+def count_text_range(file_path: str, start: int, end: int) -> Counter:
+    """
+    Map step for plain text: count words of one byte range of the file.
+    """
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        chunk = f.read(end - start)
+    # No need to care about \r\n vs \n here, both are just separators for the tokenizer
+    return Counter(tokenize(chunk.decode("utf-8")))
+
+
+def _count_text_range_job(job: tuple[str, int, int]) -> Counter:
+    return count_text_range(*job)
+
+
+def count_texts(texts: list[str]) -> Counter:
+    """
+    Map step for JSON chats: count words of one range of messages.
+    """
+    words_stat: Counter = Counter()
+    for text in texts:
+        words_stat.update(tokenize(text))
+    return words_stat
+
+
+def _iter_message_ranges(messages: Iterable[dict], messages_per_job: int) -> Iterator[list[str]]:
+    # Only plain texts are sent to workers, there is no need to pickle whole message dicts
+    texts = (message["text"] for message in messages
+             if (type(message["text"]) is not list) and (message["text"] != ""))
+    while True:
+        job = list(islice(texts, messages_per_job))
+        if not job:
+            return
+        yield job
+
+
+def count_text_file_parallel(file_path: str,
+                             processes: int | None = None,
+                             chunk_size: int = PARALLEL_CHUNK_SIZE) -> Counter:
+    """
+    Count words of a big plain text file on all cores.
+    File is split on whitespace, every range is counted in a separate process and partial counters are merged.
+    Result is identical to counting the whole file at once.
+    :param file_path: Path to the text file.
+    :param processes: Amount of worker processes. Default is CPU count - 1.
+    :param chunk_size: Approximate size of one job in bytes.
+    :return: Counter with words and their frequencies.
+    """
+    words_stat: Counter = Counter()
+    ranges = split_text_file(file_path, chunk_size)
+
+    with mp.Pool(processes=processes or default_processes_count()) as pool:
+        # Merge partial counters as soon as they are ready instead of holding all of them
+        for partial_stat in pool.imap_unordered(_count_text_range_job, [(file_path, start, end)
+                                                                        for start, end in ranges]):
+            words_stat.update(partial_stat)  # Reduce step
+
+    return words_stat
+
+
+def count_json_messages_parallel(messages: Iterable[dict],
+                                 processes: int | None = None,
+                                 messages_per_job: int = PARALLEL_MESSAGES_PER_JOB) -> Counter:
+    """
+    Count words of Telegram messages on all cores.
+    Messages are partitioned into ranges of messages_per_job, every range is counted in a separate process.
+    Messages can be streamed, only a few ranges are kept in memory at once.
+    :param messages: Iterable with message dicts (each one should have "text" field).
+    :param processes: Amount of worker processes. Default is CPU count - 1.
+    :param messages_per_job: How many messages one worker gets at once.
+    :return: Counter with words and their frequencies.
+    """
+    words_stat: Counter = Counter()
+    processes = processes or default_processes_count()
+
+    with mp.Pool(processes=processes) as pool:
+        # Pool.imap() would drain the whole stream into its task queue, so keep only a few jobs in flight
+        pending_jobs = deque()
+        for job in _iter_message_ranges(messages, messages_per_job):
+            pending_jobs.append(pool.apply_async(count_texts, (job,)))
+            if len(pending_jobs) >= 2 * processes:
+                words_stat.update(pending_jobs.popleft().get())  # Reduce step
+        while pending_jobs:
+            words_stat.update(pending_jobs.popleft().get())
+
+    return words_stat
@@ -0,0 +1,238 @@
+import math
+import multiprocessing as mp
+import os
+import shutil
+import struct
+import tempfile
+import zlib
+from typing import Callable
+
+import numpy
+from PIL import Image
+from PIL import ImageDraw
+from PIL import ImageFilter
+from PIL import ImageFont
+from wordcloud import WordCloud
+
+from constants import POSTER_LAYOUT_SIDE
+from constants import POSTER_TILE_SIDE
+from font_metrics import FontMetricsCache
+
+# Per process state of tile workers, see _init_tile_worker()
+_tile_job: dict = {}
+_tile_fonts: FontMetricsCache | None = None
+
+
+def working_size(width: int, height: int, scale: float) -> tuple[int, int, float]:
+    """
+    Canvas a poster is laid out on. It's the canvas itself if it's small enough, otherwise it's shrunk
+    and the scale grows by as much, so the poster is still about width * scale by height * scale.
+    :param width: Canvas (or mask) width.
+    :param height: Canvas (or mask) height.
+    :param scale: WordCloud scale.
+    :return: Layout width, height and scale.
+    """
+    factor = min(1.0, POSTER_LAYOUT_SIDE / max(width, height))
+    return max(1, round(width * factor)), max(1, round(height * factor)), scale / factor
+
+
+def output_size(width: int, height: int, scale: float) -> tuple[int, int]:
+    """
+    :return: Size of a WordCloud image with this canvas and scale, same as WordCloud.to_image() makes.
+    """
+    return int(width * scale), int(height * scale)
+
+
+def poster_tiles(width: int, height: int, tile_side: int = POSTER_TILE_SIDE) -> list[tuple[int, int, int, int]]:
+    """
+    :return: Left, top, right, bottom of every tile of a poster, row by row.
+    """
+    return [(left, top, min(left + tile_side, width), min(top + tile_side, height))
+            for top in range(0, height, tile_side)
+            for left in range(0, width, tile_side)]
+
+
+class PngStreamWriter:
+    """
+    Writes a PNG a band of rows at a time, so a poster never has to be in memory at once.
+    PIL can only save whole images. Rows are filtered with the PNG "Sub" filter, which suits big flat areas.
+    """
+
+    _COLOR_TYPES: dict[str, tuple[int, int]] = {"L": (0, 1), "RGB": (2, 3), "RGBA": (6, 4)}
+
+    def __init__(self, path: str, width: int, height: int, mode: str):
+        if mode not in self._COLOR_TYPES:
+            raise ValueError(f"Can't write {mode} images to PNG")
+        color_type, self.channels = self._COLOR_TYPES[mode]
+        self.width = width
+        self.rows_left = height
+        self._compressor = zlib.compressobj(6)
+        self._file = open(path, 'wb')
+        self._file.write(b"\x89PNG\r\n\x1a\n")
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0))
+
+    def __enter__(self) -> "PngStreamWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()  # Half-written PNG is of no use anyway
+
+    def _chunk(self, kind: bytes, data: bytes):
+        self._file.write(struct.pack(">I", len(data)))
+        self._file.write(kind)
+        self._file.write(data)
+        self._file.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind))))
+
+    def write_rows(self, rows: numpy.ndarray):
+        """
+        :param rows: Next rows of the image, height * width * channels of uint8.
+        """
+        flat = rows.reshape(rows.shape[0], self.width * self.channels)
+        channels = self.channels
+        # Filter type byte, then every byte minus the same byte of the pixel to the left (wrapping around)
+        filtered = numpy.empty((flat.shape[0], flat.shape[1] + 1), dtype=numpy.uint8)
+        filtered[:, 0] = 1
+        filtered[:, 1:channels + 1] = flat[:, :channels]
+        numpy.subtract(flat[:, channels:], flat[:, :-channels], out=filtered[:, channels + 1:])
+        data = self._compressor.compress(filtered.data)
+        if data:
+            self._chunk(b"IDAT", data)
+        self.rows_left -= rows.shape[0]
+
+    def close(self):
+        if self.rows_left != 0:
+            raise ValueError(f"PNG is {self.rows_left} rows short")
+        self._chunk(b"IDAT", self._compressor.flush())
+        self._chunk(b"IEND", b"")
+        self._file.close()
+
+
+def _init_tile_worker(job: dict):
+    # Everything tiles share is sent to every worker once, not with every tile
+    global _tile_job, _tile_fonts
+    _tile_job = job
+    _tile_fonts = FontMetricsCache()
+
+
+def _draw_tile_contour(tile_image: Image.Image, tile: tuple[int, int, int, int]) -> Image.Image:
+    # Same steps as WordCloud._draw_contour(), only on the part of the upscaled mask around the tile.
+    # The part is bigger by the blur reach, so the contour looks the same as on a whole image
+    job = _tile_job
+    mask: numpy.ndarray = job["contour_mask"]
+    out_width, out_height = job["size"]
+    left, top, right, bottom = tile
+    radius = job["contour_width"] / 10
+    pad = 4 * math.ceil(radius) + 4
+    pad_left, pad_top = max(0, left - pad), max(0, top - pad)
+    pad_right, pad_bottom = min(out_width, right + pad), min(out_height, bottom + pad)
+
+    scale_x, scale_y = mask.shape[1] / out_width, mask.shape[0] / out_height
+    contour = Image.fromarray(mask).resize((pad_right - pad_left, pad_bottom - pad_top),
+                                           box=(pad_left * scale_x, pad_top * scale_y,
+                                                pad_right * scale_x, pad_bottom * scale_y))
+    contour = numpy.array(contour.filter(ImageFilter.FIND_EDGES))
+    # Poster borders are never drawn, same as in WordCloud. Inner borders of the part are just filter artifacts
+    contour[[0, -1], :] = 0
+    contour[:, [0, -1]] = 0
+    contour = Image.fromarray(contour).filter(ImageFilter.GaussianBlur(radius=radius))
+    contour = numpy.array(contour)[top - pad_top:bottom - pad_top, left - pad_left:right - pad_left] > 0
+
+    pixels = numpy.array(tile_image)
+    pixels[contour] = job["contour_pixel"]
+    return Image.fromarray(pixels, mode=tile_image.mode)
+
+
+def _render_tile(tile: tuple[int, int, int, int]) -> str:
+    # Draws all words overlapping the tile and saves it next to the other tiles
+    job = _tile_job
+    left, top, right, bottom = tile
+    tile_image = Image.new(job["mode"], (right - left, bottom - top), job["background_color"])
+    draw = ImageDraw.Draw(tile_image)
+    for word, font_size, (pos_x, pos_y), orientation, color, (box_left, box_top, box_right, box_bottom) \
+            in job["words"]:
+        if box_right <= left or box_left >= right or box_bottom <= top or box_top >= bottom:
+            continue
+        font = ImageFont.TransposedFont(_tile_fonts.font(job["font_path"], font_size), orientation=orientation)
+        draw.text((pos_x - left, pos_y - top), word, fill=color, font=font)
+
+    if job["contour_mask"] is not None:
+        tile_image = _draw_tile_contour(tile_image, tile)
+
+    tile_path = os.path.join(job["tile_dir"], f"{top}_{left}.png")
+    tile_image.save(tile_path, compress_level=1)  # Read back once and removed, size doesn't matter
+    return tile_path
+
+
+def render_poster(wordcloud: WordCloud,
+                  poster_path: str,
+                  processes: int,
+                  on_tile: Callable[[], None] | None = None,
+                  tile_side: int = POSTER_TILE_SIDE):
+    """
+    Draw a generated WordCloud like to_image() does, but tile by tile in parallel, writing tiles to disk
+    as they are done and stitching them into a PNG band by band. Memory use depends on the tile size
+    and the poster width, not on the poster area.
+    :param wordcloud: WordCloud after generate_from_frequencies() (and recolor() if any), scale sets the poster size.
+    :param poster_path: PNG file to write.
+    :param processes: How many tiles are drawn at once.
+    :param on_tile: Called after every tile is stitched, e.g. to move a progress bar.
+    :param tile_side: Tile side in pixels.
+    """
+    if wordcloud.mask is not None:
+        height, width = wordcloud.mask.shape[:2]
+    else:
+        height, width = wordcloud.height, wordcloud.width
+    scale = wordcloud.scale
+    out_width, out_height = output_size(width, height, scale)
+
+    # Boxes of scaled words are measured once, so every tile draws only the words it overlaps
+    fonts = FontMetricsCache()
+    draw = ImageDraw.Draw(Image.new("L", (1, 1)))
+    words = []
+    for (word, _), font_size, position, orientation, color in wordcloud.layout_:
+        font_size = int(font_size * scale)
+        pos = (int(position[1] * scale), int(position[0] * scale))
+        font = ImageFont.TransposedFont(fonts.font(wordcloud.font_path, font_size), orientation=orientation)
+        box_left, box_top, box_right, box_bottom = draw.textbbox(pos, word, font=font)
+        # A couple of pixels around, antialiasing may reach outside of the measured box
+        words.append((word, font_size, pos, orientation, color,
+                      (box_left - 2, box_top - 2, box_right + 2, box_bottom + 2)))
+
+    contour_mask = None
+    contour_pixel = None
+    if wordcloud.mask is not None and wordcloud.contour_width != 0:
+        contour_mask = (wordcloud._get_bolean_mask(wordcloud.mask) * 255).astype(numpy.uint8)
+        contour_pixel = numpy.array(Image.new(wordcloud.mode, (1, 1), wordcloud.contour_color))[0, 0]
+
+    tiles = poster_tiles(out_width, out_height, tile_side)
+    tiles_per_row = math.ceil(out_width / tile_side)
+    tile_dir = tempfile.mkdtemp(prefix="poster_tiles_", dir=os.path.dirname(os.path.abspath(poster_path)))
+    job = {"words": words,
+           "font_path": wordcloud.font_path,
+           "mode": wordcloud.mode,
+           "background_color": wordcloud.background_color,
+           "size": (out_width, out_height),
+           "contour_mask": contour_mask,
+           "contour_width": wordcloud.contour_width,
+           "contour_pixel": contour_pixel,
+           "tile_dir": tile_dir}
+
+    try:
+        with mp.Pool(processes=processes, initializer=_init_tile_worker, initargs=(job,)) as pool, \
+                PngStreamWriter(poster_path, out_width, out_height, wordcloud.mode) as writer:
+            band = []
+            # In order, so a band is stitched as soon as its last tile is ready
+            for tile_path in pool.imap(_render_tile, tiles):
+                band.append(tile_path)
+                if len(band) == tiles_per_row:
+                    writer.write_rows(numpy.concatenate([numpy.array(Image.open(path)) for path in band], axis=1))
+                    for path in band:
+                        os.remove(path)
+                        if on_tile is not None:
+                            on_tile()
+                    band = []
+    finally:
+        shutil.rmtree(tile_dir, ignore_errors=True)
@@ -0,0 +1,163 @@
+import hashlib
+import io
+import os
+import pickle
+from collections import OrderedDict
+
+import numpy
+from PIL import Image
+
+from constants import RENDER_CACHE_DIR
+from constants import RENDER_CACHE_MAX_DISK_BYTES
+from constants import RENDER_CACHE_MAX_MEMORY_BYTES
+
+_ENTRY_SUFFIX: str = ".wcr"
+_LAYOUT_ITEM_BYTES: int = 200  # Rough size of one layout_ item in memory
+
+
+def render_key(frequencies: dict[str, int], arrays: tuple[numpy.ndarray | None, ...], params: dict) -> str:
+    """
+    Content hash of everything a rendered image depends on.
+    :param frequencies: Words and their frequencies, in the order WordCloud gets them (ties are kept in that order).
+    :param arrays: Masks after process_mask_colors() and anything else image-like, None if not used.
+    :param params: Every WordCloud parameter, seed and output format. Values must have a stable repr().
+    :return: Hex key for RenderCache.
+    """
+    key_hash = hashlib.blake2b(digest_size=20)
+    key_hash.update(repr(tuple(frequencies.items())).encode("utf-8"))
+    for array in arrays:
+        if array is None:
+            key_hash.update(b"none")
+        else:
+            key_hash.update(f"{array.shape}|{array.dtype}".encode("utf-8"))
+            key_hash.update(numpy.ascontiguousarray(array).data)
+    key_hash.update(repr(sorted(params.items())).encode("utf-8"))
+    return key_hash.hexdigest()
+
+
+def font_signature(font_path: str | None) -> tuple | None:
+    """
+    :return: Font file and its modification time, so a replaced font is not served from the cache.
+    """
+    if font_path is None:
+        return None  # WordCloud's bundled font
+    try:
+        return font_path, os.stat(font_path).st_mtime_ns
+    except OSError:
+        return font_path, None
+
+
+def encode_image(image: Image.Image, image_format: str = "PNG") -> bytes:
+    """
+    :param image: Rendered image.
+    :param image_format: PIL format name, see file_format().
+    :return: Encoded image, exactly what image.save() would write to a file.
+    """
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+def file_format(file_name: str) -> str:
+    """
+    :return: PIL format name of an image file name, PNG if the extension is unknown.
+    """
+    return Image.registered_extensions().get(os.path.splitext(file_name)[1].lower(), "PNG")
+
+
+class RenderCache:
+    """
+    Two-level cache of rendered images together with their word layouts (WordCloud.layout_).
+    Image may be left out if it's cheap to draw the layout again, like for previews.
+    Keys come from render_key(), so they change whenever anything that is drawn changes.
+    Memory layer is an LRU limited by size, disk layer is a directory with one file per entry, written on put()
+    so that other processes (video workers) and later runs see it. Least recently used files are removed
+    when the directory grows over the size limit.
+    """
+
+    def __init__(self,
+                 cache_dir: str = RENDER_CACHE_DIR,
+                 max_disk_bytes: int = RENDER_CACHE_MAX_DISK_BYTES,
+                 max_memory_bytes: int = RENDER_CACHE_MAX_MEMORY_BYTES):
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self._memory: OrderedDict[str, tuple[bytes | None, list]] = OrderedDict()
+        self._memory_bytes = 0
+
+    def get(self, key: str) -> tuple[bytes | None, list] | None:
+        """
+        :param key: See render_key().
+        :return: Encoded image (None if it was not stored) and layout_ or None if nothing is cached.
+        """
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+
+        entry_path = os.path.join(self.cache_dir, key + _ENTRY_SUFFIX)
+        try:
+            with open(entry_path, 'rb') as f:
+                entry = pickle.load(f)
+            os.utime(entry_path)  # Mark as recently used for eviction
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            return None
+
+        self._remember(key, entry)
+        return entry
+
+    def put(self, key: str, encoded_image: bytes | None, layout: list):
+        """
+        Store a rendered image in both layers.
+        :param key: See render_key().
+        :param encoded_image: Image file contents, see encode_image(). None to store just the layout.
+        :param layout: WordCloud.layout_ of the image.
+        """
+        entry = (encoded_image, layout)
+        self._remember(key, entry)
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            entry_path = os.path.join(self.cache_dir, key + _ENTRY_SUFFIX)
+            # Unique temporary name, video workers write to the same directory at once
+            temp_path = f"{entry_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, entry_path)
+            self._evict_disk()
+        except OSError as e:
+            # Cache is just an optimization, never fail rendering because of it
+            print(f"Failed to write render cache: {e}")
+
+    def _remember(self, key: str, entry: tuple[bytes | None, list]):
+        if key in self._memory:
+            return
+        self._memory[key] = entry
+        self._memory_bytes += self._entry_size(entry)
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= self._entry_size(evicted)  # It's still on disk
+
+    @staticmethod
+    def _entry_size(entry: tuple[bytes | None, list]) -> int:
+        return len(entry[0] or b"") + _LAYOUT_ITEM_BYTES * len(entry[1])
+
+    def _evict_disk(self):
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(_ENTRY_SUFFIX):
+                try:
+                    entry_stat = entry.stat()
+                except OSError:
+                    continue  # Removed by another worker meanwhile
+                entries.append((entry_stat.st_mtime, entry_stat.st_size, entry.path))
+
+        total_size = sum(size for _, size, _ in entries)
+        # Oldest first
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total_size -= size
@@ -0,0 +1,85 @@
+import functools
+import hashlib
+import os
+import sys
+from typing import Iterable
+
+from constants import BUILTIN_STOPWORD_LANGUAGES
+from constants import TOKEN_GLUE_CHARS
+
+# Stopwords go through the same apostrophe gluing as tokens do, so "don't" in a list matches "dont" in a chat
+_GLUE_TABLE: dict[int, None] = str.maketrans("", "", TOKEN_GLUE_CHARS)
+
+# path -> (size, mtime, compiled set). File is only re-read when it changes on disk.
+_FILE_CACHE: dict[str, tuple[int, int, frozenset[str]]] = {}
+
+
+def _stopwords_dir() -> str:
+    # Same logic as BASE_DIR_PTH in app.py, PyInstaller unpacks data files into _MEIPASS
+    if getattr(sys, 'frozen', False):
+        # noinspection PyUnresolvedReferences,PyProtectedMember
+        return os.path.join(sys._MEIPASS, "stopwords")
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "stopwords")
+
+
+def compile_words(words: Iterable[str]) -> frozenset[str]:
+    """
+    Normalize raw stopwords (strip, lowercase, glue apostrophes) into a frozen set.
+    """
+    return frozenset(word.strip().lower().translate(_GLUE_TABLE) for word in words if word.strip())
+
+
+def load_stopwords_file(file_path: str) -> frozenset[str]:
+    """
+    Load a .txt file with one stopword per line. Result is cached until the file's size or mtime changes.
+    :param file_path: Path to the stopwords file.
+    :return: Frozen set of lowercase stopwords.
+    """
+    file_stat = os.stat(file_path)
+    cached = _FILE_CACHE.get(file_path)
+    if cached is not None and cached[:2] == (file_stat.st_size, file_stat.st_mtime_ns):
+        return cached[2]
+
+    with open(file_path, 'r', encoding="utf-8") as stopword_file:
+        stopwords = compile_words(stopword_file.read().splitlines())
+    _FILE_CACHE[file_path] = (file_stat.st_size, file_stat.st_mtime_ns, stopwords)
+    return stopwords
+
+
+@functools.cache
+def builtin_stopwords(language: str) -> frozenset[str]:
+    """
+    Built-in stopwords of a language. Loaded on first use only.
+    :param language: Language code, one of BUILTIN_STOPWORD_LANGUAGES values.
+    :return: Frozen set of lowercase stopwords.
+    """
+    if language not in BUILTIN_STOPWORD_LANGUAGES.values():
+        raise ValueError(f"No built-in stopwords for language '{language}'")
+    if language == "en":
+        # WordCloud already ships a good English list
+        from wordcloud import STOPWORDS
+        return compile_words(STOPWORDS)
+    with open(os.path.join(_stopwords_dir(), f"{language}.txt"), 'r', encoding="utf-8") as stopword_file:
+        return compile_words(stopword_file.read().splitlines())
+
+
+def compile_stopwords(file_path: str | None = None, languages: Iterable[str] = ()) -> frozenset[str]:
+    """
+    Merge the user's stopwords file with built-in language sets.
+    :param file_path: Path to the stopwords file or None.
+    :param languages: Language codes of built-in sets to add.
+    :return: Frozen set of lowercase stopwords (empty if there is nothing to filter).
+    """
+    stopwords: frozenset[str] = frozenset()
+    if file_path is not None:
+        stopwords |= load_stopwords_file(file_path)
+    for language in languages:
+        stopwords |= builtin_stopwords(language)
+    return stopwords
+
+
+def stopwords_signature(stopwords: frozenset[str]) -> str:
+    """
+    Short stable hash of a stopword set, used as a part of cache keys.
+    """
+    return hashlib.blake2b("\n".join(sorted(stopwords)).encode("utf-8"), digest_size=16).hexdigest()
@@ -0,0 +1,170 @@
+import codecs
+import json
+import mmap
+import os
+import re
+from typing import Iterator, TextIO
+
+from constants import JSON_STREAM_CHUNK_SIZE
+from constants import TEXT_WINDOW_SIZE
+from tokenizer import tokenize
+
+# Shared decoder, raw_decode() lets us parse one value at a given offset of a buffer
+_JSON_DECODER = json.JSONDecoder()
+_JSON_WHITESPACE = " \t\n\r"
+# Last character that can't be inside of a word, fallback border of text windows without whitespace
+_LAST_NON_WORD = re.compile(r"\W\w*\Z")
+
+
+class _JsonStreamBuffer:
+    """
+    Small sliding text buffer over a JSON file.
+    Only the part which was not consumed yet is kept in memory, so the buffer size is bounded by
+    chunk size plus the biggest single value we have to decode (usually one message).
+    """
+
+    def __init__(self, text_file: TextIO, chunk_size: int):
+        self.text_file = text_file
+        self.chunk_size = chunk_size
+        self.buf: str = ""
+        self.pos: int = 0
+        self.eof: bool = False
+
+    def fill(self) -> bool:
+        """
+        Read one more chunk from the file and drop already consumed part of the buffer.
+        :return: False if there is nothing more to read.
+        """
+        if self.eof:
+            return False
+        chunk = self.text_file.read(self.chunk_size)
+        if chunk == "":
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """
+        Skip whitespaces and return next significant character without consuming it.
+        :return: Next character or empty string on EOF.
+        """
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _JSON_WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf) or not self.fill():
+                break
+        return self.buf[self.pos] if self.pos < len(self.buf) else ""
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Malformed JSON chat: expected '{char}', got '{found}'")
+        self.pos += 1
+
+    def decode_value(self):
+        """
+        Decode one complete JSON value starting at the current position.
+        If the value is cut by the chunk border, more data is read and decoding is retried.
+        :return: Decoded Python object.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _JSON_DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # Numbers can be "successfully" decoded from a truncated buffer (123|45), so be careful
+            if end == len(self.buf) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_messages(file_path: str, chunk_size: int = JSON_STREAM_CHUNK_SIZE) -> Iterator[dict]:
+    """
+    Stream messages of a Telegram JSON chat export one by one without loading the whole file.
+    Only the top level object is walked, values of other keys are decoded and thrown away,
+    elements of the "messages" array are yielded as soon as they are decoded.
+    :param file_path: Path to the Telegram chat export (result.json).
+    :param chunk_size: How many characters to read from the file at once.
+    :return: Generator of message dicts, same as json.loads(...)["messages"] would contain.
+    """
+    with open(file_path, 'r', encoding="utf-8") as json_file:
+        stream = _JsonStreamBuffer(json_file, chunk_size)
+        stream.expect("{")
+        if stream.peek() == "}":
+            raise ValueError("Malformed JSON chat: no \"messages\" array found")
+
+        while True:
+            key = stream.decode_value()
+            stream.expect(":")
+            if key == "messages":
+                break
+            stream.decode_value()  # Not interested, skip it
+            if stream.peek() != ",":
+                raise ValueError("Malformed JSON chat: no \"messages\" array found")
+            stream.pos += 1
+
+        stream.expect("[")
+        if stream.peek() == "]":
+            return
+
+        while True:
+            yield stream.decode_value()
+            separator = stream.peek()
+            if separator == "]":
+                break
+            if separator != ",":
+                raise ValueError(f"Malformed JSON chat: expected ',' or ']' in messages, got '{separator}'")
+            stream.pos += 1
+
+
+def iter_text_windows(file_path: str, window_size: int = TEXT_WINDOW_SIZE) -> Iterator[str]:
+    """
+    Memory-map a UTF-8 text file and decode it window by window.
+    Multibyte characters cut by the window border are finished by the incremental decoder,
+    words cut by the border are carried over to the next window, so every yielded piece ends on whitespace.
+    Text without whitespace (minified dumps, CJK) can't be carried over forever: once the carry is longer than
+    a window, the piece ends after the last non-word character, or right at the window end if there is none.
+    :param file_path: Path to the text file.
+    :param window_size: How many bytes to decode at once. Peak memory is bounded by this, not by the file size.
+    :return: Generator of decoded text pieces.
+    """
+    if os.path.getsize(file_path) == 0:
+        return  # mmap can't map empty files
+
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    carry: str = ""
+
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        for offset in range(0, len(mapped), window_size):
+            text = carry + decoder.decode(mapped[offset:offset + window_size])
+            # Find the last separator, everything after it may be a beginning of a word from the next window
+            cut = max(text.rfind(" "), text.rfind("\n"), text.rfind("\t"), text.rfind("\r"))
+            if cut == -1:
+                if len(text) <= window_size:
+                    carry = text
+                    continue
+                non_word = _LAST_NON_WORD.search(text)
+                cut = non_word.start() if non_word is not None else len(text) - 1
+            carry = text[cut + 1:]
+            yield text[:cut + 1]
+
+    carry += decoder.decode(b"", final=True)
+    if carry:
+        yield carry
+
+
+def iter_text_tokens(file_path: str, window_size: int = TEXT_WINDOW_SIZE) -> Iterator[str]:
+    """
+    Stream words of a plain text file. Only one window worth of text and words is in memory at once.
+    :param file_path: Path to the text file.
+    :param window_size: How many bytes to decode at once.
+    :return: Generator of words.
+    """
+    for text in iter_text_windows(file_path, window_size):
+        yield from tokenize(text)
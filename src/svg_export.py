@@ -0,0 +1,101 @@
+import base64
+import io
+from xml.sax import saxutils
+
+from PIL import Image
+from wordcloud import WordCloud
+
+from font_metrics import FontMetricsCache
+
+
+def svg_color(color) -> str:
+    """
+    :param color: Colour as WordCloud gets it: CSS string or an RGB(A) tuple like MainScreenWindow.hex_color_to_tuple().
+    :return: CSS colour.
+    """
+    if isinstance(color, str):
+        return color
+    if len(color) == 4:
+        return f"rgba({color[0]},{color[1]},{color[2]},{color[3] / 255:.3g})"
+    return f"rgb({color[0]},{color[1]},{color[2]})"
+
+
+def _font_face(font_path: str, text: str, font_family: str, font_weight: str, font_style: str) -> str:
+    # Only glyphs of the drawn words, as WOFF, so an embedded font is usually a few kilobytes
+    import fontTools.subset  # Only needed here, like WordCloud.to_svg() does it
+
+    options = fontTools.subset.Options(hinting=False, desubroutinize=True, ignore_missing_glyphs=True)
+    font = fontTools.subset.load_font(font_path, options)
+    subsetter = fontTools.subset.Subsetter(options)
+    subsetter.populate(text=text)
+    subsetter.subset(font)
+    font.flavor = "woff"
+    buffer = io.BytesIO()
+    font.save(buffer)
+    data = base64.b64encode(buffer.getbuffer()).decode("ascii")
+    return (f'<style>@font-face{{font-family:{font_family};font-weight:{font_weight};font-style:{font_style};'
+            f'src:url("data:application/font-woff;charset=utf-8;base64,{data}")format("woff");}}</style>\n')
+
+
+def save_svg(wordcloud: WordCloud,
+             svg_path: str,
+             embed_font: bool = False,
+             font_metrics: FontMetricsCache | None = None):
+    """
+    Write the layout of a WordCloud as SVG, word by word straight to the file.
+    Same geometry as WordCloud.to_svg(), which builds the whole document in memory and loads the font again
+    for every word. Nothing is rasterized, so it's as cheap at poster size as at preview size.
+    Mask contour is not drawn, same as in to_svg().
+    :param wordcloud: WordCloud after generate_from_frequencies() (and recolor() if any).
+    :param svg_path: File to write.
+    :param embed_font: Embed the glyphs of the drawn words, so the file looks the same without the font installed.
+    :param font_metrics: Loaded fonts to reuse, e.g. the ones the layout was measured with.
+    """
+    if font_metrics is None:
+        font_metrics = FontMetricsCache()
+    if wordcloud.mask is not None:
+        height, width = wordcloud.mask.shape[:2]
+    else:
+        height, width = wordcloud.height, wordcloud.width
+    scale = wordcloud.scale
+    layout = wordcloud.layout_
+
+    max_font_size = wordcloud.max_font_size or max((font_size for _, font_size, *_ in layout), default=1)
+    raw_font_family, raw_font_style = font_metrics.font(wordcloud.font_path, int(max_font_size * scale)).getname()
+    font_family = repr(raw_font_family)
+    raw_font_style = raw_font_style.lower()
+    font_weight = "bold" if "bold" in raw_font_style else "normal"
+    if "italic" in raw_font_style:
+        font_style = "italic"
+    elif "oblique" in raw_font_style:
+        font_style = "oblique"
+    else:
+        font_style = "normal"
+
+    with open(svg_path, 'w', encoding="utf-8") as f:
+        f.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{width * scale}" height="{height * scale}">\n')
+        if embed_font:
+            characters = "".join({character for (word, _), *_ in layout for character in word})
+            f.write(_font_face(wordcloud.font_path, characters, font_family, font_weight, font_style))
+        f.write(f"<style>text{{font-family:{font_family};font-weight:{font_weight};font-style:{font_style};}}"
+                f"</style>\n")
+        if wordcloud.background_color is not None:
+            f.write(f'<rect width="100%" height="100%" style="fill:{svg_color(wordcloud.background_color)}"/>\n')
+
+        for (word, _), font_size, (pos_y, pos_x), orientation, color in layout:
+            pos_x *= scale
+            pos_y *= scale
+            font = font_metrics.font(wordcloud.font_path, int(font_size * scale))
+            (size_x, _), (offset_x, offset_y) = font.font.getsize(word)
+            ascent, _ = font.getmetrics()
+            # Text box relative to the baseline origin SVG places text at
+            min_x = -offset_x
+            max_x = size_x - offset_x
+            max_y = ascent - offset_y
+            if orientation == Image.ROTATE_90:
+                transform = f"translate({pos_x + max_y},{pos_y + max_x - min_x}) rotate(-90)"
+            else:
+                transform = f"translate({pos_x + min_x},{pos_y + max_y})"
+            f.write(f'<text transform="{transform}" font-size="{font_size * scale}" style="fill:{svg_color(color)}">'
+                    f'{saxutils.escape(word)}</text>\n')
+        f.write("</svg>\n")
@@ -1,104 +1,485 @@
-import json
+import os
+from collections import Counter
+from typing import Iterable, Iterator
 import numpy
-from wordcloud import WordCloud, STOPWORDS
-from constants import FORBIDDEN_CHAR
 from constants import ParserSortWords
+from constants import FileParsingMode
+from constants import PARALLEL_PARSE_MIN_FILE_SIZE
+from constants import PHRASE_BREAK_PATTERN
+from constants import NGRAM_MAX_SIZE
+from constants import NGRAM_MEMORY_LIMIT
+from constants import NGRAM_MIN_COUNT
+from freq_table import FrequencyTable
+from stream_readers import iter_json_messages
+from stream_readers import iter_text_tokens
+from stream_readers import iter_text_windows
+from heavy_hitters import SpaceSavingCounter
+from heavy_hitters import capacity_for_memory
+from parallel_count import count_json_messages_parallel
+from parallel_count import count_text_file_parallel
+from normalizer import TokenNormalizer
+from stopword_sets import stopwords_signature
+from tokenizer import tokenize
+from tokenizer import tokenize_phrases
+from tokenizer import tokenizer_signature
+
+
+def sort_and_filter_words(words_stat: dict[str, int],
+                          min_word_size: int,
+                          sorting: ParserSortWords,
+                          max_words: int | None = None,
+                          stopwords: frozenset[str] | None = None,
+                          normalizer: TokenNormalizer | None = None) -> list[tuple[str, int]]:
+    """
+    Turn a dict with word frequencies into a sorted list and drop too short words.
+    Equal frequencies are ordered alphabetically, so the result does not depend on the order words were counted in
+    (parallel counting merges partial results in random order).
+    :param words_stat: Dict with words and their frequencies.
+    :param min_word_size: Words shorter than this are removed.
+    :param sorting: How to sort words -- from most used to least or vice-versa
+    :param max_words: Only this many words are selected (without sorting the rest). None means all of them.
+    :param stopwords: Lowercase words which are removed, see stopword_sets.compile_stopwords().
+    :param normalizer: Merges spellings of the same word, see normalizer.TokenNormalizer. None keeps words as they are.
+    :return: List of tuple pairs ("word": str, frequency: int).
+    """
+
+    return table_from_counts(words_stat, min_word_size, stopwords, normalizer).select(max_words, sorting)
+
+
+def table_from_counts(words_stat: dict[str, int] | SpaceSavingCounter,
+                      min_word_size: int = 0,
+                      stopwords: frozenset[str] | None = None,
+                      normalizer: TokenNormalizer | None = None) -> FrequencyTable:
+    """
+    Build a FrequencyTable from any of our counters, normalizing words first if needed.
+    Normalization happens once per distinct word here, not once per token.
+    :param words_stat: Dict, Counter or SpaceSavingCounter with words and their frequencies.
+    :param min_word_size: Words shorter than this are removed.
+    :param stopwords: Lowercase words which are removed, see stopword_sets.compile_stopwords().
+    :param normalizer: Merges spellings of the same word, see normalizer.TokenNormalizer. None keeps words as they are.
+    :return: New FrequencyTable.
+    """
+
+    if normalizer is not None:
+        words_stat = normalizer.fold_counts(words_stat)
+    elif isinstance(words_stat, SpaceSavingCounter):
+        words_stat = dict(words_stat.items())
+    return FrequencyTable.from_dict(words_stat, min_word_size, stopwords)
+
+
+def count_json_messages(messages: Iterable[dict],
+                        words_stat: Counter | SpaceSavingCounter | None = None) -> Counter | SpaceSavingCounter:
+    """
+    Count words of Telegram messages. Messages can come from a list or be streamed one by one.
+    :param messages: Iterable with message dicts (each one should have "text" field).
+    :param words_stat: Counter to count into, e.g. SpaceSavingCounter for bounded memory. New Counter by default.
+    :return: The counter with words and their frequencies.
+    """
+
+    if words_stat is None:
+        words_stat = Counter()
+
+    for message in messages:  # Parse thru all messages
+        # Omit empty messages and nested messages (like links etc.)
+        if (type(message["text"]) is not list) and (message["text"] != ""):
+            # Counter.update() counts the whole token list in C
+            words_stat.update(tokenize(message["text"]))
+
+    return words_stat
 
 
 def parse_json_chat(json_data: dict,
                     min_word_size: int = 0,
-                    sorting: ParserSortWords = ParserSortWords.DESCENDING) -> list[tuple[str, int]]:
+                    sorting: ParserSortWords = ParserSortWords.DESCENDING,
+                    stopwords: frozenset[str] | None = None,
+                    normalizer: TokenNormalizer | None = None) -> list[tuple[str, int]]:
     """
     This function is used to parse JSON chat and return a list with tuples.
     Every tuple contain a string with a word plus its frequency.
     :param json_data: JSON chat loaded in Python. Please use json.loads() before this function.
     :param min_word_size: You can pop too short words right at the moment of parsing if you want.
     :param sorting: How to sort words -- from most used to least or vice-versa
+    :param stopwords: Lowercase words which are never counted, see stopword_sets.compile_stopwords().
+    :param normalizer: Merges spellings of the same word, see normalizer.TokenNormalizer. None keeps words as they are.
     :return: List of tuple pairs ("word": str, frequency: int).
     """
 
-    words_stat: dict[str, int] = {}
+    words_stat = count_json_messages(json_data["messages"])
+
+    return sort_and_filter_words(words_stat, min_word_size, sorting, stopwords=stopwords, normalizer=normalizer)
+
+
+def parse_json_chat_stream(file_path: str,
+                           min_word_size: int = 0,
+                           sorting: ParserSortWords = ParserSortWords.DESCENDING,
+                           stopwords: frozenset[str] | None = None,
+                           normalizer: TokenNormalizer | None = None) -> list[tuple[str, int]]:
+    """
+    Same as parse_json_chat, but messages are streamed from the file one at a time.
+    Whole export is never loaded into memory, so it is the way to go for multi-GB chats.
+    :param file_path: Path to the Telegram chat export.
+    :param min_word_size: You can pop too short words right at the moment of parsing if you want.
+    :param sorting: How to sort words -- from most used to least or vice-versa
+    :param stopwords: Lowercase words which are never counted, see stopword_sets.compile_stopwords().
+    :param normalizer: Merges spellings of the same word, see normalizer.TokenNormalizer. None keeps words as they are.
+    :return: List of tuple pairs ("word": str, frequency: int).
+    """
+
+    words_stat = count_json_messages(iter_json_messages(file_path))
+
+    return sort_and_filter_words(words_stat, min_word_size, sorting, stopwords=stopwords, normalizer=normalizer)
+
+
+def parse_json_chat_parallel(file_path: str,
+                             min_word_size: int = 0,
+                             sorting: ParserSortWords = ParserSortWords.DESCENDING,
+                             stopwords: frozenset[str] | None = None,
+                             normalizer: TokenNormalizer | None = None,
+                             processes: int | None = None) -> list[tuple[str, int]]:
+    """
+    Same as parse_json_chat_stream, but ranges of messages are counted on all CPU cores.
+    :param file_path: Path to the Telegram chat export.
+    :param min_word_size: You can pop too short words right at the moment of parsing if you want.
+    :param sorting: How to sort words -- from most used to least or vice-versa
+    :param stopwords: Lowercase words which are never counted, see stopword_sets.compile_stopwords().
+    :param normalizer: Merges spellings of the same word, see normalizer.TokenNormalizer. None keeps words as they are.
+    :param processes: Amount of worker processes. Default is CPU count - 1.
+    :return: List of tuple pairs ("word": str, frequency: int).
+    """
+
+    words_stat = count_json_messages_parallel(iter_json_messages(file_path), processes=processes)
+
+    return sort_and_filter_words(words_stat, min_word_size, sorting, stopwords=stopwords, normalizer=normalizer)
 
-    for message in json_data["messages"]:  # Parse thru all messages
-        # Omit empty messages and nested messages (like links etc.)
-        if (type(message["text"]) is not list) and (message["text"] != ""):
-            # Split messages by whitespaces.
-            for word in message["text"].split(" "):
-                # Replace all forbidden characters.
-                # TODO see TODO in FORBIDDEN_CHAR variable. Fix it.
-                for char in FORBIDDEN_CHAR:
-                    word = word.replace(char, "")
-                # Create new dict. entry or add frequency to it.
-                if word not in words_stat:
-                    words_stat[word] = 1
-                else:
-                    words_stat[word] += 1
-
-    # Sort words in DESC or ASC order
-    should_reverse: bool = False
-    if sorting == ParserSortWords.DESCENDING:
-        should_reverse = True
-
-    words_list_clean: list[tuple[str, int]] = sorted(words_stat.items(), key=lambda x: x[1], reverse=should_reverse)
-
-    # Original dictionary is not needed anymore
-    del words_stat
-
-    # TODO STILL SUCKS HARD but a bit better now. Still needs rework.
-    # Evil hack to remove too short words. Prob could be optimized
-    list_words_to_remove: list = []
-    # First create a list with words to remove
-    for word in words_list_clean:
-        if len(word[0]) < min_word_size:
-            list_words_to_remove.append(word)
-
-    # Then remove those words
-    for i in range(0, len(list_words_to_remove)):
-        words_list_clean.remove(list_words_to_remove[i])
-
-    return words_list_clean
 
 def parse_plain_text(plain_text: str,
                      min_word_size: int,
-                     sorting: ParserSortWords = ParserSortWords.DESCENDING) -> list[tuple[str, int]]:
-
-    # TODO THIS SHOULD BE FIXED AS WELL AS JSON FUNCTION
-    # I just don't have enough time so I copied JSON function to have at least somehow working PoC
-    # Should be reworked
-
-    words_stat: dict[str, int] = {}
-
-    for word in plain_text.split(" "):
-        # Replace all forbidden characters.
-        # TODO see TODO in FORBIDDEN_CHAR variable. Fix it.
-        for char in FORBIDDEN_CHAR:
-            word = word.replace(char, "")
-        # Create new dict. entry or add frequency to it.
-        if word not in words_stat:
-            words_stat[word] = 1
-        else:
-            words_stat[word] += 1
-
-    # Sort words in DESC or ASC order
-    should_reverse: bool = False
-    if sorting == ParserSortWords.DESCENDING:
-        should_reverse = True
-
-    words_list_clean: list[tuple[str, int]] = sorted(words_stat.items(), key=lambda x: x[1], reverse=should_reverse)
-
-    # Original dictionary is not needed anymore
-    del words_stat
-
-    # TODO STILL SUCKS HARD but a bit better now. Still needs rework.
-    # Evil hack to remove too short words. Prob could be optimized
-    list_words_to_remove: list = []
-    # First create a list with words to remove
-    for word in words_list_clean:
-        if len(word[0]) < min_word_size:
-            list_words_to_remove.append(word)
-
-    # Then remove those words
-    for i in range(0, len(list_words_to_remove)):
-        words_list_clean.remove(list_words_to_remove[i])
-
-    return words_list_clean
+                     sorting: ParserSortWords = ParserSortWords.DESCENDING,
+                     stopwords: frozenset[str] | None = None,
+                     normalizer: TokenNormalizer | None = None) -> list[tuple[str, int]]:
+    """
+    Parse plain text and return a list with tuples, same as parse_json_chat does.
+    :param plain_text: Text loaded in Python.
+    :param min_word_size: You can pop too short words right at the moment of parsing if you want.
+    :param sorting: How to sort words -- from most used to least or vice-versa
+    :param stopwords: Lowercase words which are never counted, see stopword_sets.compile_stopwords().
+    :param normalizer: Merges spellings of the same word, see normalizer.TokenNormalizer. None keeps words as they are.
+    :return: List of tuple pairs ("word": str, frequency: int).
+    """
+
+    words_stat: Counter[str] = Counter(tokenize(plain_text))
+
+    return sort_and_filter_words(words_stat, min_word_size, sorting, stopwords=stopwords, normalizer=normalizer)
+
+
+def parse_plain_text_file(file_path: str,
+                          min_word_size: int,
+                          sorting: ParserSortWords = ParserSortWords.DESCENDING,
+                          stopwords: frozenset[str] | None = None,
+                          normalizer: TokenNormalizer | None = None) -> list[tuple[str, int]]:
+    """
+    Same as parse_plain_text, but the file is memory-mapped and decoded in small windows.
+    Neither the whole text nor the list of all its words is ever held in memory.
+    :param file_path: Path to the text file.
+    :param min_word_size: You can pop too short words right at the moment of parsing if you want.
+    :param sorting: How to sort words -- from most used to least or vice-versa
+    :param stopwords: Lowercase words which are never counted, see stopword_sets.compile_stopwords().
+    :param normalizer: Merges spellings of the same word, see normalizer.TokenNormalizer. None keeps words as they are.
+    :return: List of tuple pairs ("word": str, frequency: int).
+    """
+
+    words_stat: Counter[str] = Counter(iter_text_tokens(file_path))
+
+    return sort_and_filter_words(words_stat, min_word_size, sorting, stopwords=stopwords, normalizer=normalizer)
+
+
+def parse_plain_text_parallel(file_path: str,
+                              min_word_size: int,
+                              sorting: ParserSortWords = ParserSortWords.DESCENDING,
+                              stopwords: frozenset[str] | None = None,
+                              normalizer: TokenNormalizer | None = None,
+                              processes: int | None = None) -> list[tuple[str, int]]:
+    """
+    Same as parse_plain_text, but the file is split into chunks which are counted on all CPU cores.
+    Result is identical to the serial parser.
+    :param file_path: Path to the text file.
+    :param min_word_size: You can pop too short words right at the moment of parsing if you want.
+    :param sorting: How to sort words -- from most used to least or vice-versa
+    :param stopwords: Lowercase words which are never counted, see stopword_sets.compile_stopwords().
+    :param normalizer: Merges spellings of the same word, see normalizer.TokenNormalizer. None keeps words as they are.
+    :param processes: Amount of worker processes. Default is CPU count - 1.
+    :return: List of tuple pairs ("word": str, frequency: int).
+    """
+
+    words_stat = count_text_file_parallel(file_path, processes=processes)
+
+    return sort_and_filter_words(words_stat, min_word_size, sorting, stopwords=stopwords, normalizer=normalizer)
+
+
+def count_file(file_path: str, parsing_mode: FileParsingMode, allow_parallel: bool = True) -> dict[str, int]:
+    """
+    Count words of a JSON chat or a plain text file with the best suited parser.
+    Big files are counted on all cores, for small ones process pool start-up is not worth it.
+    :param file_path: Path to the Telegram chat export or a text file.
+    :param parsing_mode: Type of the file.
+    :param allow_parallel: Set to False inside of pool workers, they can't start pools of their own.
+    :return: Dict with words and their frequencies.
+    """
+
+    use_parallel: bool = allow_parallel and os.path.getsize(file_path) >= PARALLEL_PARSE_MIN_FILE_SIZE
+
+    if parsing_mode == FileParsingMode.JSON:
+        # Stream messages from JSON file, whole export is never loaded into RAM
+        if use_parallel:
+            return count_json_messages_parallel(iter_json_messages(file_path))
+        return count_json_messages(iter_json_messages(file_path))
+
+    if use_parallel:
+        return count_text_file_parallel(file_path)
+    # File is memory-mapped and decoded window by window, never read as a whole
+    return Counter(iter_text_tokens(file_path))
+
+
+def count_file_approximate(file_path: str, parsing_mode: FileParsingMode, memory_limit: int) -> SpaceSavingCounter:
+    """
+    Count words of a file in bounded memory. Only the most popular words are kept and their counts may be
+    overestimated by at most SpaceSavingCounter.error_bound, see heavy_hitters.py for exact guarantees.
+    It is always serial: merging approximate counts of several workers would only widen the error.
+    :param file_path: Path to the Telegram chat export or a text file.
+    :param parsing_mode: Type of the file.
+    :param memory_limit: Memory budget for counting in bytes.
+    :return: SpaceSavingCounter with counted words.
+    """
+
+    words_stat = SpaceSavingCounter(capacity_for_memory(memory_limit))
+
+    if parsing_mode == FileParsingMode.JSON:
+        return count_json_messages(iter_json_messages(file_path), words_stat)
+
+    for text in iter_text_windows(file_path):
+        words_stat.update(tokenize(text))
+    return words_stat
+
+
+def iter_message_texts(messages: Iterable[dict]) -> Iterator[str]:
+    """
+    Texts of Telegram messages, skipping empty and nested ones the same way count_json_messages() does.
+    """
+    for message in messages:
+        if (type(message["text"]) is not list) and (message["text"] != ""):
+            yield message["text"]
+
+
+def count_ngrams(texts: Iterable[str],
+                 max_n: int = NGRAM_MAX_SIZE,
+                 words_stat: Counter | SpaceSavingCounter | None = None,
+                 phrases_stat: SpaceSavingCounter | None = None) -> tuple[Counter | SpaceSavingCounter,
+                                                                          SpaceSavingCounter]:
+    """
+    Count single words and phrases of 2..max_n words in one pass.
+    Phrases are rolling tuples of neighbouring words, they never cross sentence ends or message borders.
+    Phrase vocabulary is huge and mostly seen once, so phrases are counted approximately and rare ones are pruned
+    as we go (SpaceSavingCounter). Single words are counted exactly unless an approximate counter is passed.
+    :param texts: Messages, lines or windows of a text file.
+    :param max_n: Longest phrase, in words.
+    :param words_stat: Counter for single words. New Counter by default.
+    :param phrases_stat: Counter for phrase tuples. By default, it is limited to NGRAM_MEMORY_LIMIT.
+    :return: Tuple (single words counter, phrases counter).
+    """
+
+    if words_stat is None:
+        words_stat = Counter()
+    if phrases_stat is None:
+        phrases_stat = SpaceSavingCounter(capacity_for_memory(NGRAM_MEMORY_LIMIT))
+
+    for text in texts:
+        for words in tokenize_phrases(text):
+            words_stat.update(words)
+            for n in range(2, min(max_n, len(words)) + 1):
+                # Rolling n-tuples: (w0, w1), (w1, w2), ... built in C by zip()
+                phrases_stat.update(zip(*(words[i:] for i in range(n))))
+
+    return words_stat, phrases_stat
+
+
+def build_phrase_table(words_stat: dict[str, int] | SpaceSavingCounter,
+                       phrases_stat: SpaceSavingCounter,
+                       min_word_size: int = 0,
+                       stopwords: frozenset[str] | None = None,
+                       normalizer: TokenNormalizer | None = None,
+                       min_phrase_count: int = NGRAM_MIN_COUNT) -> FrequencyTable:
+    """
+    Put single words and phrases into one FrequencyTable, phrases become space-joined strings.
+    A phrase is dropped if it starts or ends with a too short word or a stopword ("of the", "it is").
+    Occurrences of a kept phrase are taken away from the shorter phrases and words inside of it.
+    :param words_stat: Single words counted by count_ngrams().
+    :param phrases_stat: Phrases counted by count_ngrams().
+    :param min_word_size: Words shorter than this are removed, phrases can't start or end with them.
+    :param stopwords: Lowercase words which are removed, phrases can't start or end with them.
+    :param normalizer: Merges spellings of the same word, see normalizer.TokenNormalizer. None keeps words as they are.
+    :param min_phrase_count: Phrases with a lower guaranteed count are dropped.
+    :return: FrequencyTable with words and phrases, phrases weighted by their guaranteed counts.
+    """
+
+    stopwords = stopwords or frozenset()
+    words_table = table_from_counts(words_stat, min_word_size, stopwords, normalizer)
+    # Estimated counts of phrases which came after a prune include error_bound, a phrase seen once would pass
+    # any threshold then. Only what was surely seen counts
+    phrases_counts = phrases_stat.guaranteed_counts()
+    if normalizer is not None:
+        phrases_counts = normalizer.fold_counts(phrases_counts)
+
+    candidates: dict[tuple[str, ...], int] = {}
+    for phrase, count in phrases_counts.items():
+        if count < min_phrase_count:
+            continue
+        first, last = phrase[0], phrase[-1]
+        if (len(first) < min_word_size or len(last) < min_word_size
+                or first.lower() in stopwords or last.lower() in stopwords):
+            continue
+        candidates[phrase] = count
+
+    # Every time "inside joke here" is said, "inside joke", "joke here", "inside", "joke" and "here" are counted too.
+    # Longest phrases go first and take their occurrences away from everything inside of them, so the cloud
+    # doesn't get all six at the same weight. Overlaps are counted once per occurrence, so "ha ha ha" takes
+    # two "ha ha" and three "ha", just as many as it added.
+    word_index: dict[str, int] = {word: i for i, word in enumerate(words_table.words)}
+    word_counts = words_table.counts.copy()
+    phrases: dict[str, int] = {}
+    for phrase in sorted(candidates, key=len, reverse=True):
+        count = candidates[phrase]
+        if count < min_phrase_count:
+            continue  # Mostly said as a part of a longer phrase
+        phrases[" ".join(phrase)] = count
+        for size in range(2, len(phrase)):
+            for start in range(len(phrase) - size + 1):
+                part = phrase[start:start + size]
+                if part in candidates:
+                    candidates[part] = max(0, candidates[part] - count)
+        for word in phrase:
+            i = word_index.get(word)
+            if i is not None:
+                word_counts[i] = max(0, word_counts[i] - count)
+
+    kept = numpy.flatnonzero(word_counts > 0)
+    words = [words_table.words[i] for i in kept.tolist()]
+    return FrequencyTable(words + list(phrases),
+                          numpy.concatenate((word_counts[kept],
+                                             numpy.fromiter(phrases.values(), dtype=numpy.int64, count=len(phrases)))))
+
+
+def count_file_ngrams(file_path: str,
+                      parsing_mode: FileParsingMode,
+                      max_n: int = NGRAM_MAX_SIZE,
+                      memory_limit: int | None = None) -> tuple[Counter | SpaceSavingCounter, SpaceSavingCounter]:
+    """
+    Count words and phrases of a JSON chat or a plain text file, see count_ngrams(). Always serial.
+    :param file_path: Path to the Telegram chat export or a text file.
+    :param parsing_mode: Type of the file.
+    :param max_n: Longest phrase, in words.
+    :param memory_limit: If set, single words are counted approximately too and phrases get this limit instead
+                         of NGRAM_MEMORY_LIMIT.
+    :return: Tuple (single words counter, phrases counter).
+    """
+
+    words_stat = None
+    phrases_stat = None
+    if memory_limit is not None:
+        words_stat = SpaceSavingCounter(capacity_for_memory(memory_limit))
+        phrases_stat = SpaceSavingCounter(capacity_for_memory(memory_limit))
+
+    if parsing_mode == FileParsingMode.JSON:
+        texts = iter_message_texts(iter_json_messages(file_path))
+    else:
+        texts = iter_text_windows(file_path)
+    return count_ngrams(texts, max_n, words_stat, phrases_stat)
+
+
+def build_frequency_table(file_path: str,
+                          parsing_mode: FileParsingMode,
+                          min_word_size: int = 0,
+                          stopwords: frozenset[str] | None = None,
+                          normalizer: TokenNormalizer | None = None,
+                          allow_parallel: bool = True,
+                          memory_limit: int | None = None,
+                          max_ngram: int = 1) -> FrequencyTable:
+    """
+    Count words of a file into a FrequencyTable. Words can then be selected from it with any sorting or max amount.
+    :param file_path: Path to the Telegram chat export or a text file.
+    :param parsing_mode: Type of the file.
+    :param min_word_size: You can pop too short words right at the moment of parsing if you want.
+    :param stopwords: Lowercase words which never get into the table, see stopword_sets.compile_stopwords().
+    :param normalizer: Merges spellings of the same word, see normalizer.TokenNormalizer. None keeps words as they are.
+    :param allow_parallel: Set to False inside of pool workers, see count_file().
+    :param memory_limit: Count approximately within this many bytes, see count_file_approximate().
+                         Least popular words are lost then, so it only makes sense with most popular sorting.
+                         None means exact counting.
+    :param max_ngram: Also count phrases up to this many words, see count_ngrams(). 1 means single words only.
+    :return: FrequencyTable with all words of the file.
+    """
+
+    if max_ngram > 1:
+        words_stat, phrases_stat = count_file_ngrams(file_path, parsing_mode, max_ngram, memory_limit)
+        return build_phrase_table(words_stat, phrases_stat, min_word_size, stopwords, normalizer=normalizer)
+
+    if memory_limit is not None:
+        words_stat = count_file_approximate(file_path, parsing_mode, memory_limit)
+    else:
+        words_stat = count_file(file_path, parsing_mode, allow_parallel)
+    return table_from_counts(words_stat, min_word_size, stopwords, normalizer)
+
+
+def parse_signature(parsing_mode: FileParsingMode,
+                    min_word_size: int,
+                    stopwords: frozenset[str] | None = None,
+                    normalizer: TokenNormalizer | None = None,
+                    memory_limit: int | None = None,
+                    max_ngram: int = 1) -> tuple:
+    """
+    Everything that influences build_frequency_table() result, used as a part of FrequencyCache keys.
+    :param parsing_mode: Type of the file.
+    :param min_word_size: Minimal word length.
+    :param stopwords: Compiled stopwords or None.
+    :param normalizer: Merges spellings of the same word, see normalizer.TokenNormalizer. None keeps words as they are.
+    :param memory_limit: Memory limit of approximate counting or None.
+    :param max_ngram: Longest counted phrase.
+    :return: Tuple which is safe to repr().
+    """
+
+    signature = (int(parsing_mode), min_word_size, tokenizer_signature(), stopwords_signature(stopwords or frozenset()))
+    if normalizer is not None:
+        signature += (("normalized", normalizer.signature()),)
+    if memory_limit is not None:
+        # Capacity too, counts depend on it and not on the bytes
+        signature += (("approximate", memory_limit, capacity_for_memory(memory_limit)),)
+    if max_ngram > 1:
+        signature += (("phrases", max_ngram, PHRASE_BREAK_PATTERN, NGRAM_MEMORY_LIMIT, NGRAM_MIN_COUNT),)
+    return signature
+
+
+def parse_file(file_path: str,
+               parsing_mode: FileParsingMode,
+               min_word_size: int = 0,
+               sorting: ParserSortWords = ParserSortWords.DESCENDING,
+               stopwords: frozenset[str] | None = None,
+               normalizer: TokenNormalizer | None = None,
+               max_words: int | None = None,
+               memory_limit: int | None = None,
+               max_ngram: int = 1) -> list[tuple[str, int]]:
+    """
+    Parse a JSON chat or a plain text file with the best suited parser.
+    :param file_path: Path to the Telegram chat export or a text file.
+    :param parsing_mode: Type of the file.
+    :param min_word_size: You can pop too short words right at the moment of parsing if you want.
+    :param sorting: How to sort words -- from most used to least or vice-versa
+    :param stopwords: Lowercase words which are never counted, see stopword_sets.compile_stopwords().
+    :param normalizer: Merges spellings of the same word, see normalizer.TokenNormalizer. None keeps words as they are.
+    :param max_words: Only this many words are returned. None means all of them.
+    :param memory_limit: Count approximately within this many bytes, see build_frequency_table(). None means exact.
+    :param max_ngram: Also count phrases up to this many words. 1 means single words only.
+    :return: List of tuple pairs ("word": str or "phrase of words": str, frequency: int).
+    """
+
+    freq_table = build_frequency_table(file_path, parsing_mode, min_word_size, stopwords, normalizer,
+                                       memory_limit=memory_limit, max_ngram=max_ngram)
+    return freq_table.select(max_words, sorting)
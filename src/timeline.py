@@ -0,0 +1,132 @@
+import heapq
+from collections import Counter
+from collections import deque
+from typing import Iterable, Iterator
+
+import numpy
+
+from chat_index import ChatIndex
+from constants import ParserSortWords
+from normalizer import TokenNormalizer
+from stopword_sets import compile_words
+from tokenizer import tokenize
+
+
+class SlidingWindowCounter:
+    """
+    Word counts of messages inside a moving time window.
+    Messages come in segments which enter and leave the window as a whole. Every segment is counted once,
+    its distinct words are normalized and filtered once, and the folded counts are added and later subtracted,
+    so no message is tokenized twice no matter how many windows it belongs to.
+    """
+
+    def __init__(self,
+                 min_word_size: int = 0,
+                 stopwords: Iterable[str] | None = None,
+                 normalizer: TokenNormalizer | None = None):
+        self.counts: dict[str, int] = {}
+        self.min_word_size = min_word_size
+        self.normalizer = normalizer
+        # Compiled sets are used as they are, raw lists are normalized the same way
+        if isinstance(stopwords, frozenset):
+            self.stopwords: frozenset[str] = stopwords
+        else:
+            self.stopwords = compile_words(stopwords or ())
+
+    def count_segment(self, texts: Iterable[str]) -> dict[str, int]:
+        """
+        Count words of a few messages and drop words that should never be counted.
+        :param texts: Texts of messages, or newline-separated runs of them like ChatIndex.iter_runs() gives.
+        Tokens are counted as they are, normalization and filters only see distinct words, like fold_counts() does
+        for the whole chat.
+        """
+        words_stat: Counter = Counter()
+        for text in texts:
+            words_stat.update(tokenize(text))
+        folded = self.normalizer.fold_counts(words_stat) if self.normalizer is not None else words_stat
+        return {word: count for word, count in folded.items()
+                if len(word) >= self.min_word_size and word.lower() not in self.stopwords}
+
+    def add(self, words_stat: dict[str, int]):
+        counts = self.counts
+        for word, count in words_stat.items():
+            counts[word] = counts.get(word, 0) + count
+
+    def remove(self, words_stat: dict[str, int]):
+        counts = self.counts
+        for word, count in words_stat.items():
+            count = counts[word] - count
+            if count:
+                counts[word] = count
+            else:
+                del counts[word]  # Keep the dict as small as the window vocabulary
+
+    def select(self, max_words: int, sorting: ParserSortWords) -> list[tuple[str, int]]:
+        """
+        Most or least popular words of the current window, ties ordered alphabetically like FrequencyTable does.
+        """
+        if sorting == ParserSortWords.DESCENDING:
+            return heapq.nsmallest(max_words, self.counts.items(), key=lambda x: (-x[1], x[0]))
+        return heapq.nsmallest(max_words, self.counts.items(), key=lambda x: (x[1], x[0]))
+
+
+def iter_timeline_frames(chat_index: ChatIndex,
+                         rows: numpy.ndarray,
+                         window_seconds: int,
+                         step_seconds: int,
+                         max_words: int,
+                         sorting: ParserSortWords = ParserSortWords.DESCENDING,
+                         min_word_size: int = 0,
+                         stopwords: Iterable[str] | None = None,
+                         normalizer: TokenNormalizer | None = None) -> Iterator[tuple[int, list[tuple[str, int]]]]:
+    """
+    Slide a time window over the chat and yield words of every window position.
+    Total work is linear in the amount of messages, not in messages times frames.
+    :param chat_index: Index of the chat.
+    :param rows: Rows of the index to use (e.g. only one sender), see ChatIndex.select().
+    :param window_seconds: Width of the window, e.g. 30 days.
+    :param step_seconds: How far the window moves between frames, e.g. 1 day.
+    :param max_words: How many words every frame gets.
+    :param sorting: How to sort words -- from most used to least or vice-versa
+    :param min_word_size: Shorter words are not counted.
+    :param stopwords: Words which are not counted.
+    :param normalizer: Merges spellings of the same word, see normalizer.TokenNormalizer. None keeps words as they are.
+    :return: Generator of (window start unix time, list of tuple pairs ("word": str, frequency: int)).
+    """
+    if len(rows) == 0:
+        return
+    if window_seconds <= 0 or step_seconds <= 0:
+        raise ValueError("Timeline window and step must be positive")
+
+    # Exports are chronological, but make sure anyway
+    timestamps = chat_index.timestamps[rows]
+    order = numpy.argsort(timestamps, kind="stable")
+    rows = rows[order]
+    timestamps = timestamps[order].tolist()
+
+    counter = SlidingWindowCounter(min_word_size, stopwords, normalizer)
+    # Counts of segments currently inside the window with the time their segment ends. Segments end at window ends
+    # and at every step, window starts fall on steps too, so a segment never has to leave the window partly.
+    window_segments: deque[tuple[int, dict[str, int]]] = deque()
+    entering = 0
+    first_start = window_start = timestamps[0]
+
+    while True:
+        window_end = window_start + window_seconds
+        while entering < len(rows) and timestamps[entering] < window_end:
+            next_step = timestamps[entering] + step_seconds - (timestamps[entering] - first_start) % step_seconds
+            segment_end = min(window_end, next_step)
+            first = entering
+            while entering < len(rows) and timestamps[entering] < segment_end:
+                entering += 1
+            words_stat = counter.count_segment(chat_index.iter_runs(rows[first:entering]))
+            counter.add(words_stat)
+            window_segments.append((segment_end, words_stat))
+        while window_segments and window_segments[0][0] <= window_start:
+            counter.remove(window_segments.popleft()[1])
+
+        yield window_start, counter.select(max_words, sorting)
+
+        if window_end > timestamps[-1]:
+            break
+        window_start += step_seconds
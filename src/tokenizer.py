@@ -0,0 +1,46 @@
+import re
+from typing import Iterator
+
+from constants import TOKEN_PATTERN
+from constants import TOKEN_GLUE_CHARS
+from constants import PHRASE_BREAK_PATTERN
+
+# Both are built once on import, so tokenizing is a single C-level pass over the text
+_GLUE_TABLE: dict[int, None] = str.maketrans("", "", TOKEN_GLUE_CHARS)
+_TOKEN_RE: re.Pattern = re.compile(TOKEN_PATTERN)
+_PHRASE_BREAK_RE: re.Pattern = re.compile(PHRASE_BREAK_PATTERN)
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Split text into words. Splits on any whitespace and punctuation, keeps hyphens inside of words.
+    :param text: Any text: a message, a line or a whole file.
+    :return: List of words in the order they appear.
+    """
+    return _TOKEN_RE.findall(text.translate(_GLUE_TABLE))
+
+
+def iter_tokens(text: str) -> Iterator[str]:
+    """
+    Lazy version of tokenize(), does not build a list with all words of the text.
+    :param text: Any text: a message, a line or a whole file.
+    :return: Generator of words.
+    """
+    for match in _TOKEN_RE.finditer(text.translate(_GLUE_TABLE)):
+        yield match.group()
+
+
+def tokenize_phrases(text: str) -> list[list[str]]:
+    """
+    Split text into pieces that a phrase can't cross (sentences, clauses, lines) and tokenize each of them.
+    :param text: Any text: a message, a line or a whole file.
+    :return: List of word lists, empty pieces are skipped.
+    """
+    return [words for piece in _PHRASE_BREAK_RE.split(text) if (words := tokenize(piece))]
+
+
+def tokenizer_signature() -> str:
+    """
+    String which changes whenever tokenizer settings change. Used as a part of cache keys.
+    """
+    return f"{TOKEN_PATTERN}|{TOKEN_GLUE_CHARS}"
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules live flat in src/ and import each other directly, same as when app.py is run from there
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
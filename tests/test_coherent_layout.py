@@ -0,0 +1,32 @@
+from wordcloud import WordCloud
+
+from coherent_layout import generate_coherent
+from font_metrics import FontMetricsCache
+
+FINAL_FREQUENCIES: dict[str, int] = {"anchor": 100, "grower": 100, "small": 10, "tiny": 5}
+
+
+def make_wordcloud() -> WordCloud:
+    # Fixed biggest size, so coherent frames and a fresh layout start from the same scale
+    return WordCloud(width=900, height=600, max_font_size=120, random_state=42)
+
+
+def test_growing_word_reaches_fresh_layout_size():
+    font_metrics = FontMetricsCache()
+    fresh = make_wordcloud()
+    fresh.generate_from_frequencies(FINAL_FREQUENCIES)
+    fresh_sizes = {word: font_size for (word, _), font_size, *_ in fresh.layout_}
+
+    previous = None
+    grower_sizes = []
+    for frame in range(20):
+        frequencies = dict(FINAL_FREQUENCIES, grower=min(100, 10 + frame * 10))
+        previous = generate_coherent(make_wordcloud(), frequencies, previous, font_metrics)
+        grower_sizes.append(previous["grower"][0])
+
+    # Grows a bit every frame until it's as big as a fresh layout makes it, then stays there
+    reached = grower_sizes.index(fresh_sizes["grower"])
+    assert all(earlier < later for earlier, later in zip(grower_sizes[:reached], grower_sizes[1:reached + 1]))
+    assert set(grower_sizes[reached:]) == {fresh_sizes["grower"]}
+    # Words after it are scaled from its real size, so they end up as in a fresh layout too
+    assert {word: placement[0] for word, placement in previous.items()} == fresh_sizes
@@ -0,0 +1,32 @@
+from collections import Counter
+
+from heavy_hitters import SpaceSavingCounter
+
+
+class PeakCounter(Counter):
+    """Counter which remembers the most words it has ever held."""
+
+    peak: int = 0
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self.peak = max(self.peak, len(self))
+
+
+def test_long_token_list_stays_within_capacity():
+    counter = SpaceSavingCounter(capacity=100)
+    counter._counts = PeakCounter()
+    # One window of text, all words distinct, like a log full of hashes
+    counter.update(f"junk{i}" for i in range(10_000))
+    assert counter._counts.peak <= 3 * counter.capacity
+    assert len(counter) <= 2 * counter.capacity
+
+
+def test_frequent_words_survive_pruning():
+    words = []
+    for i in range(2_000):
+        words += ["popular", f"junk{i}"]
+    counter = SpaceSavingCounter(capacity=50)
+    counter.update(words)
+    counts = dict(counter.items())
+    assert counts["popular"] - counter.error("popular") <= 2_000 <= counts["popular"]
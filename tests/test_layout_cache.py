@@ -0,0 +1,18 @@
+from wordcloud import WordCloud
+
+from constants import RENDER_SEED
+from layout_cache import LayoutCache
+
+STYLE: dict = {"background_color": "black", "mode": "RGB", "scale": 1, "contour_color": "black", "contour_width": 0}
+
+
+def test_restyled_colours_are_reproducible():
+    colors = []
+    for _ in range(2):
+        wordcloud = WordCloud(width=400, height=300, colormap="viridis", random_state=RENDER_SEED)
+        wordcloud.generate_from_frequencies({f"word{i}": 100 - i for i in range(30)})
+        cache = LayoutCache()
+        cache.store(("layout",), wordcloud, ("viridis", False, None))
+        restyled = cache.restyle(STYLE, "plasma", False)
+        colors.append([color for *_, color in restyled.layout_])
+    assert colors[0] == colors[1]
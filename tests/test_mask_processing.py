@@ -0,0 +1,22 @@
+import numpy
+import pytest
+from PIL import Image
+
+from mask_processing import load_mask
+from mask_processing import process_mask
+
+
+@pytest.mark.parametrize("file_name, dtype, mode", [("mask.png", numpy.uint16, "I;16"), ("mask.tif", numpy.int32, "I")])
+def test_16_bit_greyscale_is_scaled_not_clipped(tmp_path, file_name, dtype, mode):
+    # Black, mid grey and white columns
+    pixels = numpy.repeat(numpy.array([[0, 32768, 65535]], dtype=dtype), 4, axis=0)
+    mask_path = tmp_path / file_name
+    Image.fromarray(pixels).save(mask_path)
+    with Image.open(mask_path) as image:
+        assert image.mode == mode
+
+    mask = load_mask(str(mask_path))
+    assert mask.dtype == numpy.uint8
+    assert mask[0].tolist() == [0, 128, 255]
+    # Only the white column is masked, mid grey used to be clipped to white
+    assert process_mask(mask, "White is masked")[0].tolist() == [0, 0, 255]
@@ -0,0 +1,38 @@
+from heavy_hitters import SpaceSavingCounter
+from text_parse_helpers import build_phrase_table
+from text_parse_helpers import count_ngrams
+
+
+def test_once_seen_phrases_are_dropped_after_pruning():
+    # Small limit, so the phrase counter is pruned many times over
+    texts = [f"alpha{i} beta{i}." for i in range(5_000)]
+    texts += ["red apple."] * 40
+    words_stat, phrases_stat = count_ngrams(texts, max_n=2, phrases_stat=SpaceSavingCounter(capacity=64))
+    assert phrases_stat.error_bound > 0
+
+    table = build_phrase_table(words_stat, phrases_stat, min_phrase_count=3)
+    counts = dict(zip(table.words, table.counts.tolist()))
+    phrases = {word: count for word, count in counts.items() if " " in word}
+    assert list(phrases) == ["red apple"]
+    assert phrases["red apple"] <= 40
+
+
+def table_counts(texts: list[str], max_n: int = 3) -> dict[str, int]:
+    words_stat, phrases_stat = count_ngrams(texts, max_n=max_n)
+    table = build_phrase_table(words_stat, phrases_stat, min_phrase_count=3)
+    return dict(zip(table.words, table.counts.tolist()))
+
+
+def test_parts_of_a_phrase_are_not_duplicated():
+    counts = table_counts(["inside joke here."] * 20 + ["joke."] * 5 + ["other words."] * 4)
+    assert counts["inside joke here"] == 20
+    for part in ("inside", "here", "inside joke", "joke here"):
+        assert part not in counts
+    # Said on its own too, only that is left of it
+    assert counts["joke"] == 5
+    assert counts["other words"] == 4
+
+
+def test_repeated_words_inside_of_a_phrase():
+    counts = table_counts(["ha ha ha."] * 10)
+    assert counts == {"ha ha ha": 10}
@@ -0,0 +1,27 @@
+from stream_readers import iter_text_windows
+
+WINDOW_SIZE: int = 64
+
+
+def read_windows(tmp_path, text: str) -> list[str]:
+    path = tmp_path / "text.txt"
+    path.write_text(text, encoding="utf-8")
+    return list(iter_text_windows(str(path), WINDOW_SIZE))
+
+
+def test_text_without_whitespace_is_cut_within_limit(tmp_path):
+    # Minified dump: no whitespace at all, but separators in between
+    text = ",".join(f"item{i}" for i in range(2_000))
+    pieces = read_windows(tmp_path, text)
+    assert "".join(pieces) == text
+    assert len(pieces) > 1
+    assert max(len(piece) for piece in pieces) <= 2 * WINDOW_SIZE
+    # Cut after separators, so no word is split
+    assert all(piece.endswith(",") for piece in pieces[:-1])
+
+
+def test_text_without_separators_is_cut_at_window_end(tmp_path):
+    text = "字" * 10_000  # CJK text is all word characters
+    pieces = read_windows(tmp_path, text)
+    assert "".join(pieces) == text
+    assert max(len(piece) for piece in pieces) <= 2 * WINDOW_SIZE
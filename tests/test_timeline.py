@@ -0,0 +1,35 @@
+from collections import Counter
+
+import numpy
+
+from chat_index import ChatIndex
+from normalizer import TokenNormalizer
+from timeline import iter_timeline_frames
+from tokenizer import tokenize
+
+TEXTS: list[str] = ["Hello world", "hello THERE", "World of words", "the end", "Words words", "hello again",
+                    "WORLD", "there there", "end of the world", "Hello"]
+TIMESTAMPS: list[int] = [0, 5, 7, 13, 20, 21, 33, 34, 40, 55]
+
+
+def make_index() -> ChatIndex:
+    blob = "".join(text + "\n" for text in TEXTS).encode("utf-8")
+    offsets = numpy.cumsum([0] + [len(text.encode("utf-8")) + 1 for text in TEXTS]).astype(numpy.int64)
+    return ChatIndex([], [], numpy.full(len(TEXTS), -1, dtype=numpy.int32),
+                     numpy.array(TIMESTAMPS, dtype=numpy.int64), offsets, blob)
+
+
+def test_frames_match_counting_every_window_from_scratch():
+    chat_index = make_index()
+    normalizer = TokenNormalizer()
+    # Window is not a multiple of the step, so windows start and end in the middle of each other's steps
+    for window, step in ((10, 3), (7, 7), (4, 9)):
+        frames = list(iter_timeline_frames(chat_index, numpy.arange(len(TEXTS)), window, step, max_words=100,
+                                           min_word_size=3, stopwords=["the"], normalizer=normalizer))
+        for window_start, words in frames:
+            expected: Counter = Counter()
+            for text, timestamp in zip(TEXTS, TIMESTAMPS):
+                if window_start <= timestamp < window_start + window:
+                    expected.update(word for word in map(normalizer.normalize, tokenize(text))
+                                    if len(word) >= 3 and word != "the")
+            assert dict(words) == expected